@@ -4,6 +4,7 @@ NSE AlphaBot - Comprehensive Backtesting System
 Tests the trading strategy on historical data to validate performance
 """
 
+import os
 import sys
 sys.path.append('src')
 
@@ -22,7 +23,11 @@ from utils.multi_timeframe_analyzer import MultiTimeframeAnalyzer
 from utils.smc_analyzer import SMCAnalyzer
 from utils.advanced_technical import AdvancedTechnicalAnalyzer
 from utils.sentiment_analyzer import get_hybrid_sentiment
-from models.kronos_predictor import get_kronos_predictor
+from evaluation.kronos_forecast_table import KronosForecastTable
+from evaluation.exit_engine import resolve_exit
+from evaluation.component_scores import ComponentScoreTable
+from evaluation.trade_ledger import TradeLedger
+from evaluation.intraday_fills import IntradayBars, refine_exit
 
 # Configuration
 INITIAL_CAPITAL = 500000
@@ -54,7 +59,36 @@ TEST_STOCKS = [
 ]
 
 print("🚀 Loading AI/ML Models...")
-KRONOS_PREDICTOR = get_kronos_predictor(model_name="NeoQuasar/Kronos-small")
+# Kronos component comes from the precomputed walk-forward forecast table
+# (src/evaluation/kronos_forecast_table.py) - no model call per ticker per day
+KRONOS_FORECASTS = KronosForecastTable.load()
+# Simplified-scoring Kronos value used before the forecast table existed; also
+# used for (ticker, date) rows missing from the table
+KRONOS_FALLBACK_SCORE = 0.6
+if KRONOS_FORECASTS is not None:
+    print(f"✅ Loaded Kronos forecast table ({len(KRONOS_FORECASTS.df)} forecasts)")
+else:
+    print(f"⚠️  Kronos forecast table not found, using fallback Kronos score ({KRONOS_FALLBACK_SCORE})")
+
+# Real generate_ultimate_signal components per (ticker, date), evaluated once with
+# array ops (src/evaluation/component_scores.py); simplified scoring when not built
+COMPONENT_SCORES = ComponentScoreTable.load(
+    weights={
+        'kronos_score': WEIGHT_KRONOS, 'mtf_score': WEIGHT_MTF, 'smc_score': WEIGHT_SMC,
+        'tech_score': WEIGHT_TECHNICAL, 'drl_score': WEIGHT_DRL, 'sentiment_score': WEIGHT_SENTIMENT,
+    },
+    min_confidence=MIN_CONFIDENCE,
+    min_expected_return=MIN_EXPECTED_RETURN,
+)
+if COMPONENT_SCORES is not None:
+    print(f"✅ Loaded component score store ({len(COMPONENT_SCORES.df)} ticker-days)")
+else:
+    print("⚠️  Component score store not found, using simplified scoring")
+
+# Stop/target fills at the first touch on hourly bars (src/evaluation/intraday_fills.py)
+INTRADAY_BARS = IntradayBars() if os.getenv('INTRADAY_FILLS', '0') == '1' else None
+if INTRADAY_BARS is not None:
+    print(f"✅ Intraday fills on {INTRADAY_BARS.interval} bars ({INTRADAY_BARS.cache_dir})")
 
 try:
     DRL_AGENT = SAC.load("models/sac_nse_nifty100.zip")
@@ -85,6 +119,7 @@ class Trade:
         self.pnl_pct = 0
         self.days_held = 0
         self.status = 'OPEN'
+        self.planned_exit = None  # (exit_date, exit_price, exit_reason) from check_exit
     
     def close(self, exit_date, exit_price, exit_reason):
         """Close the trade"""
@@ -147,6 +182,38 @@ def calculate_indicators(df):
     
     return df.dropna()
 
+def build_trade_signal(ticker, current_price, atr, rsi, confidence, expected_return):
+    """
+    Trading levels and size for an entry (2 ATR stop, 2R/3R/4R targets)
+    Returns signal dict or None
+    """
+    stop_loss = current_price - (2 * atr)
+    risk_per_share = current_price - stop_loss
+    
+    target_1 = current_price + (risk_per_share * 2)
+    target_2 = current_price + (risk_per_share * 3)
+    target_3 = current_price + (risk_per_share * 4)
+    
+    # Calculate position size
+    risk_amount = INITIAL_CAPITAL * RISK_PER_TRADE * confidence
+    shares = int(risk_amount / risk_per_share)
+    shares = min(shares, int((INITIAL_CAPITAL * 0.20) / current_price))
+    
+    if shares > 0:
+        return {
+            'ticker': ticker,
+            'entry_price': current_price,
+            'shares': shares,
+            'stop_loss': stop_loss,
+            'target_1': target_1,
+            'target_2': target_2,
+            'target_3': target_3,
+            'confidence': confidence,
+            'expected_return': expected_return,
+            'rsi': rsi
+        }
+    return None
+
 def analyze_stock_simple(ticker, df, current_date):
     """
     Simplified analysis for backtesting (faster)
@@ -171,12 +238,21 @@ def analyze_stock_simple(ticker, df, current_date):
         macd_signal_val = float(hist_df['macd_signal'].iloc[-1])
         atr = float(hist_df['atr'].iloc[-1])
         
+        # Exact ultimate-bot decision from the precomputed component store
+        if COMPONENT_SCORES is not None:
+            components = COMPONENT_SCORES.get(ticker, current_date)
+            if components is None or components['signal'] != 'BUY':
+                return None
+            return build_trade_signal(ticker, current_price, atr, rsi,
+                                      components['final_confidence'], components['expected_return'])
+        
         # Simple scoring (faster than full analysis)
         mtf_score = 0.7 if macd > macd_signal_val else 0.3
         smc_score = 0.6
         tech_score = 0.7 if rsi < 70 and rsi > 30 else 0.4
         sentiment_score = 0.5
-        kronos_score = 0.6
+        kronos_score = KRONOS_FORECASTS.score(ticker, current_date, default=KRONOS_FALLBACK_SCORE) \
+            if KRONOS_FORECASTS is not None else KRONOS_FALLBACK_SCORE
         drl_score = 0.5
         
         # Calculate confidence
@@ -206,32 +282,7 @@ def analyze_stock_simple(ticker, df, current_date):
             expected_return >= 1.5 and     # Lower threshold for backtest
             rsi < 75 and rsi > 25):
             
-            # Calculate trading levels
-            stop_loss = current_price - (2 * atr)
-            risk_per_share = current_price - stop_loss
-            
-            target_1 = current_price + (risk_per_share * 2)
-            target_2 = current_price + (risk_per_share * 3)
-            target_3 = current_price + (risk_per_share * 4)
-            
-            # Calculate position size
-            risk_amount = INITIAL_CAPITAL * RISK_PER_TRADE * final_confidence
-            shares = int(risk_amount / risk_per_share)
-            shares = min(shares, int((INITIAL_CAPITAL * 0.20) / current_price))
-            
-            if shares > 0:
-                return {
-                    'ticker': ticker,
-                    'entry_price': current_price,
-                    'shares': shares,
-                    'stop_loss': stop_loss,
-                    'target_1': target_1,
-                    'target_2': target_2,
-                    'target_3': target_3,
-                    'confidence': final_confidence,
-                    'expected_return': expected_return,
-                    'rsi': rsi
-                }
+            return build_trade_signal(ticker, current_price, atr, rsi, final_confidence, expected_return)
         
         return None
         
@@ -242,40 +293,33 @@ def check_exit(trade, df, current_date):
     """
     Check if trade should be exited
     Returns (should_exit, exit_price, exit_reason)
+    
+    The first stop/target/time-stop hit after entry is resolved once per trade
+    (src/evaluation/exit_engine.py) and reported when current_date reaches it,
+    instead of re-scanning every bar since entry on every date. With
+    INTRADAY_FILLS=1 the fill on that day comes from the first touch on hourly bars.
     """
     try:
-        # Get data from entry to current date
-        trade_df = df[(df.index >= trade.entry_date) & (df.index <= current_date)].copy()
+        if trade.planned_exit is None:
+            dates = df.index.values
+            entry_pos = int(df.index.searchsorted(trade.entry_date, side='right')) - 1
+            pos, exit_price, exit_reason = resolve_exit(
+                dates, df['High'].values, df['Low'].values, df['Close'].values,
+                entry_pos, trade.stop_loss, [trade.target_1, trade.target_2, trade.target_3],
+                time_stop_days=10, entry_date=pd.Timestamp(trade.entry_date).to_datetime64()
+            )
+            exit_date = df.index[pos] if pos >= 0 else None
+            if INTRADAY_BARS is not None:
+                exit_price, exit_reason = refine_exit(
+                    INTRADAY_BARS, trade.ticker, exit_date, trade.stop_loss,
+                    [trade.target_1, trade.target_2, trade.target_3], exit_price, exit_reason
+                )
+            trade.planned_exit = (exit_date, exit_price, exit_reason)
         
-        if len(trade_df) == 0:
+        exit_date, exit_price, exit_reason = trade.planned_exit
+        if exit_date is None or exit_date > current_date:
             return False, None, None
-        
-        for date, row in trade_df.iterrows():
-            if date <= trade.entry_date:
-                continue
-            
-            high = float(row['High'])
-            low = float(row['Low'])
-            close = float(row['Close'])
-            
-            # Check stop loss
-            if low <= trade.stop_loss:
-                return True, trade.stop_loss, 'STOP_LOSS'
-            
-            # Check targets
-            if high >= trade.target_3:
-                return True, trade.target_3, 'TARGET_3'
-            elif high >= trade.target_2:
-                return True, trade.target_2, 'TARGET_2'
-            elif high >= trade.target_1:
-                return True, trade.target_1, 'TARGET_1'
-            
-            # Check time stop (10 days)
-            days_held = (date - trade.entry_date).days
-            if days_held >= 10:
-                return True, close, 'TIME_STOP'
-        
-        return False, None, None
+        return True, exit_price, exit_reason
         
     except Exception as e:
         return False, None, None
@@ -471,16 +515,20 @@ def run_backtest():
             'avg_days_held': round(avg_days, 1),
             'sharpe_ratio': round(sharpe, 2)
         },
-        'all_trades': [t.to_dict() for t in closed_trades]
     }
     
+    # Summary as JSON, the trades themselves as a columnar ledger next to it
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f'backtest_results_{timestamp}.json'
+    ledger = TradeLedger.from_trades(closed_trades)
+    results['trades_file'] = f'backtest_trades_{timestamp}.parquet'
+    ledger.save(results['trades_file'])
     
     with open(filename, 'w') as f:
         json.dump(results, f, indent=2)
     
-    print(f"✅ Results saved to: {filename}")
+    print(f"✅ Results saved to: {filename} (trades: {results['trades_file']})")
+    results['ledger'] = ledger
     print()
     
     # Print top winners and losers
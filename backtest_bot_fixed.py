@@ -5,6 +5,8 @@ Realistic backtest with proper capital management
 """
 
 import sys
+import time
+import argparse
 sys.path.append('src')
 
 import yfinance as yf
@@ -15,6 +17,12 @@ import json
 import warnings
 warnings.filterwarnings("ignore")
 
+# Indicators/scores are computed once per ticker; the loop indexes arrays by date
+from evaluation.fast_backtest import Trade, run_fast_backtest
+from evaluation.metrics import equity_from_trades, equity_metrics
+from evaluation.trade_ledger import TradeLedger
+from evaluation.intraday_fills import IntradayBars
+
 # Configuration
 INITIAL_CAPITAL = 500000
 RISK_PER_TRADE = 0.02
@@ -33,57 +41,6 @@ TEST_STOCKS = [
     'MARUTI.NS', 'SUNPHARMA.NS', 'TITAN.NS', 'WIPRO.NS', 'KOTAKBANK.NS'
 ]
 
-class Trade:
-    """Represents a single trade"""
-    def __init__(self, ticker, entry_date, entry_price, shares, stop_loss, 
-                 target_1, target_2, target_3):
-        self.ticker = ticker
-        self.entry_date = entry_date
-        self.entry_price = entry_price
-        self.shares = shares
-        self.stop_loss = stop_loss
-        self.target_1 = target_1
-        self.target_2 = target_2
-        self.target_3 = target_3
-        
-        self.exit_date = None
-        self.exit_price = None
-        self.exit_reason = None
-        self.pnl = 0
-        self.pnl_pct = 0
-        self.days_held = 0
-        self.status = 'OPEN'
-        self.capital_used = entry_price * shares
-    
-    def close(self, exit_date, exit_price, exit_reason):
-        """Close the trade"""
-        self.exit_date = exit_date
-        self.exit_price = exit_price
-        self.exit_reason = exit_reason
-        self.pnl = (exit_price - self.entry_price) * self.shares
-        self.pnl_pct = (exit_price - self.entry_price) / self.entry_price * 100
-        self.days_held = (exit_date - self.entry_date).days
-        self.status = 'CLOSED'
-    
-    def to_dict(self):
-        """Convert to dictionary"""
-        return {
-            'ticker': self.ticker,
-            'entry_date': self.entry_date.strftime('%Y-%m-%d'),
-            'entry_price': round(self.entry_price, 2),
-            'shares': self.shares,
-            'capital_used': round(self.capital_used, 2),
-            'stop_loss': round(self.stop_loss, 2),
-            'target_1': round(self.target_1, 2),
-            'exit_date': self.exit_date.strftime('%Y-%m-%d') if self.exit_date else None,
-            'exit_price': round(self.exit_price, 2) if self.exit_price else None,
-            'exit_reason': self.exit_reason,
-            'pnl': round(self.pnl, 2),
-            'pnl_pct': round(self.pnl_pct, 2),
-            'days_held': self.days_held,
-            'status': self.status
-        }
-
 def calculate_indicators(df):
     """Calculate technical indicators"""
     df['ema_20'] = df['Close'].ewm(span=20).mean()
@@ -114,6 +71,9 @@ def analyze_stock(ticker, df, current_date, available_capital):
     """
     Analyze stock for entry signal
     Returns signal dict or None
+    
+    Reference implementation (recomputes indicators on the whole history each
+    call); run_backtest uses evaluation.fast_backtest unless --reference is given
     """
     try:
         # Get data up to current date
@@ -199,6 +159,8 @@ def check_exit(trade, df, current_date):
     """
     Check if trade should be exited
     Returns (should_exit, exit_price, exit_reason)
+    
+    Reference implementation, used with --reference
     """
     try:
         # Get data from entry to current date
@@ -237,48 +199,13 @@ def check_exit(trade, df, current_date):
     except Exception as e:
         return False, None, None
 
-def run_backtest():
-    """Run backtest"""
-    print("="*100)
-    print(f"🔬 NSE AlphaBot - Realistic Backtest")
-    print("="*100)
-    print(f"Period: {BACKTEST_START} to {BACKTEST_END}")
-    print(f"Initial Capital: ₹{INITIAL_CAPITAL:,}")
-    print(f"Risk per Trade: {RISK_PER_TRADE:.1%}")
-    print(f"Max Positions: {MAX_POSITIONS}")
-    print(f"Test Stocks: {len(TEST_STOCKS)}")
-    print("="*100)
-    print()
-    
-    # Download data
-    print("📥 Downloading historical data...")
-    stock_data = {}
-    
-    for i, ticker in enumerate(TEST_STOCKS, 1):
-        print(f"[{i:2}/{len(TEST_STOCKS)}] {ticker:15}...", end=" ")
-        try:
-            df = yf.download(ticker, start=BACKTEST_START, end=BACKTEST_END,
-                           interval='1d', auto_adjust=True, progress=False)
-            
-            if isinstance(df.columns, pd.MultiIndex):
-                df.columns = df.columns.get_level_values(0)
-            
-            if not df.empty and len(df) > 50:
-                stock_data[ticker] = df
-                print(f"✅ {len(df)} days")
-            else:
-                print("❌ Insufficient data")
-        except Exception as e:
-            print(f"❌ Error")
-    
-    print(f"\n✅ Downloaded {len(stock_data)} stocks\n")
-    
-    # Run backtest
-    print("="*100)
-    print("🔬 Running Backtest...")
-    print("="*100)
-    print()
+def simulate_reference(stock_data):
+    """
+    Original per-date simulation (analyze_stock/check_exit on DataFrames)
     
+    Returns:
+        (all_trades, final_capital, all_dates)
+    """
     all_trades = []
     open_trades = []
     capital = INITIAL_CAPITAL
@@ -346,6 +273,73 @@ def run_backtest():
             trade.close(final_date, final_price, 'BACKTEST_END')
             capital += trade.capital_used + trade.pnl
     
+    return all_trades, capital, all_dates
+
+def run_backtest(reference=False, intraday=False):
+    """
+    Run backtest
+    
+    Args:
+        reference: Use the original per-date recomputation (slow, for parity checks)
+        intraday: Fill stop/target exits at the first touch on hourly bars (precomputed engine only)
+    """
+    print("="*100)
+    print(f"🔬 NSE AlphaBot - Realistic Backtest")
+    print("="*100)
+    print(f"Period: {BACKTEST_START} to {BACKTEST_END}")
+    print(f"Initial Capital: ₹{INITIAL_CAPITAL:,}")
+    print(f"Risk per Trade: {RISK_PER_TRADE:.1%}")
+    print(f"Max Positions: {MAX_POSITIONS}")
+    print(f"Test Stocks: {len(TEST_STOCKS)}")
+    print("="*100)
+    print()
+    
+    # Download data
+    print("📥 Downloading historical data...")
+    stock_data = {}
+    
+    for i, ticker in enumerate(TEST_STOCKS, 1):
+        print(f"[{i:2}/{len(TEST_STOCKS)}] {ticker:15}...", end=" ")
+        try:
+            df = yf.download(ticker, start=BACKTEST_START, end=BACKTEST_END,
+                           interval='1d', auto_adjust=True, progress=False)
+            
+            if isinstance(df.columns, pd.MultiIndex):
+                df.columns = df.columns.get_level_values(0)
+            
+            if not df.empty and len(df) > 50:
+                stock_data[ticker] = df
+                print(f"✅ {len(df)} days")
+            else:
+                print("❌ Insufficient data")
+        except Exception as e:
+            print(f"❌ Error")
+    
+    print(f"\n✅ Downloaded {len(stock_data)} stocks\n")
+    
+    # Run backtest
+    print("="*100)
+    print("🔬 Running Backtest...")
+    print("="*100)
+    print()
+    
+    sim_start = time.perf_counter()
+    intraday_bars = IntradayBars() if intraday and not reference else None
+    if reference:
+        all_trades, capital, all_dates = simulate_reference(stock_data)
+    else:
+        all_trades, capital, all_dates = run_fast_backtest(stock_data, TEST_STOCKS, BACKTEST_START, params={
+            'initial_capital': INITIAL_CAPITAL,
+            'risk_per_trade': RISK_PER_TRADE,
+            'max_positions': MAX_POSITIONS,
+            'min_confidence': MIN_CONFIDENCE,
+            'min_expected_return': MIN_EXPECTED_RETURN,
+        }, intraday=intraday_bars)
+    print(f"\n⏱️  Simulation: {time.perf_counter() - sim_start:.2f}s ({'reference' if reference else 'precomputed'} engine)")
+    if intraday_bars is not None:
+        print(f"🕐 Intraday fills: {intraday_bars.stats['downloaded']} months downloaded, "
+              f"{intraday_bars.stats['disk']} cached, {intraday_bars.stats['failed']} failed")
+    
     print()
     print("="*100)
     print("📊 BACKTEST RESULTS")
@@ -367,9 +361,19 @@ def run_backtest():
     final_capital = capital
     total_return = (final_capital - INITIAL_CAPITAL) / INITIAL_CAPITAL * 100
     
-    # Sharpe ratio
-    returns = [t.pnl_pct for t in closed_trades]
-    sharpe = (np.mean(returns) / np.std(returns) * np.sqrt(252/avg_days)) if returns and np.std(returns) > 0 else 0
+    # Daily marked-to-market equity -> Sharpe/Sortino/drawdown from daily returns
+    closes = pd.DataFrame({ticker: df['Close'] for ticker, df in stock_data.items()})
+    closes = closes[closes.index >= pd.Timestamp(BACKTEST_START)]
+    trade_table = pd.DataFrame([{
+        'ticker': t.ticker, 'entry_date': t.entry_date, 'entry_price': t.entry_price, 'shares': t.shares,
+        'exit_date': t.exit_date, 'exit_price': t.exit_price
+    } for t in closed_trades])
+    portfolio = equity_from_trades(trade_table, closes, INITIAL_CAPITAL)
+    metrics = {name: float(values[0]) for name, values in equity_metrics(
+        portfolio['equity'].values, dates=closes.index,
+        invested=portfolio['invested'].values, traded=portfolio['traded'].values
+    ).items()}
+    sharpe = metrics['sharpe']
     
     # Print results
     print(f"Period: {BACKTEST_START} to {BACKTEST_END}")
@@ -391,7 +395,13 @@ def run_backtest():
     print(f"Average Win:     {avg_win:+.2f}%")
     print(f"Average Loss:    {avg_loss:+.2f}%")
     print(f"Avg Days Held:   {avg_days:.1f} days")
-    print(f"Sharpe Ratio:    {sharpe:.2f}")
+    print()
+    
+    print(f"CAGR:            {metrics['cagr']*100:+.2f}%")
+    print(f"Sharpe Ratio:    {sharpe:.2f} (daily)")
+    print(f"Sortino Ratio:   {metrics['sortino']:.2f}")
+    print(f"Max Drawdown:    {-metrics['max_drawdown']*100:.2f}% ({metrics['max_drawdown_days']:.0f} days underwater)")
+    print(f"Exposure:        {metrics['exposure']*100:.1f}% of days | turnover {metrics['turnover']:.1f}x / year")
     print()
     
     # Exit reasons
@@ -427,18 +437,28 @@ def run_backtest():
             'avg_win_pct': round(avg_win, 2),
             'avg_loss_pct': round(avg_loss, 2),
             'avg_days_held': round(avg_days, 1),
-            'sharpe_ratio': round(sharpe, 2)
+            'sharpe_ratio': round(sharpe, 2),
+            'sortino_ratio': round(metrics['sortino'], 2),
+            'cagr_pct': round(metrics['cagr'] * 100, 2),
+            'max_drawdown_pct': round(metrics['max_drawdown'] * 100, 2),
+            'max_drawdown_days': int(metrics['max_drawdown_days']),
+            'exposure_pct': round(metrics['exposure'] * 100, 1),
+            'turnover': round(metrics['turnover'], 2)
         },
-        'all_trades': [t.to_dict() for t in closed_trades]
     }
     
+    # Summary as JSON, the trades themselves as a columnar ledger next to it
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     filename = f'backtest_results_{timestamp}.json'
+    ledger = TradeLedger.from_trades(closed_trades)
+    results['trades_file'] = f'backtest_trades_{timestamp}.parquet'
+    ledger.save(results['trades_file'])
     
     with open(filename, 'w') as f:
         json.dump(results, f, indent=2)
     
-    print(f"✅ Results saved to: {filename}")
+    print(f"✅ Results saved to: {filename} (trades: {results['trades_file']})")
+    results['ledger'] = ledger
     print()
     
     # Print top winners/losers
@@ -469,4 +489,24 @@ def run_backtest():
     return results
 
 if __name__ == "__main__":
-    results = run_backtest()
+    parser = argparse.ArgumentParser(description="NSE AlphaBot realistic backtest")
+    parser.add_argument("--reference", action="store_true",
+                        help="Use the original per-date indicator recomputation (slow)")
+    parser.add_argument("--intraday", action="store_true",
+                        help="Fill stop/target exits at the first touch on hourly bars")
+    parser.add_argument("--bootstrap", type=int, default=0,
+                        help="Monte Carlo resamples of the closed trades (0 = skip)")
+    args = parser.parse_args()
+    
+    results = run_backtest(reference=args.reference, intraday=args.intraday)
+    
+    if args.bootstrap and results and len(results['ledger']):
+        from evaluation.bootstrap import trade_returns, bootstrap_trades, summarize_bootstrap, print_summary
+        
+        returns = trade_returns(results['ledger'].to_frame(), INITIAL_CAPITAL)
+        print()
+        print("="*100)
+        print(f"🎲 TRADE BOOTSTRAP ({args.bootstrap:,} resamples)")
+        print("="*100)
+        print_summary(summarize_bootstrap(bootstrap_trades(returns, args.bootstrap)),
+                      observed_win_rate=float((returns > 0).mean()))
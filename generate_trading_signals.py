@@ -10,8 +10,14 @@ Generates actionable BUY/SELL/HOLD signals with:
 """
 
 import sys
+import time
 sys.path.append('src')
 
+# Wall-clock origin for the time-to-first-signal report
+_START_TIME = time.perf_counter()
+
+import os
+import argparse
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -20,14 +26,13 @@ import json
 import warnings
 warnings.filterwarnings("ignore")
 
-from stable_baselines3 import SAC
-
 # Import analyzers
 from utils.multi_timeframe_analyzer import MultiTimeframeAnalyzer
 from utils.smc_analyzer import SMCAnalyzer
 from utils.advanced_technical import AdvancedTechnicalAnalyzer
 from utils.sentiment_analyzer import get_hybrid_sentiment
-from models.kronos_predictor import get_kronos_predictor
+from models.drl_agent import (DRL_MODEL_PATHS, load_drl_agent, build_observations,
+                              predict_actions, predict_latest_actions)
 from utils.pkscreener_integration import screen_nse_stocks
 from bot.trading_signal_generator import (
     generate_complete_signal, 
@@ -41,6 +46,10 @@ RISK_PER_TRADE = 0.02
 MIN_CONFIDENCE = 0.75
 MIN_EXPECTED_RETURN = 2.5
 
+# Kronos Monte Carlo paths per forecast (<= 1 = single sampled path, the default;
+# > 1 is opt-in: n_samples decodes per signal, confidence = share of paths agreeing)
+KRONOS_MC_SAMPLES = int(os.getenv('KRONOS_MC_SAMPLES', '1'))
+
 # Weights
 WEIGHT_KRONOS = 0.25
 WEIGHT_MTF = 0.20
@@ -49,16 +58,28 @@ WEIGHT_TECHNICAL = 0.15
 WEIGHT_DRL = 0.15
 WEIGHT_SENTIMENT = 0.05
 
-# Load models
-print("🚀 Loading AI/ML Models...")
-KRONOS_PREDICTOR = get_kronos_predictor(model_name="NeoQuasar/Kronos-small")
+# Models are loaded on first use so `--help` and screening stay fast
+KRONOS_PREDICTOR = None
+DRL_AGENT = None
+_models_loaded = False
+
 
-try:
-    DRL_AGENT = SAC.load("models/sac_nse_nifty100.zip")
-    print("✅ Loaded Nifty 100 DRL agent")
-except:
-    DRL_AGENT = None
-    print("⚠️  DRL agent not found")
+def load_models():
+    """Load Kronos + Nifty 100 DRL agent once (torch is imported here)"""
+    global KRONOS_PREDICTOR, DRL_AGENT, _models_loaded
+    
+    if _models_loaded:
+        return
+    
+    print("🚀 Loading AI/ML Models...")
+    # Prefer a running Kronos server (warm model, shared micro-batches)
+    from models.kronos_server import connect_kronos_server
+    KRONOS_PREDICTOR = connect_kronos_server()
+    if KRONOS_PREDICTOR is None:
+        from models.kronos_predictor import get_kronos_predictor
+        KRONOS_PREDICTOR = get_kronos_predictor(model_name="NeoQuasar/Kronos-small")
+    DRL_AGENT = load_drl_agent(DRL_MODEL_PATHS[:1])
+    _models_loaded = True
 
 def get_stock_data(ticker, period="6mo"):
     """Fetch stock data"""
@@ -105,19 +126,25 @@ def calculate_indicators(df):
     
     return df.dropna()
 
-def analyze_stock(ticker):
+def analyze_stock(ticker, df=None, drl_action=None):
     """
     Analyze stock and generate signal
     
+    Args:
+        ticker: Stock ticker symbol
+        df: Daily data with indicators (fetched if None)
+        drl_action: Precomputed DRL action from a batched pass (computed here if None)
+    
     Returns:
         Complete trading signal dict or None
     """
     # Get data
-    df = get_stock_data(ticker)
-    if df is None or len(df) < 50:
-        return None
-    
-    df = calculate_indicators(df)
+    if df is None:
+        df = get_stock_data(ticker)
+        if df is None or len(df) < 50:
+            return None
+        
+        df = calculate_indicators(df)
     
     # Get current values
     current_price = df['Close'].iloc[-1]
@@ -176,8 +203,15 @@ def analyze_stock(ticker):
     kronos_score = 0.5
     pred_change = 0.0
     
+    load_models()
+    
     try:
-        kronos_prediction = KRONOS_PREDICTOR.predict(df, horizon=7)
+        if KRONOS_MC_SAMPLES > 1:
+            kronos_prediction = KRONOS_PREDICTOR.predict_distribution(
+                df, horizon=7, n_samples=KRONOS_MC_SAMPLES, ticker=ticker
+            )
+        else:
+            kronos_prediction = KRONOS_PREDICTOR.predict(df, horizon=7, ticker=ticker)
         pred_change = kronos_prediction['predicted_change']
         kronos_confidence = kronos_prediction['confidence']
         
@@ -191,16 +225,11 @@ def analyze_stock(ticker):
     drl_score = 0.5
     
     try:
-        if DRL_AGENT is not None:
-            price_norm = np.clip(current_price / 10000.0, 0, 10)
-            rsi_norm = np.clip(rsi / 100.0, 0, 1)
-            macd_norm = np.clip(macd / 100.0, -1, 1)
-            
-            obs = np.array([price_norm, rsi_norm, macd_norm, 1.0, 0.0], dtype=np.float32)
-            obs = np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=0.0)
-            
-            drl_action, _ = DRL_AGENT.predict(obs, deterministic=True)
-            drl_score = 0.5 + (drl_action[0] * 0.5)
+        if drl_action is None and DRL_AGENT is not None:
+            drl_action = float(predict_actions(DRL_AGENT, build_observations(current_price, rsi, macd)))
+        
+        if drl_action is not None:
+            drl_score = 0.5 + (drl_action * 0.5)
             drl_score = np.clip(drl_score, 0, 1)
     except:
         pass
@@ -267,8 +296,13 @@ def analyze_stock(ticker):
     
     return signal
 
-def main():
-    """Main function"""
+def main(screen_only=False):
+    """
+    Main function
+    
+    Args:
+        screen_only: If True, list screened stocks and exit without loading models
+    """
     print("="*100)
     print(f"🚀 NSE AlphaBot - Trading Signal Generator - {datetime.now().strftime('%Y-%m-%d %H:%M')}")
     print("="*100)
@@ -290,20 +324,45 @@ def main():
     print(f"✅ Found {len(qualified_stocks)} qualified stocks")
     print()
     
+    if screen_only:
+        for ticker in qualified_stocks:
+            print(f"  {ticker}")
+        print(f"\n⏱️  Screening finished in {time.perf_counter() - _START_TIME:.1f}s")
+        return
+    
+    load_models()
+    
     # Analyze stocks
     print("📊 STEP 2: Analyzing Stocks...")
     print("="*100)
     print()
     
+    # Fetch all qualified stocks first so the DRL agent scores them in one forward pass
+    stock_frames = {}
+    for ticker in qualified_stocks:
+        df = get_stock_data(ticker)
+        if df is not None and len(df) >= 50:
+            stock_frames[ticker] = calculate_indicators(df)
+    
+    drl_actions = predict_latest_actions(DRL_AGENT, stock_frames)
+    
     all_signals = []
     buy_signals = []
     sell_signals = []
+    time_to_first_signal = None
     
     for i, ticker in enumerate(qualified_stocks, 1):
         print(f"[{i:2}/{len(qualified_stocks)}] Analyzing {ticker:15}...", end=" ")
         
+        if ticker not in stock_frames:
+            print("❌ No data")
+            continue
+        
         try:
-            signal = analyze_stock(ticker)
+            signal = analyze_stock(ticker, df=stock_frames[ticker], drl_action=drl_actions.get(ticker))
+            
+            if signal is not None and time_to_first_signal is None:
+                time_to_first_signal = time.perf_counter() - _START_TIME
             
             if signal is None:
                 print("❌ No data")
@@ -331,6 +390,8 @@ def main():
     print(f"BUY Signals: {len(buy_signals)}")
     print(f"SELL Signals: {len(sell_signals)}")
     print(f"HOLD Signals: {len(all_signals) - len(buy_signals) - len(sell_signals)}")
+    if time_to_first_signal is not None:
+        print(f"⏱️  Time to first signal: {time_to_first_signal:.1f}s")
     print("="*100)
     print()
     
@@ -391,4 +452,14 @@ def main():
     print("="*100)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="NSE AlphaBot - trading signal generator")
+    parser.add_argument("--screen-only", action="store_true",
+                        help="Run the screener only, without loading any models")
+    parser.add_argument("--offline", action="store_true",
+                        help="Load Kronos weights from the local cache only (never touch the hub)")
+    args = parser.parse_args()
+    
+    if args.offline:
+        os.environ['KRONOS_OFFLINE'] = '1'
+    
+    main(screen_only=args.screen_only)
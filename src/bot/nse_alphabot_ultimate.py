@@ -20,8 +20,14 @@ Total: 100%
 """
 
 import sys
+import time
 sys.path.append('src')
 
+# Wall-clock origin for the time-to-first-signal report
+_START_TIME = time.perf_counter()
+
+import os
+import argparse
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -29,17 +35,14 @@ from datetime import datetime
 import warnings
 warnings.filterwarnings("ignore")
 
-import torch
-from stable_baselines3 import SAC
-
 # Import all analyzers
 from utils.multi_timeframe_analyzer import MultiTimeframeAnalyzer
 from utils.smc_analyzer import SMCAnalyzer
 from utils.advanced_technical import AdvancedTechnicalAnalyzer
 from utils.sentiment_analyzer import get_hybrid_sentiment
 
-# Import Kronos predictor
-from models.kronos_predictor import get_kronos_predictor
+# DRL agent is loaded on first use (stable_baselines3/torch imported only then)
+from models.drl_agent import get_drl_agent, build_observations, predict_actions, predict_latest_actions
 
 # === CONFIGURATION ===
 CAPITAL = 500000
@@ -48,6 +51,10 @@ MAX_POSITIONS = 8
 MIN_CONFIDENCE = 0.75  # 75% - Higher threshold for ultimate bot
 MIN_EXPECTED_RETURN = 2.5  # 2.5%
 
+# Kronos Monte Carlo paths per forecast (<= 1 = single sampled path, the default;
+# > 1 is opt-in: n_samples decodes per signal, confidence = share of paths agreeing)
+KRONOS_MC_SAMPLES = int(os.getenv('KRONOS_MC_SAMPLES', '1'))
+
 # === OPTIMIZED WEIGHTS (Updated for Nifty 100 DRL) ===
 WEIGHT_MTF = 0.20          # Multi-Timeframe: 20%
 WEIGHT_SMC = 0.20          # Smart Money Concepts: 20%
@@ -63,31 +70,34 @@ from utils.pkscreener_integration import screen_nse_stocks
 # Get screened stocks dynamically (will be populated at runtime)
 ELITE_STOCKS = []
 
-# Load models globally
-print("🚀 Loading AI/ML Models...")
+# Models are loaded lazily: `--help` and the screening stage never pay for them
+KRONOS_PREDICTOR = None
+DRL_AGENT = None
+_models_loaded = False
 
-# Load Kronos predictor (replaces TrendMaster)
-KRONOS_PREDICTOR = get_kronos_predictor(model_name="NeoQuasar/Kronos-small")
 
-# Load DRL agent (try Nifty 100 model first, then fallbacks)
-try:
-    DRL_AGENT = SAC.load("models/sac_nse_nifty100.zip")
-    print("✅ Loaded Nifty 100 DRL agent (100 stocks, 200k timesteps)")
-except:
-    try:
-        DRL_AGENT = SAC.load("models/sac_nse_nifty50.zip")
-        print("✅ Loaded Nifty 50 DRL agent (50 stocks, 150k timesteps)")
-    except:
-        try:
-            DRL_AGENT = SAC.load("models/sac_nse_retrained.zip")
-            print("✅ Loaded retrained DRL agent")
-        except:
-            try:
-                DRL_AGENT = SAC.load("models/sac_nse_10y_final.zip")
-                print("✅ Loaded original DRL agent")
-            except:
-                print("⚠️  DRL agent not found, will use reduced AI scoring")
-                DRL_AGENT = None
+def load_models():
+    """Load Kronos + DRL agent on first call (torch is imported here, not at startup)"""
+    global KRONOS_PREDICTOR, DRL_AGENT, _models_loaded
+    
+    if _models_loaded:
+        return
+    
+    print("🚀 Loading AI/ML Models...")
+    load_start = time.perf_counter()
+    
+    # Load Kronos predictor - prefer a running Kronos server (warm model, shared micro-batches)
+    from models.kronos_server import connect_kronos_server
+    KRONOS_PREDICTOR = connect_kronos_server()
+    if KRONOS_PREDICTOR is None:
+        from models.kronos_predictor import get_kronos_predictor
+        KRONOS_PREDICTOR = get_kronos_predictor(model_name="NeoQuasar/Kronos-small")
+    
+    # Load DRL agent (try Nifty 100 model first, then fallbacks)
+    DRL_AGENT = get_drl_agent()
+    
+    _models_loaded = True
+    print(f"⏱️  Models loaded in {time.perf_counter() - load_start:.1f}s")
 
 def get_stock_data(ticker, period="6mo"):
     """Fetch stock data"""
@@ -134,7 +144,7 @@ def calculate_base_indicators(df):
     
     return df.dropna()
 
-def generate_ultimate_signal(ticker, verbose=False):
+def generate_ultimate_signal(ticker, verbose=False, df=None, drl_action=None):
     """
     Generate ultimate signal combining all analysis methods
     
@@ -149,14 +159,17 @@ OPTIMIZED Signal Weighting (Updated for Nifty 100 DRL):
     Args:
         ticker: Stock ticker symbol
         verbose: If True, print detailed analysis for each method
+        df: Daily data with base indicators (fetched if None)
+        drl_action: Precomputed DRL action from a batched pass (computed here if None)
     """
     
     # Get daily data
-    df = get_stock_data(ticker)
-    if df is None or len(df) < 50:
-        return None
-    
-    df = calculate_base_indicators(df)
+    if df is None:
+        df = get_stock_data(ticker)
+        if df is None or len(df) < 50:
+            return None
+        
+        df = calculate_base_indicators(df)
     
     if verbose:
         print(f"\n{'='*80}")
@@ -283,9 +296,16 @@ OPTIMIZED Signal Weighting (Updated for Nifty 100 DRL):
         print(f"\n5️⃣  KRONOS AI - PRICE PREDICTION ({WEIGHT_KRONOS:.0%} weight - HIGHEST)")
         print(f"   {'─'*76}")
     
+    load_models()
+    
     try:
-        # Kronos price prediction
-        kronos_prediction = KRONOS_PREDICTOR.predict(df, horizon=7)
+        # Kronos price prediction (distribution over sampled paths when enabled)
+        if KRONOS_MC_SAMPLES > 1:
+            kronos_prediction = KRONOS_PREDICTOR.predict_distribution(
+                df, horizon=7, n_samples=KRONOS_MC_SAMPLES, ticker=ticker
+            )
+        else:
+            kronos_prediction = KRONOS_PREDICTOR.predict(df, horizon=7, ticker=ticker)
         pred_change = kronos_prediction['predicted_change']
         kronos_confidence = kronos_prediction['confidence']
         
@@ -300,6 +320,10 @@ OPTIMIZED Signal Weighting (Updated for Nifty 100 DRL):
             print(f"   🤖 Kronos Transformer (24.7M params):")
             print(f"      Predicted Change: {pred_change:+.2%} (7-day horizon)")
             print(f"      Confidence: {kronos_confidence:.2f}")
+            if 'prob_positive' in kronos_prediction:
+                q = kronos_prediction['change_quantiles']
+                print(f"      P(up): {kronos_prediction['prob_positive']:.0%} | "
+                      f"5-95%: {q[0.05]:+.2%} to {q[0.95]:+.2%} ({kronos_prediction['n_samples']} paths)")
             print(f"      Kronos Score: {kronos_score:.2f}")
             print(f"      💡 This is your REAL EDGE - sees patterns others miss!")
     except Exception as e:
@@ -313,23 +337,17 @@ OPTIMIZED Signal Weighting (Updated for Nifty 100 DRL):
     
     try:
         # DRL action
-        if DRL_AGENT is not None:
-            price_norm = np.clip(current_price / 10000.0, 0, 10)
-            rsi_norm = np.clip(rsi / 100.0, 0, 1)
-            macd_norm = np.clip(macd / 100.0, -1, 1)
-            capital_ratio = 1.0
-            shares_held = 0.0
-            
-            obs = np.array([price_norm, rsi_norm, macd_norm, capital_ratio, shares_held], dtype=np.float32)
-            obs = np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=0.0)
-            
-            drl_action, _ = DRL_AGENT.predict(obs, deterministic=True)
-            drl_score = 0.5 + (drl_action[0] * 0.5)  # Scale to 0-1
+        if drl_action is None and DRL_AGENT is not None:
+            obs = build_observations(current_price, rsi, macd)
+            drl_action = float(predict_actions(DRL_AGENT, obs))
+        
+        if drl_action is not None:
+            drl_score = 0.5 + (drl_action * 0.5)  # Scale to 0-1
             drl_score = np.clip(drl_score, 0, 1)
             
             if verbose:
                 print(f"   🎯 DRL Agent (SAC Algorithm):")
-                print(f"      Action: {drl_action[0]:+.2f} ({'BUY' if drl_action[0] > 0.2 else 'HOLD' if drl_action[0] > -0.2 else 'SELL'})")
+                print(f"      Action: {drl_action:+.2f} ({'BUY' if drl_action > 0.2 else 'HOLD' if drl_action > -0.2 else 'SELL'})")
                 print(f"      DRL Score: {drl_score:.2f}")
                 print(f"      💡 Final risk manager - validates Kronos prediction")
             
@@ -448,12 +466,13 @@ def calculate_position_size(price, confidence, expected_return):
     
     return shares, position_size
 
-def run_ultimate_bot(verbose=False):
+def run_ultimate_bot(verbose=False, screen_only=False):
     """
     Run ULTIMATE NSE AlphaBot with dynamic stock screening
     
     Args:
         verbose: If True, show detailed analysis for each stock
+        screen_only: If True, stop after PKScreener (no models are loaded)
     """
     global ELITE_STOCKS
     
@@ -498,6 +517,19 @@ def run_ultimate_bot(verbose=False):
         print("="*100)
         return
     
+    if screen_only:
+        print()
+        print("="*100)
+        print(f"📋 SCREENED {len(ELITE_STOCKS)} STOCKS (screen-only mode, models not loaded)")
+        print("="*100)
+        for ticker in ELITE_STOCKS:
+            print(f"  {ticker}")
+        print(f"\n⏱️  Screening finished in {time.perf_counter() - _START_TIME:.1f}s")
+        return
+    
+    # Models are only needed from here on
+    load_models()
+    
     print()
     print("="*100)
     print(f"📊 STEP 2: DEEP ANALYSIS OF TOP {len(ELITE_STOCKS)} STOCKS")
@@ -506,14 +538,33 @@ def run_ultimate_bot(verbose=False):
     print("="*100)
     print()
     
+    # Fetch every screened stock up front so the DRL agent scores them in one forward pass
+    stock_frames = {}
+    for ticker in ELITE_STOCKS:
+        df = get_stock_data(ticker)
+        if df is not None and len(df) >= 50:
+            stock_frames[ticker] = calculate_base_indicators(df)
+    
+    drl_actions = predict_latest_actions(DRL_AGENT, stock_frames)
+    
     signals = []
+    first_signal_reported = False
     
     for i, ticker in enumerate(ELITE_STOCKS, 1):
         if not verbose:
             print(f"🔍 [{i:3}/{len(ELITE_STOCKS)}] {ticker:20}", end=" ")
         
+        if ticker not in stock_frames:
+            print("❌ No data")
+            continue
+        
         try:
-            result = generate_ultimate_signal(ticker, verbose=verbose)
+            result = generate_ultimate_signal(ticker, verbose=verbose, df=stock_frames[ticker],
+                                              drl_action=drl_actions.get(ticker))
+            
+            if result is not None and not first_signal_reported:
+                first_signal_reported = True
+                time_to_first_signal = time.perf_counter() - _START_TIME
             
             if result is None:
                 print("❌ No data")
@@ -595,17 +646,27 @@ def run_ultimate_bot(verbose=False):
         print("  • RSI < 75")
         print("="*100)
     
+    if first_signal_reported:
+        print(f"\n⏱️  Time to first signal: {time_to_first_signal:.1f}s")
+    
     print(f"\n✅ Ultimate scan complete at {datetime.now().strftime('%H:%M:%S')}")
     print("="*100)
 
 # === RUN ===
 if __name__ == "__main__":
-    import sys
-    
-    # Check for verbose flag
-    verbose = "--verbose" in sys.argv or "-v" in sys.argv
-    
-    if verbose:
+    parser = argparse.ArgumentParser(description="ULTIMATE NSE AlphaBot - daily swing signals")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="Show detailed analysis for each stock")
+    parser.add_argument("--screen-only", action="store_true",
+                        help="Run PKScreener only, without loading any models")
+    parser.add_argument("--offline", action="store_true",
+                        help="Load Kronos weights from the local cache only (never touch the hub)")
+    args = parser.parse_args()
+    
+    if args.offline:
+        os.environ['KRONOS_OFFLINE'] = '1'
+    
+    if args.verbose:
         print("\n🔍 VERBOSE MODE ENABLED - Showing detailed analysis for each stock\n")
     
-    run_ultimate_bot(verbose=verbose)
+    run_ultimate_bot(verbose=args.verbose, screen_only=args.screen_only)
@@ -8,6 +8,10 @@ from stable_baselines3 import SAC
 from datetime import datetime, timedelta
 import json
 import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from evaluation.metrics import max_drawdown
 
 print("="*100)
 print("🔬 2-YEAR BACKTEST VALIDATION")
@@ -42,6 +46,12 @@ STOCKS = [
     'MARUTI.NS', 'AXISBANK.NS', 'LT.NS', 'SUNPHARMA.NS', 'TITAN.NS'
 ]
 
+SEQUENCE_LENGTH = 60
+WARMUP_BARS = 200
+# Batched mode predicts every date of a ticker up front; 0 = one forward pass per date
+BATCHED_INFERENCE = os.getenv('BACKTEST_BATCHED_INFERENCE', '1') == '1'
+PREDICT_BATCH_SIZE = int(os.getenv('BACKTEST_PREDICT_BATCH_SIZE', '512'))
+
 # Calculate indicators
 def calculate_indicators(df):
     # RSI
@@ -70,7 +80,7 @@ def calculate_indicators(df):
 # Predict price
 def predict_price(df):
     """Predict price 7 days ahead using TrendMaster"""
-    sequence_length = 60
+    sequence_length = SEQUENCE_LENGTH
     if len(df) < sequence_length:
         return float(df['Close'].iloc[-1]) * 1.05
     
@@ -82,6 +92,31 @@ def predict_price(df):
         pred_7d = pred[0, 6].item()  # 7-day prediction
     return pred_7d
 
+def predict_prices(closes, start, batch_size=PREDICT_BATCH_SIZE):
+    """
+    predict_price for every date from start on, in a few batched forward passes
+    
+    All 60-bar windows are one strided view over the close series (no copies);
+    window k ends at bar k + 59.
+    
+    Returns:
+        Array of 7-day predictions, entry j is for bar start + j
+    """
+    closes = np.ascontiguousarray(closes, dtype=np.float32)
+    preds = closes[start:] * 1.05      # fallback for bars with less than a full window
+    
+    first = max(start, SEQUENCE_LENGTH - 1)
+    if first >= len(closes):
+        return preds.astype(np.float64)
+    
+    windows = torch.from_numpy(closes).unfold(0, SEQUENCE_LENGTH, 1)[first - SEQUENCE_LENGTH + 1:]
+    with torch.no_grad():
+        for lo in range(0, len(windows), batch_size):
+            batch = windows[lo:lo + batch_size].unsqueeze(-1)
+            out = first - start + lo
+            preds[out:out + len(batch)] = TRENDMASTER_MODEL(batch)[:, 6].numpy()
+    return preds.astype(np.float64)
+
 # Calculate confidence
 def calculate_confidence(df):
     score = 0
@@ -125,8 +160,28 @@ def calculate_confidence(df):
     confidence = max(0, min(1, score / max_score))
     return confidence
 
+def confidence_series(df):
+    """calculate_confidence for every row at once"""
+    rsi = df['rsi'].values
+    ema_9, ema_21, ema_50 = df['ema_9'].values, df['ema_21'].values, df['ema_50'].values
+    roc = df['roc'].values
+    
+    score = np.select([(rsi > 25) & (rsi < 35), (rsi > 35) & (rsi < 45), rsi > 70], [20, 15, -15], 0)
+    score = score + np.where(df['macd'].values > df['macd_signal'].values, 20, 0)
+    score = score + np.select([(ema_9 > ema_21) & (ema_21 > ema_50), ema_9 > ema_21], [30, 15], 0)
+    score = score + np.select([roc > 5, roc < -5], [10, -10], 0)
+    
+    return np.clip(score / 80, 0, 1)
+
 # Backtest function
-def backtest_stock(ticker, start_date, end_date):
+def backtest_stock(ticker, start_date, end_date, batched=BATCHED_INFERENCE):
+    """
+    Single-stock swing backtest
+    
+    Args:
+        batched: Precompute every prediction/confidence before the loop
+                 (False: one forward pass and indicator read per date)
+    """
     print(f"\n📊 Backtesting {ticker}...")
     
     try:
@@ -137,20 +192,28 @@ def backtest_stock(ticker, start_date, end_date):
         
         df = calculate_indicators(df)
         
+        if batched:
+            preds = predict_prices(df['Close'].values.ravel(), WARMUP_BARS)
+            confs = confidence_series(df)
+        
         capital = 100000
         shares = 0
         trades = []
         entry_price = 0
         entry_date = None
         
-        for i in range(200, len(df)):
-            current_df = df.iloc[:i+1]
+        for i in range(WARMUP_BARS, len(df)):
             current_price = float(df['Close'].iloc[i])
             current_date = df.index[i]
             
             # Generate signal
-            pred = predict_price(current_df)
-            conf = calculate_confidence(current_df)
+            if batched:
+                pred = preds[i - WARMUP_BARS]
+                conf = confs[i]
+            else:
+                current_df = df.iloc[:i+1]
+                pred = predict_price(current_df)
+                conf = calculate_confidence(current_df)
             expected_return = ((pred / current_price) - 1) * 100
             
             # BUY signal
@@ -236,14 +299,7 @@ def backtest_stock(ticker, start_date, end_date):
                     temp_shares = 0
                 equity_curve.append(temp_capital + (temp_shares * trade['price']))
             
-            peak = equity_curve[0]
-            max_dd = 0
-            for value in equity_curve:
-                if value > peak:
-                    peak = value
-                dd = ((value - peak) / peak) * 100
-                if dd < max_dd:
-                    max_dd = dd
+            max_dd = -float(max_drawdown(equity_curve)[0]) * 100
             
             print(f"  ✅ Completed")
             print(f"     Trades: {len(sell_trades)} | Win Rate: {win_rate:.1f}%")
@@ -0,0 +1,271 @@
+"""
+Backtest Parameter Sweep
+Loads the universe once, copies the precomputed panel arrays into shared
+memory, and fans a grid of strategy parameters (confidence / expected-return
+thresholds, ATR stop multiplier, R-multiple targets, time stop) out across a
+process pool. Workers attach to the shared arrays without copying them and
+only recompute the parameter-dependent entries and exits. Results land in one
+table with the return-vs-drawdown Pareto front flagged
+
+Usage:
+    python3 src/evaluation/backtest_sweep.py --universe stored --start 2015-01-01 --workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import itertools
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.fast_backtest import resolve_params
+from evaluation.panel_backtest import PanelData, PanelSignals, run_panel_backtest, summarize_result
+from evaluation.trade_ledger import TradeLedger
+
+BACKTEST_SWEEP_DIR = os.getenv('BACKTEST_SWEEP_DIR', 'results/backtest_sweeps')
+
+DEFAULT_GRID = {
+    'min_confidence': [0.60, 0.65, 0.70, 0.75],
+    'min_expected_return': [1.5, 2.0, 2.5],
+    'atr_stop_mult': [1.5, 2.0, 2.5],
+    'target_r': [(2.0, 3.0, 4.0), (1.5, 2.5, 3.5)],
+    'time_stop_days': [5, 10, 15],
+}
+
+
+def build_grid(grid: Dict[str, List]) -> List[Dict]:
+    """Cartesian product of the grid, each config tagged with a stable id"""
+    keys = list(grid)
+    configs = []
+    for i, values in enumerate(itertools.product(*(grid[k] for k in keys))):
+        config = dict(zip(keys, values))
+        config['config_id'] = i
+        configs.append(config)
+    return configs
+
+
+def pareto_front(returns: np.ndarray, drawdowns: np.ndarray) -> np.ndarray:
+    """
+    Mask of non-dominated points (higher return, lower drawdown)
+
+    Args:
+        returns: Total return per config
+        drawdowns: Max drawdown per config as a positive fraction
+
+    Returns:
+        Boolean mask, True on the Pareto front
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    drawdowns = np.asarray(drawdowns, dtype=np.float64)
+    order = np.lexsort((drawdowns, -returns))
+
+    on_front = np.zeros(len(returns), dtype=bool)
+    best_higher = np.inf    # lowest drawdown among strictly higher returns
+    group_return, group_best = np.nan, np.inf
+    for i in order:
+        if returns[i] != group_return:
+            # Sorted by return (desc), then drawdown: the first point of a return level has its lowest drawdown
+            best_higher = min(best_higher, group_best)
+            group_return, group_best = returns[i], drawdowns[i]
+        # Identical (return, drawdown) points do not dominate each other, so ties all stay on the front
+        on_front[i] = drawdowns[i] == group_best and drawdowns[i] < best_higher
+    return on_front
+
+
+# === Shared memory ===
+
+class SharedPanel:
+    """
+    PanelData arrays copied into named shared-memory blocks
+
+    Only the spec (block names, shapes, dtypes) is sent to workers; attach()
+    maps the same memory as read-only NumPy views.
+    """
+
+    def __init__(self, data: PanelData):
+        self.blocks = []
+        self.spec = {'tickers': data.tickers, 'arrays': {}}
+
+        for name, array in data.arrays().items():
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self.blocks.append(block)
+            self.spec['arrays'][name] = (block.name, array.shape, array.dtype.str)
+
+    @staticmethod
+    def attach(spec: Dict):
+        """(PanelData over the shared blocks, blocks to keep alive)"""
+        blocks, arrays = [], {}
+        for name, (block_name, shape, dtype) in spec['arrays'].items():
+            block = shared_memory.SharedMemory(name=block_name)
+            view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+            view.flags.writeable = False
+            blocks.append(block)
+            arrays[name] = view
+        return PanelData(arrays['dates'], spec['tickers'], arrays), blocks
+
+    def close(self):
+        """Release and unlink every block (call once, from the creating process)"""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+_WORKER = {}
+
+
+def _init_worker(spec: Dict):
+    data, blocks = SharedPanel.attach(spec)
+    _WORKER['data'] = data
+    _WORKER['blocks'] = blocks
+
+
+def run_config(config: Dict, start: str, rank_by: str):
+    """Simulate one configuration on the shared panel (runs inside a pool worker) -> (row, TradeLedger)"""
+    started = time.perf_counter()
+    params = resolve_params({k: v for k, v in config.items() if k != 'config_id'})
+
+    signals = PanelSignals(_WORKER['data'], params)
+    result = run_panel_backtest(signals, start=start, params=params, rank_by=rank_by, verbose=False)
+
+    row = {
+        **config,
+        'target_r': '/'.join(f"{r:g}" for r in params['target_r']),
+        **summarize_result(result, params['initial_capital']),
+        'final_capital': round(result['final_capital'], 2),
+        'seconds': round(time.perf_counter() - started, 2),
+    }
+    return row, TradeLedger.from_frame(result['trades'], run_id=config['config_id'])
+
+
+def run_sweep(data: PanelData, grid: Dict[str, List] = None, start: str = None, rank_by: str = 'score',
+              max_workers: int = None, output_dir: str = None) -> pd.DataFrame:
+    """
+    Run every configuration of the grid across a process pool
+
+    Args:
+        data: Universe panel (built once, shared with every worker)
+        grid: Dict of parameter -> list of values (default: DEFAULT_GRID)
+        start: First simulated date
+        rank_by: Entry ranking (see run_panel_backtest)
+        max_workers: Pool size (default: all cores)
+        output_dir: Where results.csv / trades.parquet / grid.json go (default: BACKTEST_SWEEP_DIR/<timestamp>)
+
+    Returns:
+        Results table, one row per configuration, on_pareto_front flagged,
+        highest return first; every trade of every config is saved to
+        trades.parquet as one TradeLedger (run_id = config_id)
+    """
+    configs = build_grid(grid or DEFAULT_GRID)
+    output_dir = output_dir or os.path.join(BACKTEST_SWEEP_DIR, time.strftime('%Y%m%d_%H%M%S'))
+    max_workers = max_workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, 'grid.json'), 'w') as f:
+        json.dump({'configs': configs, 'start': start, 'rank_by': rank_by, 'tickers': len(data.tickers)},
+                  f, indent=2, default=list)
+
+    shared = SharedPanel(data)
+    size_mb = sum(block.size for block in shared.blocks) / 1e6
+    print(f"📦 Shared panel: {len(data.dates)} dates x {len(data.tickers)} tickers ({size_mb:,.0f} MB)")
+    print(f"🔧 {len(configs)} configurations on {max_workers} workers")
+
+    rows, ledgers = [], []
+    try:
+        ctx = mp.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                                 initializer=_init_worker, initargs=(shared.spec,)) as pool:
+            futures = {pool.submit(run_config, config, start, rank_by): config for config in configs}
+            for done, future in enumerate(as_completed(futures), 1):
+                config = futures[future]
+                try:
+                    row, ledger = future.result()
+                except Exception as e:
+                    print(f"❌ Config {config['config_id']} failed: {str(e)[:60]}")
+                    continue
+
+                rows.append(row)
+                ledgers.append(ledger)
+                print(f"  [{done:4}/{len(configs)}] config {row['config_id']:4}: return {row['total_return']:+.2%} | "
+                      f"drawdown {row['max_drawdown']:.2%} | {row['trades']} trades ({row['seconds']:.1f}s)")
+    finally:
+        shared.close()
+
+    results = pd.DataFrame(rows)
+    if len(results):
+        results['on_pareto_front'] = pareto_front(results['total_return'].values, results['max_drawdown'].values)
+        results = results.sort_values('total_return', ascending=False).reset_index(drop=True)
+    results.to_csv(os.path.join(output_dir, 'results.csv'), index=False)
+    TradeLedger.concat(ledgers).save(os.path.join(output_dir, 'trades.parquet'))
+    return results
+
+
+def _parse_list(text: str, cast) -> List:
+    return [cast(v) for v in text.split(',') if v.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.bar_store import universe
+
+    parser = argparse.ArgumentParser(description="Parallel backtest parameter sweep (shared-memory panel)")
+    parser.add_argument("--universe", default="stored", help="'nse', 'stored' or comma-separated tickers")
+    parser.add_argument("--start", default="2015-01-01", help="First simulated date")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--warmup-days", type=int, default=180, help="Calendar days loaded before --start")
+    parser.add_argument("--rank", choices=('score', 'universe'), default="score")
+    parser.add_argument("--confidence", default=None, help="Comma-separated, e.g. 0.6,0.65,0.7")
+    parser.add_argument("--expected-return", default=None, help="Comma-separated, e.g. 1.5,2,2.5")
+    parser.add_argument("--atr-mult", default=None, help="Comma-separated, e.g. 1.5,2,2.5")
+    parser.add_argument("--targets", default=None, help="Semicolon-separated R ladders, e.g. '2,3,4;1.5,2.5,3.5'")
+    parser.add_argument("--time-stop", default=None, help="Comma-separated days, e.g. 5,10,15")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Sweep directory")
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.confidence:
+        grid['min_confidence'] = _parse_list(args.confidence, float)
+    if args.expected_return:
+        grid['min_expected_return'] = _parse_list(args.expected_return, float)
+    if args.atr_mult:
+        grid['atr_stop_mult'] = _parse_list(args.atr_mult, float)
+    if args.targets:
+        grid['target_r'] = [tuple(_parse_list(ladder, float)) for ladder in args.targets.split(';') if ladder.strip()]
+    if args.time_stop:
+        grid['time_stop_days'] = _parse_list(args.time_stop, int)
+
+    print("="*100)
+    print("🔬 BACKTEST PARAMETER SWEEP")
+    print("="*100)
+
+    started = time.perf_counter()
+    tickers = universe(args.universe)
+    load_from = (pd.Timestamp(args.start) - pd.Timedelta(days=args.warmup_days)).strftime('%Y-%m-%d')
+    data = PanelData.from_store(tickers, start=load_from, end=args.end)
+    print(f"⚡ Signal arrays for {len(data.tickers)} tickers in {time.perf_counter() - started:.1f}s")
+
+    results = run_sweep(data, grid, start=args.start, rank_by=args.rank,
+                        max_workers=args.workers, output_dir=args.output)
+
+    print("\n" + "="*100)
+    print("📊 PARETO FRONT (return vs max drawdown)")
+    print("="*100)
+    if len(results):
+        columns = ['config_id', 'min_confidence', 'min_expected_return', 'atr_stop_mult', 'target_r',
+                   'time_stop_days', 'trades', 'win_rate', 'total_return', 'cagr', 'sharpe', 'max_drawdown']
+        front = results[results['on_pareto_front']].sort_values('max_drawdown')
+        print(front[columns].to_string(index=False))
+    else:
+        print("❌ No configuration finished")
+    print(f"\n⏱️  Sweep finished in {(time.perf_counter() - started) / 60:.1f} minutes")
@@ -0,0 +1,342 @@
+"""
+Kronos Inference Benchmark
+Sweeps batch size, context length, horizon, sample count, thread count and
+precision over synthetic or recorded OHLCV inputs and reports p50/p95 latency,
+series/sec and each configuration's peak RSS increase as JSON. --compare diffs two result files.
+
+Usage:
+    python3 src/evaluation/benchmark_kronos.py --output bench_base.json
+    python3 src/evaluation/benchmark_kronos.py --compare bench_base.json bench_new.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import threading
+import itertools
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings("ignore")
+
+DEFAULT_BATCH_SIZES = [1, 8, 32]
+DEFAULT_CONTEXT_LENGTHS = [60, 128, 256, 512]
+DEFAULT_HORIZONS = [7]
+DEFAULT_SAMPLE_COUNTS = [1]
+DEFAULT_THREADS = [os.cpu_count() or 1]
+PRECISIONS = ('fp32', 'bf16', 'int8')
+
+RSS_SAMPLE_INTERVAL = 0.005   # seconds between background RSS samples
+
+# Fields that identify a configuration (used to match runs in --compare)
+CONFIG_KEYS = ('input', 'batch_size', 'context_length', 'horizon', 'sample_count', 'threads', 'precision')
+
+
+def synthetic_ohlcv(length: int, seed: int = 0) -> pd.DataFrame:
+    """Geometric random-walk daily OHLCV bars"""
+    rng = np.random.default_rng(seed)
+    close = 1000.0 * np.exp(np.cumsum(rng.normal(0, 0.015, length)))
+    open_ = close * (1 + rng.normal(0, 0.005, length))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, length)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, length)))
+    volume = rng.lognormal(14, 0.5, length)
+    index = pd.bdate_range(end='2024-11-26', periods=length)
+    return pd.DataFrame({'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume}, index=index)
+
+
+def load_recorded(paths: List[str]) -> List[pd.DataFrame]:
+    """Recorded OHLCV bars from CSV/Parquet files (DatetimeIndex in the first column)"""
+    frames = []
+    for path in paths:
+        if path.endswith('.parquet'):
+            df = pd.read_parquet(path)
+        else:
+            df = pd.read_csv(path, index_col=0, parse_dates=True)
+        df.columns = [c.capitalize() for c in df.columns]
+        frames.append(df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna())
+    return frames
+
+
+def make_batch(frames: List[pd.DataFrame], batch_size: int, context_length: int, horizon: int, clip: float):
+    """
+    Normalized model inputs for one batch, built the way KronosPredictor does
+
+    Returns:
+        (x, x_stamp, y_stamp) arrays or None if no frame is long enough
+    """
+    from models.kronos_official.kronos import calc_time_stamps
+
+    frames = [f for f in frames if len(f) >= context_length]
+    if not frames:
+        return None
+
+    x, x_stamp, y_stamp = [], [], []
+    for i in range(batch_size):
+        df = frames[i % len(frames)]
+        # Different windows of the same series when the batch exceeds the file count
+        end = len(df) - (i // len(frames)) % max(1, len(df) - context_length + 1)
+        window = df.iloc[end - context_length:end]
+
+        bars = window[['Open', 'High', 'Low', 'Close', 'Volume']].values.astype(np.float32)
+        amount = bars[:, 4:5] * bars[:, :4].mean(axis=1, keepdims=True)
+        bars = np.concatenate([bars, amount], axis=1)
+        bars = np.clip((bars - bars.mean(axis=0)) / (bars.std(axis=0) + 1e-5), -clip, clip)
+
+        future = pd.date_range(start=window.index[-1] + pd.Timedelta(days=1), periods=horizon, freq='D')
+        x.append(bars)
+        x_stamp.append(calc_time_stamps(window.index).values.astype(np.float32))
+        y_stamp.append(calc_time_stamps(future).values.astype(np.float32))
+
+    return np.stack(x), np.stack(x_stamp), np.stack(y_stamp)
+
+
+class RssSampler:
+    """
+    Peak RSS while the block runs, sampled from a background thread
+
+    ru_maxrss is a process-wide high-water mark, so it cannot be attributed to
+    one configuration, and forward passes free their temporaries before
+    returning, so sampling between calls misses the in-call peak.
+    """
+
+    def __init__(self, interval: float = RSS_SAMPLE_INTERVAL):
+        import psutil
+
+        self.process = psutil.Process(os.getpid())
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.start_mb = self.peak_mb = 0.0
+
+    def _sample(self):
+        while not self.stopped.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, self.process.memory_info().rss / (1024 * 1024))
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = self.process.memory_info().rss / (1024 * 1024)
+        self.thread = threading.Thread(target=self._sample, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.peak_mb = max(self.peak_mb, self.process.memory_info().rss / (1024 * 1024))
+        return False
+
+
+def _precision_predictor(official, eager_model, precision: str):
+    """Official predictor object with the model quantized for int8 (fp32/bf16 use it as is)"""
+    import copy
+    import torch
+
+    if precision != 'int8':
+        return official
+
+    # Quantize the eager weights - a compiled backend cannot be re-quantized
+    quantized = copy.copy(official)
+    quantized.model = torch.quantization.quantize_dynamic(eager_model, {torch.nn.Linear}, dtype=torch.qint8)
+    return quantized
+
+
+def run_config(official, frames, batch_size, context_length, horizon, sample_count, precision,
+               warmup: int, repeats: int) -> Optional[Dict]:
+    """Time official.generate for one configuration"""
+    import torch
+
+    batch = make_batch(frames, batch_size, context_length, horizon, official.clip)
+    if batch is None:
+        return None
+    x, x_stamp, y_stamp = batch
+
+    def call():
+        with torch.no_grad():
+            if precision == 'bf16':
+                with torch.autocast('cpu', dtype=torch.bfloat16):
+                    official.generate(x, x_stamp, y_stamp, horizon, 1.0, 0, 0.9, sample_count, False)
+            else:
+                official.generate(x, x_stamp, y_stamp, horizon, 1.0, 0, 0.9, sample_count, False)
+
+    latencies = []
+    with RssSampler() as rss:
+        for _ in range(warmup):
+            call()
+
+        for _ in range(repeats):
+            started = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - started)
+
+    latencies = np.array(latencies) * 1000.0
+    return {
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'mean_ms': float(latencies.mean()),
+        'series_per_s': float(batch_size / (latencies.mean() / 1000.0)),
+        # Peak RSS sampled during the calls, relative to before this configuration
+        'peak_rss_delta_mb': rss.peak_mb - rss.start_mb,
+    }
+
+
+def run_benchmark(args) -> Dict:
+    """Full sweep; returns the JSON-ready report"""
+    import torch
+    from models.kronos_predictor import get_kronos_predictor
+    from models.kronos_compiled import model_fingerprint
+
+    predictor = get_kronos_predictor(model_name=args.model)
+
+    inputs = {'synthetic': [synthetic_ohlcv(max(args.context_lengths) + 64, seed=s) for s in range(8)]}
+    if args.data:
+        inputs['recorded'] = load_recorded(args.data)
+
+    results = []
+    grid = list(itertools.product(inputs, args.precisions, args.threads, args.batch_sizes,
+                                  args.context_lengths, args.horizons, args.sample_counts))
+
+    print(f"🔧 {len(grid)} configurations, {args.warmup} warmup + {args.repeats} timed runs each")
+    print(f"{'Input':<10} {'Prec':<5} {'Thr':>4} {'Batch':>6} {'Ctx':>5} {'H':>3} {'S':>4} "
+          f"{'p50 ms':>10} {'p95 ms':>10} {'series/s':>10} {'ΔPeak MB':>8}")
+    print("-"*90)
+
+    for input_name, precision, threads, batch_size, context_length, horizon, sample_count in grid:
+        torch.set_num_threads(threads)
+        official = _precision_predictor(predictor.predictor_obj, predictor.model, precision)
+
+        stats = run_config(official, inputs[input_name], batch_size, context_length, horizon,
+                           sample_count, precision, args.warmup, args.repeats)
+        if stats is None:
+            continue
+
+        row = {
+            'input': input_name, 'batch_size': batch_size, 'context_length': context_length,
+            'horizon': horizon, 'sample_count': sample_count, 'threads': threads, 'precision': precision,
+        }
+        row.update(stats)
+        results.append(row)
+
+        print(f"{input_name:<10} {precision:<5} {threads:>4} {batch_size:>6} {context_length:>5} {horizon:>3} "
+              f"{sample_count:>4} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f} "
+              f"{stats['series_per_s']:>10.1f} {stats['peak_rss_delta_mb']:>8.0f}")
+
+    return {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'model': args.model,
+            'model_hash': model_fingerprint(predictor.model, predictor.tokenizer),
+            'backend': getattr(predictor, 'backend', 'eager'),
+            'torch_version': torch.__version__,
+            'python_version': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'warmup': args.warmup,
+            'repeats': args.repeats,
+        },
+        'results': results,
+    }
+
+
+def compare_runs(base: Dict, new: Dict, threshold: float = 0.05) -> List[Dict]:
+    """
+    Match configurations across two reports and compute speedups
+
+    Args:
+        base: Baseline report
+        new: New report
+        threshold: Relative p50 slowdown flagged as a regression
+
+    Returns:
+        List of per-config diff dicts (speedup > 1 = new is faster)
+    """
+    def key(row):
+        return tuple(row.get(k) for k in CONFIG_KEYS)
+
+    base_rows = {key(r): r for r in base['results']}
+    diffs = []
+
+    for row in new['results']:
+        old = base_rows.get(key(row))
+        if old is None:
+            continue
+
+        speedup = old['p50_ms'] / row['p50_ms'] if row['p50_ms'] > 0 else float('inf')
+        diff = {k: row[k] for k in CONFIG_KEYS}
+        diff.update({
+            'base_p50_ms': old['p50_ms'],
+            'new_p50_ms': row['p50_ms'],
+            'base_p95_ms': old['p95_ms'],
+            'new_p95_ms': row['p95_ms'],
+            'speedup': speedup,
+            'throughput_change': row['series_per_s'] / old['series_per_s'] - 1.0 if old['series_per_s'] else 0.0,
+            'rss_change_mb': row.get('peak_rss_delta_mb', 0.0) - old.get('peak_rss_delta_mb', 0.0),
+            'regression': row['p50_ms'] > old['p50_ms'] * (1.0 + threshold),
+        })
+        diffs.append(diff)
+
+    return diffs
+
+
+def print_comparison(diffs: List[Dict]):
+    print(f"{'Input':<10} {'Prec':<5} {'Thr':>4} {'Batch':>6} {'Ctx':>5} {'H':>3} {'S':>4} "
+          f"{'base p50':>10} {'new p50':>10} {'speedup':>8}")
+    print("-"*90)
+    for d in diffs:
+        flag = "  ❌ REGRESSION" if d['regression'] else ("  ⚡" if d['speedup'] > 1.05 else "")
+        print(f"{d['input']:<10} {d['precision']:<5} {d['threads']:>4} {d['batch_size']:>6} "
+              f"{d['context_length']:>5} {d['horizon']:>3} {d['sample_count']:>4} "
+              f"{d['base_p50_ms']:>10.1f} {d['new_p50_ms']:>10.1f} {d['speedup']:>7.2f}x{flag}")
+
+    if diffs:
+        geo_mean = float(np.exp(np.mean(np.log([d['speedup'] for d in diffs]))))
+        regressions = sum(d['regression'] for d in diffs)
+        print("-"*90)
+        print(f"Geometric mean speedup: {geo_mean:.2f}x | Regressions: {regressions}/{len(diffs)}")
+
+
+if __name__ == "__main__":
+    sys.path.append('src')
+
+    parser = argparse.ArgumentParser(description="Kronos latency/throughput benchmark")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=DEFAULT_BATCH_SIZES)
+    parser.add_argument("--context-lengths", type=int, nargs="+", default=DEFAULT_CONTEXT_LENGTHS)
+    parser.add_argument("--horizons", type=int, nargs="+", default=DEFAULT_HORIZONS)
+    parser.add_argument("--sample-counts", type=int, nargs="+", default=DEFAULT_SAMPLE_COUNTS)
+    parser.add_argument("--threads", type=int, nargs="+", default=DEFAULT_THREADS)
+    parser.add_argument("--precisions", nargs="+", choices=PRECISIONS, default=['fp32'])
+    parser.add_argument("--data", nargs="+", help="Recorded OHLCV CSV/Parquet files (in addition to synthetic)")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Diff two JSON reports")
+    parser.add_argument("--threshold", type=float, default=0.05, help="p50 slowdown flagged as regression")
+    args = parser.parse_args()
+
+    print("="*90)
+    print("⏱️  KRONOS INFERENCE BENCHMARK")
+    print("="*90)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            base = json.load(f)
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+
+        diffs = compare_runs(base, new, args.threshold)
+        print_comparison(diffs)
+
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump({'base': base['meta'], 'new': new['meta'], 'diffs': diffs}, f, indent=2)
+        sys.exit(1 if any(d['regression'] for d in diffs) else 0)
+
+    report = run_benchmark(args)
+
+    output = args.output or f"kronos_benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to: {output}")
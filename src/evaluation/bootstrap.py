@@ -0,0 +1,177 @@
+"""
+Trade Bootstrap
+Monte Carlo robustness analysis of a closed-trade log: tens of thousands of
+resampled trade sequences are drawn as one index matrix and evaluated with
+array ops (chunked to bound memory), giving distributions of terminal wealth,
+max drawdown and win rate without re-running the backtest
+
+Usage:
+    python3 src/evaluation/bootstrap.py --input backtest_results_20241126_120000.json --resamples 100000
+    python3 src/evaluation/bootstrap.py --input results/backtest_sweeps/<run>/trades.parquet --run-id 12
+"""
+
+import os
+import sys
+import json
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.metrics import max_drawdown
+from evaluation.trade_ledger import TradeLedger
+
+METHODS = ('bootstrap', 'shuffle', 'block')
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def load_trades(path: str, run_id: Optional[int] = None) -> pd.DataFrame:
+    """Closed trades from a run_backtest results JSON, a trade ledger Parquet (one run_id of a sweep) or a trades CSV"""
+    if path.endswith('.json'):
+        with open(path, 'r') as f:
+            results = json.load(f)
+        if 'trades_file' not in results:
+            # Results written before the trade ledger embed the trades
+            return pd.DataFrame(results['all_trades'])
+        path = os.path.join(os.path.dirname(path), results['trades_file'])
+    if path.endswith('.parquet'):
+        return TradeLedger.load(path).filter(closed=True, run_id=run_id).to_frame()
+    return pd.read_csv(path)
+
+
+def trade_returns(trades: pd.DataFrame, initial_capital: float) -> np.ndarray:
+    """Each trade's P&L as a fraction of starting capital, in exit order"""
+    if 'exit_date' in trades:
+        trades = trades.sort_values('exit_date', kind='stable')
+    return trades['pnl'].values.astype(np.float64) / initial_capital
+
+
+def resample_indices(rng: np.random.Generator, n_trades: int, n_rows: int, method: str = 'bootstrap',
+                     length: Optional[int] = None, block_size: int = 5) -> np.ndarray:
+    """
+    (n_rows, length) trade indices
+
+    bootstrap: i.i.d. draws with replacement (win rate and sizes vary)
+    shuffle:   permutations of the actual trades (same trades, different order)
+    block:     circular blocks of consecutive trades with replacement (keeps streaks)
+    """
+    length = length or n_trades
+    if method == 'bootstrap':
+        return rng.integers(0, n_trades, size=(n_rows, length))
+    if method == 'shuffle':
+        indices = np.tile(np.arange(n_trades), (n_rows, 1))
+        return rng.permuted(indices, axis=1, out=indices)
+    if method == 'block':
+        n_blocks = -(-length // block_size)
+        starts = rng.integers(0, n_trades, size=(n_rows, n_blocks, 1))
+        return ((starts + np.arange(block_size)) % n_trades).reshape(n_rows, -1)[:, :length]
+    raise ValueError(f"method must be one of {METHODS}")
+
+
+def bootstrap_trades(returns: np.ndarray, n_resamples: int = 100000, method: str = 'bootstrap',
+                     length: Optional[int] = None, block_size: int = 5, compound: bool = False,
+                     seed: int = 0, chunk_size: int = 20000) -> Dict[str, np.ndarray]:
+    """
+    Resampled trade sequences -> per-sequence outcomes
+
+    Args:
+        returns: Per-trade returns as fractions of starting capital (trade_returns)
+        n_resamples: Number of sequences
+        method: 'bootstrap', 'shuffle' or 'block'
+        length: Trades per sequence (default: number of trades)
+        block_size: Block length for 'block'
+        compound: Scale each trade by current wealth (default: fixed rupee sizing, like the backtest)
+        seed: RNG seed
+        chunk_size: Sequences evaluated per matrix (bounds memory at chunk_size x length)
+
+    Returns:
+        Dict with terminal_wealth, max_drawdown and win_rate, each (n_resamples,);
+        wealth is relative to starting capital (1.0 = break-even)
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) == 0:
+        raise ValueError("No trades to resample")
+
+    rng = np.random.default_rng(seed)
+    terminal = np.empty(n_resamples)
+    drawdown = np.empty(n_resamples)
+    win_rate = np.empty(n_resamples)
+
+    for lo in range(0, n_resamples, chunk_size):
+        hi = min(lo + chunk_size, n_resamples)
+        sampled = returns[resample_indices(rng, len(returns), hi - lo, method, length, block_size)]
+
+        if compound:
+            wealth = np.cumprod(1 + sampled, axis=1)
+        else:
+            wealth = 1 + np.cumsum(sampled, axis=1)
+
+        terminal[lo:hi] = wealth[:, -1]
+        # Prepend the starting capital so a losing first trade counts as drawdown
+        drawdown[lo:hi] = max_drawdown(np.hstack([np.ones((hi - lo, 1)), wealth]))
+        win_rate[lo:hi] = (sampled > 0).mean(axis=1)
+
+    return {'terminal_wealth': terminal, 'max_drawdown': drawdown, 'win_rate': win_rate}
+
+
+def summarize_bootstrap(result: Dict[str, np.ndarray], drawdown_limits=(0.1, 0.2, 0.3)) -> Dict:
+    """Quantiles of every distribution plus tail probabilities"""
+    summary = {
+        name: dict(zip(QUANTILES, np.quantile(values, QUANTILES).round(6).tolist()))
+        for name, values in result.items()
+    }
+    summary['prob_loss'] = float((result['terminal_wealth'] < 1).mean())
+    summary['prob_drawdown_over'] = {
+        limit: float((result['max_drawdown'] > limit).mean()) for limit in drawdown_limits
+    }
+    return summary
+
+
+def print_summary(summary: Dict, observed_win_rate: float = None):
+    """Console report in the backtest scripts' style"""
+    print(f"{'':18}{'5%':>10}{'25%':>10}{'50%':>10}{'75%':>10}{'95%':>10}")
+    rows = (('Terminal return', 'terminal_wealth', lambda v: f"{(v - 1) * 100:+.1f}%"),
+            ('Max drawdown', 'max_drawdown', lambda v: f"{v * 100:.1f}%"),
+            ('Win rate', 'win_rate', lambda v: f"{v * 100:.1f}%"))
+    for label, name, fmt in rows:
+        print(f"{label:18}" + ''.join(f"{fmt(summary[name][q]):>10}" for q in QUANTILES))
+
+    print()
+    print(f"P(loss):           {summary['prob_loss']:.1%}")
+    for limit, prob in summary['prob_drawdown_over'].items():
+        print(f"P(drawdown > {limit:.0%}): {prob:.1%}")
+    if observed_win_rate is not None:
+        lo, hi = summary['win_rate'][0.05], summary['win_rate'][0.95]
+        print(f"Observed win rate {observed_win_rate:.1%} | 90% interval {lo:.1%} - {hi:.1%}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monte Carlo bootstrap of a closed-trade log")
+    parser.add_argument("--input", required=True, help="run_backtest results JSON, trade ledger Parquet or trades CSV")
+    parser.add_argument("--run-id", type=int, default=None, help="Sweep config to resample (ledger input)")
+    parser.add_argument("--capital", type=float, default=500000, help="Starting capital of the backtest")
+    parser.add_argument("--resamples", type=int, default=100000)
+    parser.add_argument("--method", choices=METHODS, default="bootstrap")
+    parser.add_argument("--block-size", type=int, default=5)
+    parser.add_argument("--compound", action="store_true", help="Scale trades by current wealth")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    trades = load_trades(args.input, run_id=args.run_id)
+    returns = trade_returns(trades, args.capital)
+
+    print("="*100)
+    print(f"🎲 TRADE BOOTSTRAP: {len(returns)} trades x {args.resamples:,} resamples ({args.method})")
+    print("="*100)
+
+    started = time.perf_counter()
+    result = bootstrap_trades(returns, args.resamples, method=args.method, block_size=args.block_size,
+                              compound=args.compound, seed=args.seed)
+    print(f"⚡ Resampled in {time.perf_counter() - started:.2f}s\n")
+
+    print_summary(summarize_bootstrap(result), observed_win_rate=float((returns > 0).mean()))
@@ -0,0 +1,354 @@
+"""
+Component Score Store
+Point-in-time MTF, SMC, technical, sentiment, Kronos and DRL component scores
+of generate_ultimate_signal for every (ticker, date), kept in a columnar store
+(one Parquet part per build, new dates appended incrementally). Historical
+backtests evaluate the bot's final-confidence formula and its agreement rule
+over the whole table with array ops instead of re-running the analyzers
+
+Historical inputs differ from live runs where no point-in-time data exists:
+MTF uses monthly/weekly/daily bars resampled from the daily store (no 4H/1H),
+sentiment uses its technical half with neutral news, and Kronos comes from the
+walk-forward forecast table (neutral where it has no forecast).
+
+Usage:
+    python3 src/evaluation/component_scores.py --universe stored --start 2023-01-01
+"""
+
+import os
+import sys
+import io
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+COMPONENT_SCORES_DIR = os.getenv('COMPONENT_SCORES_DIR', 'data/component_scores')
+
+# Windows the live bot downloads (get_stock_data / MultiTimeframeAnalyzer)
+DAILY_LOOKBACK_MONTHS = 6
+MTF_WINDOWS = (('monthly', 60, 'MS'), ('weekly', 24, 'W-MON'), ('daily', 12, None))
+
+SCORE_COLUMNS = ['price', 'rsi', 'macd', 'momentum_5d', 'mtf_score', 'mtf_signal', 'mtf_alignment',
+                 'smc_score', 'smc_signal', 'tech_score', 'tech_signal', 'sentiment_score',
+                 'ai_signal', 'kronos_score', 'pred_change', 'drl_score']
+
+BULLISH = {'BUY', 'STRONG_BUY'}
+
+
+def _bars_between(bars: pd.DataFrame, date: pd.Timestamp, months: int) -> pd.DataFrame:
+    return bars[(bars.index > date - pd.DateOffset(months=months)) & (bars.index <= date)]
+
+
+def _resample(bars: pd.DataFrame, rule: str) -> pd.DataFrame:
+    # Bars labelled by period start, like yfinance's 1wk / 1mo intervals
+    kwargs = {'label': 'left', 'closed': 'left'} if rule.startswith('W') else {}
+    return bars.resample(rule, **kwargs).agg({
+        'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'
+    }).dropna()
+
+
+def mtf_components(ticker: str, bars: pd.DataFrame, date: pd.Timestamp):
+    """
+    MultiTimeframeAnalyzer on the bars known at date
+
+    Returns:
+        (mtf_signal, mtf_score, mtf_alignment) with the bot's defaults on failure
+    """
+    from utils.multi_timeframe_analyzer import MultiTimeframeAnalyzer
+
+    analyzer = MultiTimeframeAnalyzer(ticker)
+    for name, months, rule in MTF_WINDOWS:
+        window = _bars_between(bars, date, months)
+        analyzer.data[name] = _resample(window, rule) if rule else window.copy()
+
+    try:
+        result = analyzer.generate_signal()
+    except Exception:
+        return 'HOLD', 0.5, 0.5
+    return result['signal'], result['confidence'], result.get('alignment_score', 0.5)
+
+
+def ticker_components(ticker: str, bars: pd.DataFrame, dates: List[pd.Timestamp]) -> pd.DataFrame:
+    """
+    Analyzer components of one ticker on each date (Kronos and DRL are added in bulk)
+
+    Each date sees exactly what generate_ultimate_signal would: the last
+    DAILY_LOOKBACK_MONTHS of bars with calculate_base_indicators applied.
+    """
+    from bot.nse_alphabot_ultimate import calculate_base_indicators
+    from utils.smc_analyzer import SMCAnalyzer
+    from utils.advanced_technical import AdvancedTechnicalAnalyzer
+    from utils.sentiment_analyzer import get_technical_sentiment
+
+    rows = []
+    for date in dates:
+        df = calculate_base_indicators(_bars_between(bars, date, DAILY_LOOKBACK_MONTHS).copy())
+        if len(df) < 50:
+            continue
+
+        row = {'date': date, 'ticker': ticker, 'ai_signal': 'HOLD'}
+        row['price'] = float(df['Close'].iloc[-1])
+        row['rsi'] = float(df['rsi'].iloc[-1])
+        row['macd'] = float(df['macd'].iloc[-1])
+        price_5d_ago = df['Close'].iloc[-6] if len(df) >= 6 else row['price']
+        row['momentum_5d'] = float((row['price'] - price_5d_ago) / price_5d_ago * 100)
+
+        # The analyzers print progress; keep the build log readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            row['mtf_signal'], row['mtf_score'], row['mtf_alignment'] = mtf_components(ticker, bars, date)
+
+            row['smc_signal'], row['smc_score'] = 'NEUTRAL', 0.5
+            try:
+                smc = SMCAnalyzer(df).analyze_smc()
+                row['smc_signal'], row['smc_score'] = smc['signal'], smc['score']
+            except Exception:
+                pass
+
+            row['tech_signal'], row['tech_score'] = 'NEUTRAL', 0.5
+            try:
+                tech = AdvancedTechnicalAnalyzer(df).analyze_advanced_technical()
+                row['tech_signal'], row['tech_score'] = tech['signal'], tech['score']
+            except Exception:
+                pass
+
+            # Hybrid sentiment with neutral news (no point-in-time news history)
+            try:
+                row['sentiment_score'] = round(0.5 * 0.5 + get_technical_sentiment(df) * 0.5, 2)
+            except Exception:
+                row['sentiment_score'] = 0.5
+
+        rows.append(row)
+
+    return pd.DataFrame(rows)
+
+
+def add_kronos_components(frame: pd.DataFrame, table=None, horizon: int = 7) -> pd.DataFrame:
+    """kronos_score / pred_change for every row by one join with the forecast table"""
+    if table is None:
+        from evaluation.kronos_forecast_table import KronosForecastTable
+        table = KronosForecastTable.load()
+
+    frame = frame.copy()
+    if table is None or len(frame) == 0:
+        frame['pred_change'] = 0.0
+        frame['kronos_score'] = 0.5
+        return frame
+
+    keys = pd.MultiIndex.from_arrays([frame['ticker'], pd.DatetimeIndex(frame['date']).normalize()])
+    forecasts = table.df.reindex(keys)
+    pred_change = forecasts[f'pred_change_{horizon}d'].values.astype(np.float64)
+    confidence = forecasts[f'confidence_{horizon}d'].values.astype(np.float64)
+
+    found = ~np.isnan(pred_change)
+    score = np.clip(0.5 + np.where(found, pred_change, 0.0) * 5, 0, 1)
+    frame['kronos_score'] = np.where(found, 0.5 + (score - 0.5) * np.where(found, confidence, 0.0), 0.5)
+    frame['pred_change'] = np.where(found, pred_change, 0.0)
+    return frame
+
+
+def add_drl_components(frame: pd.DataFrame, agent=None) -> pd.DataFrame:
+    """drl_score for every row in one batched actor pass (0.5 without an agent)"""
+    from models.drl_agent import get_drl_agent, build_observations, predict_actions, action_to_score
+
+    frame = frame.copy()
+    agent = agent if agent is not None else get_drl_agent()
+    if agent is None or len(frame) == 0:
+        frame['drl_score'] = 0.5
+        return frame
+
+    obs = build_observations(frame['price'].values, frame['rsi'].values, frame['macd'].values)
+    frame['drl_score'] = action_to_score(predict_actions(agent, obs))
+    return frame
+
+
+# === Store ===
+
+def load_component_scores(store_dir: str = None) -> Optional[pd.DataFrame]:
+    """All parts, later builds winning on duplicate (date, ticker), or None if empty"""
+    store_dir = store_dir or COMPONENT_SCORES_DIR
+    if not os.path.isdir(store_dir):
+        return None
+
+    parts = sorted(name for name in os.listdir(store_dir) if name.endswith('.parquet'))
+    if not parts:
+        return None
+
+    frame = pd.concat([pd.read_parquet(os.path.join(store_dir, name)) for name in parts], ignore_index=True)
+    frame = frame.drop_duplicates(['date', 'ticker'], keep='last')
+    return frame.sort_values(['date', 'ticker']).reset_index(drop=True)
+
+
+def build_component_scores(tickers: List[str], start: str, end: str = None, store_dir: str = None,
+                           max_workers: int = None, bar_store_dir: str = None) -> int:
+    """
+    Append component scores for dates not yet stored
+
+    Per ticker, only dates after its last stored date are computed, so new
+    tickers get their full range and existing ones just the new days.
+
+    Returns:
+        Rows written
+    """
+    from utils.bar_store import load_bars
+
+    store_dir = store_dir or COMPONENT_SCORES_DIR
+    os.makedirs(store_dir, exist_ok=True)
+
+    stored = load_component_scores(store_dir)
+    last_stored = stored.groupby('ticker')['date'].max().to_dict() if stored is not None else {}
+
+    jobs = {}
+    for ticker in tickers:
+        bars = load_bars(ticker, bar_store_dir)
+        if bars is None:
+            continue
+        in_range = bars.index[(bars.index >= pd.Timestamp(start)) &
+                              (bars.index <= pd.Timestamp(end or bars.index[-1]))]
+        if ticker in last_stored:
+            in_range = in_range[in_range > pd.Timestamp(last_stored[ticker])]
+        if len(in_range):
+            jobs[ticker] = (bars, list(in_range))
+
+    if not jobs:
+        print("✅ Component store is up to date")
+        return 0
+
+    print(f"🔧 Computing components for {sum(len(d) for _, d in jobs.values()):,} (ticker, date) pairs "
+          f"across {len(jobs)} tickers...")
+
+    frames = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(ticker_components, ticker, bars, dates): ticker
+                   for ticker, (bars, dates) in jobs.items()}
+        for done, future in enumerate(as_completed(futures), 1):
+            ticker = futures[future]
+            try:
+                frames.append(future.result())
+            except Exception as e:
+                print(f"  ❌ {ticker}: {str(e)[:60]}")
+            if done % 25 == 0 or done == len(futures):
+                print(f"  [{done:4}/{len(futures)}] tickers done")
+
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    if len(frame) == 0:
+        return 0
+
+    frame = add_drl_components(add_kronos_components(frame))
+    frame = frame[['date', 'ticker'] + SCORE_COLUMNS]
+
+    first, last = frame['date'].min(), frame['date'].max()
+    name = f"part-{first:%Y%m%d}-{last:%Y%m%d}-{time.strftime('%Y%m%d%H%M%S')}.parquet"
+    frame.to_parquet(os.path.join(store_dir, name), index=False)
+    return len(frame)
+
+
+# === Vectorized replay of generate_ultimate_signal's decision ===
+
+def bot_weights() -> Dict[str, float]:
+    """Component weights as configured in the ultimate bot"""
+    from bot import nse_alphabot_ultimate as bot
+
+    return {
+        'kronos_score': bot.WEIGHT_KRONOS,
+        'mtf_score': bot.WEIGHT_MTF,
+        'smc_score': bot.WEIGHT_SMC,
+        'tech_score': bot.WEIGHT_TECHNICAL,
+        'drl_score': bot.WEIGHT_DRL,
+        'sentiment_score': bot.WEIGHT_SENTIMENT,
+    }
+
+
+def evaluate_components(frame: pd.DataFrame, weights: Dict[str, float], min_confidence: float,
+                        min_expected_return: float) -> pd.DataFrame:
+    """
+    generate_ultimate_signal's final confidence, expected return and BUY rule for every row
+
+    Args:
+        frame: Component scores (load_component_scores)
+        weights: Component column -> weight (bot_weights())
+        min_confidence, min_expected_return: BUY thresholds
+
+    Returns:
+        frame plus final_confidence, expected_return, bullish_signals and signal
+    """
+    out = frame.copy()
+
+    # Same terms in the same order as the bot (identical floating-point sums)
+    confidence = np.zeros(len(out))
+    for column in ('kronos_score', 'mtf_score', 'smc_score', 'tech_score', 'drl_score', 'sentiment_score'):
+        confidence = confidence + out[column].values.astype(np.float64) * weights[column]
+    out['final_confidence'] = confidence
+
+    out['expected_return'] = out['momentum_5d'].values * 1.5 + (out['pred_change'].values * 100) * 0.5
+
+    out['bullish_signals'] = ((out['mtf_signal'] == 'BUY').astype(int) +
+                              out['smc_signal'].isin(BULLISH).astype(int) +
+                              out['tech_signal'].isin(BULLISH).astype(int) +
+                              (out['ai_signal'] == 'BUY').astype(int))
+
+    buy = ((out['bullish_signals'] >= 3) &
+           (out['final_confidence'] >= min_confidence) &
+           (out['expected_return'] >= min_expected_return) &
+           (out['rsi'] < 75) &
+           (out['mtf_alignment'] >= 0.6))
+    out['signal'] = np.where(buy, 'BUY', 'HOLD')
+    return out
+
+
+class ComponentScoreTable:
+    """
+    Evaluated component store, indexed by (ticker, date) for backtest lookups
+    """
+
+    def __init__(self, evaluated: pd.DataFrame):
+        evaluated = evaluated.copy()
+        evaluated['date'] = pd.DatetimeIndex(evaluated['date']).normalize()
+        self.df = evaluated.set_index(['ticker', 'date']).sort_index()
+
+    @classmethod
+    def load(cls, weights: Dict[str, float], min_confidence: float, min_expected_return: float,
+             store_dir: str = None) -> Optional['ComponentScoreTable']:
+        """Load and evaluate the store, or None if it has not been built"""
+        frame = load_component_scores(store_dir)
+        if frame is None:
+            return None
+        return cls(evaluate_components(frame, weights, min_confidence, min_expected_return))
+
+    def get(self, ticker: str, date) -> Optional[Dict]:
+        """Evaluated row for (ticker, date), or None"""
+        try:
+            return self.df.loc[(ticker, pd.Timestamp(date).normalize())].to_dict()
+        except KeyError:
+            return None
+
+    def panel(self, column: str) -> pd.DataFrame:
+        """One column as a (dates x tickers) panel"""
+        return self.df[column].unstack('ticker').sort_index()
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.bar_store import universe
+
+    parser = argparse.ArgumentParser(description="Build/append the component score store")
+    parser.add_argument("--universe", default="stored", help="'nse', 'stored' or comma-separated tickers")
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Store directory (default: COMPONENT_SCORES_DIR)")
+    args = parser.parse_args()
+
+    print("="*100)
+    print("🧮 COMPONENT SCORE STORE")
+    print("="*100)
+
+    started = time.perf_counter()
+    written = build_component_scores(universe(args.universe), args.start, args.end,
+                                     store_dir=args.output, max_workers=args.workers)
+    print(f"\n✅ {written:,} rows appended in {(time.perf_counter() - started) / 60:.1f} minutes")
@@ -0,0 +1,133 @@
+"""
+Vectorized Exit Engine
+Finds the first bar after entry that hits the stop, a target or the time stop,
+for one trade or thousands of hypothetical entries at once, by scanning
+fixed-size windows of the High/Low arrays instead of iterating rows per day.
+Intrabar precedence matches check_exit: stop, then the highest target hit
+(T3 > T2 > T1), then the time stop at the close
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+
+REASON_OPEN = 0        # no exit before the data ends
+REASON_STOP = 1
+REASON_TIME = 2
+REASON_TARGET = 3      # target j (0-based) is REASON_TARGET + j
+
+DEFAULT_WINDOW = 16    # bars scanned per pass; covers a 10-calendar-day time stop in one pass
+
+
+def reason_name(code: int) -> str:
+    """Exit reason code -> check_exit label (STOP_LOSS, TARGET_1, ..., TIME_STOP)"""
+    if code == REASON_STOP:
+        return 'STOP_LOSS'
+    if code == REASON_TIME:
+        return 'TIME_STOP'
+    if code >= REASON_TARGET:
+        return f'TARGET_{code - REASON_TARGET + 1}'
+    return 'OPEN'
+
+
+def resolve_exits(dates: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray,
+                  entry_pos, stop, targets, time_stop_days: Optional[int] = 10,
+                  entry_dates=None, window: int = DEFAULT_WINDOW) -> Dict[str, np.ndarray]:
+    """
+    First-hit exit for many entries on one ticker's bars
+
+    Bars strictly after entry_pos are checked. Entries that never exit within
+    the data get exit_pos -1 and reason REASON_OPEN.
+
+    Args:
+        dates, high, low, close: One ticker's bar arrays
+        entry_pos: (M,) bar index of each entry (last bar on or before the entry date)
+        stop: (M,) or scalar stop prices
+        targets: (M, K) or (K,) target ladder per entry
+        time_stop_days: Exit at the close of the first bar >= this many calendar days
+                        after entry (None disables the time stop)
+        entry_dates: (M,) entry dates if they differ from dates[entry_pos]
+        window: Bars gathered per pass
+
+    Returns:
+        Dict with exit_pos (int64), exit_price (float64) and reason (int8 codes)
+    """
+    dates = np.asarray(dates).astype('datetime64[ns]')
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(dates)
+
+    entry_pos = np.atleast_1d(np.asarray(entry_pos, dtype=np.int64))
+    m = len(entry_pos)
+    stop = np.broadcast_to(np.asarray(stop, dtype=np.float64), (m,))
+    targets = np.asarray(targets, dtype=np.float64)
+    if targets.ndim < 2:
+        targets = targets.reshape(1, -1)
+    targets = np.broadcast_to(targets, (m, targets.shape[1]))
+    lowest_target = targets.min(axis=1)
+
+    if time_stop_days is not None:
+        starts = dates[np.clip(entry_pos, 0, n - 1)] if entry_dates is None \
+            else np.asarray(entry_dates).astype('datetime64[ns]')
+        deadline = np.broadcast_to(starts, (m,)) + np.timedelta64(int(time_stop_days), 'D')
+
+    exit_pos = np.full(m, -1, dtype=np.int64)
+    exit_price = np.full(m, np.nan)
+    reason = np.zeros(m, dtype=np.int8)
+
+    pending = np.arange(m)
+    offset = 1
+    steps = np.arange(window)
+
+    while len(pending) and n:
+        idx = entry_pos[pending, None] + offset + steps[None, :]
+        in_range = idx < n
+        idx_c = np.minimum(idx, n - 1)
+
+        hit_stop = low[idx_c] <= stop[pending, None]
+        hit = hit_stop | (high[idx_c] >= lowest_target[pending, None])
+        if time_stop_days is not None:
+            hit |= dates[idx_c] >= deadline[pending, None]
+        hit &= in_range
+
+        found = hit.any(axis=1)
+        if found.any():
+            rows = pending[found]
+            bars = idx[found, hit[found].argmax(axis=1)]
+            exit_pos[rows] = bars
+
+            # Precedence on the exit bar: stop, highest target, time stop
+            is_stop = low[bars] <= stop[rows]
+            target_hits = high[bars, None] >= targets[rows]
+            has_target = target_hits.any(axis=1)
+            k = targets.shape[1]
+            highest = k - 1 - target_hits[:, ::-1].argmax(axis=1)
+
+            reason[rows] = np.where(is_stop, REASON_STOP,
+                                    np.where(has_target, REASON_TARGET + highest, REASON_TIME))
+            exit_price[rows] = np.where(is_stop, stop[rows],
+                                        np.where(has_target, targets[rows, highest], close[bars]))
+
+        # Keep searching only where bars remain past this window
+        more = ~found & (idx[:, -1] < n - 1)
+        pending = pending[more]
+        offset += window
+
+    return {'exit_pos': exit_pos, 'exit_price': exit_price, 'reason': reason}
+
+
+def resolve_exit(dates, high, low, close, entry_pos: int, stop: float, targets,
+                 time_stop_days: Optional[int] = 10, entry_date=None):
+    """
+    Single-trade first hit
+
+    Returns:
+        (exit_pos or -1, exit_price or None, reason label or None)
+    """
+    result = resolve_exits(dates, high, low, close, [entry_pos], stop, targets,
+                           time_stop_days, None if entry_date is None else [entry_date])
+    pos = int(result['exit_pos'][0])
+    if pos < 0:
+        return -1, None, None
+    return pos, float(result['exit_price'][0]), reason_name(int(result['reason'][0]))
@@ -0,0 +1,349 @@
+"""
+Precomputed-Indicator Backtest Engine
+Computes indicators and entry scores once per ticker (all indicators are causal,
+so the value on a date is the same as recomputing on the history up to it) and
+runs the backtest_bot_fixed simulation by indexing arrays by date position
+instead of re-slicing and recomputing the history on every date
+"""
+
+import os
+import sys
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.exit_engine import resolve_exit
+from evaluation.intraday_fills import refine_exit
+
+# Strategy parameters (same values as backtest_bot_fixed.py)
+DEFAULT_PARAMS = {
+    'initial_capital': 500000,
+    'risk_per_trade': 0.02,
+    'max_positions': 5,
+    'min_confidence': 0.65,
+    'min_expected_return': 2.0,
+    'atr_stop_mult': 2.0,             # stop = price - mult * ATR
+    'target_r': (2.0, 3.0, 4.0),      # targets at 2R / 3R / 4R
+    'time_stop_days': 10,
+    'max_position_pct': 0.20,
+}
+
+MIN_HISTORY = 50      # bars up to the date (before dropna)
+MIN_VALID = 20        # bars with all indicators defined
+LONGEST_EMA_SPAN = 50 # ema_50; adjusted ewm, so values depend on how far back the bars start
+
+
+def resolve_params(params: Optional[Dict] = None) -> Dict:
+    """DEFAULT_PARAMS overridden by params"""
+    merged = dict(DEFAULT_PARAMS)
+    merged.update(params or {})
+    return merged
+
+
+class Trade:
+    """Represents a single trade"""
+    def __init__(self, ticker, entry_date, entry_price, shares, stop_loss,
+                 target_1, target_2, target_3):
+        self.ticker = ticker
+        self.entry_date = entry_date
+        self.entry_price = entry_price
+        self.shares = shares
+        self.stop_loss = stop_loss
+        self.target_1 = target_1
+        self.target_2 = target_2
+        self.target_3 = target_3
+
+        self.exit_date = None
+        self.exit_price = None
+        self.exit_reason = None
+        self.pnl = 0
+        self.pnl_pct = 0
+        self.days_held = 0
+        self.status = 'OPEN'
+        self.capital_used = entry_price * shares
+
+    def close(self, exit_date, exit_price, exit_reason):
+        """Close the trade"""
+        self.exit_date = exit_date
+        self.exit_price = exit_price
+        self.exit_reason = exit_reason
+        self.pnl = (exit_price - self.entry_price) * self.shares
+        self.pnl_pct = (exit_price - self.entry_price) / self.entry_price * 100
+        self.days_held = (exit_date - self.entry_date).days
+        self.status = 'CLOSED'
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'ticker': self.ticker,
+            'entry_date': self.entry_date.strftime('%Y-%m-%d'),
+            'entry_price': round(self.entry_price, 2),
+            'shares': self.shares,
+            'capital_used': round(self.capital_used, 2),
+            'stop_loss': round(self.stop_loss, 2),
+            'target_1': round(self.target_1, 2),
+            'exit_date': self.exit_date.strftime('%Y-%m-%d') if self.exit_date else None,
+            'exit_price': round(self.exit_price, 2) if self.exit_price else None,
+            'exit_reason': self.exit_reason,
+            'pnl': round(self.pnl, 2),
+            'pnl_pct': round(self.pnl_pct, 2),
+            'days_held': self.days_held,
+            'status': self.status
+        }
+
+
+def indicator_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Same indicators as backtest_bot_fixed.calculate_indicators, without dropna"""
+    df = df.copy()
+    df['ema_20'] = df['Close'].ewm(span=20).mean()
+    df['ema_50'] = df['Close'].ewm(span=50).mean()
+
+    df['ema_12'] = df['Close'].ewm(span=12).mean()
+    df['ema_26'] = df['Close'].ewm(span=26).mean()
+    df['macd'] = df['ema_12'] - df['ema_26']
+    df['macd_signal'] = df['macd'].ewm(span=9).mean()
+
+    delta = df['Close'].diff()
+    gain = delta.clip(lower=0).rolling(14).mean()
+    loss = (-delta.clip(upper=0)).rolling(14).mean()
+    df['rsi'] = 100 - (100 / (1 + gain / loss))
+
+    high_low = df['High'] - df['Low']
+    high_close = (df['High'] - df['Close'].shift()).abs()
+    low_close = (df['Low'] - df['Close'].shift()).abs()
+    df['tr'] = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
+    df['atr'] = df['tr'].rolling(14).mean()
+    return df
+
+
+class SignalArrays:
+    """
+    Per-bar entry inputs for one ticker, aligned with its raw bars
+
+    Row i holds what analyze_stock would compute from the history up to bar i:
+    values come from the last bar with all indicators defined, momentum is
+    measured 5 defined bars back, and ready marks bars with enough history.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        frame = indicator_frame(df)
+        n = len(frame)
+
+        self.dates = pd.DatetimeIndex(frame.index).values
+        self.high = frame['High'].values.astype(np.float64)
+        self.low = frame['Low'].values.astype(np.float64)
+        self.close = frame['Close'].values.astype(np.float64)
+
+        # dropna() on the prefix keeps the defined rows; map every bar to the last defined one
+        valid = ~frame.isna().any(axis=1).values
+        valid_count = np.cumsum(valid)
+        last_valid = np.maximum.accumulate(np.where(valid, np.arange(n), -1))
+        self.ready = (np.arange(1, n + 1) >= MIN_HISTORY) & (valid_count >= MIN_VALID)
+
+        src = np.where(last_valid >= 0, last_valid, 0)
+        self.price = frame['Close'].values[src].astype(np.float64)
+        self.rsi = frame['rsi'].values[src].astype(np.float64)
+        self.atr = frame['atr'].values[src].astype(np.float64)
+        macd = frame['macd'].values[src]
+        macd_signal = frame['macd_signal'].values[src]
+        ema_20 = frame['ema_20'].values[src]
+        ema_50 = frame['ema_50'].values[src]
+
+        # Close 5 defined bars before the last defined bar (iloc[-6] of the dropna'd prefix)
+        valid_rows = np.flatnonzero(valid)
+        back = np.clip(valid_count - 6, 0, None)
+        price_5d_ago = np.where(
+            valid_count >= 6,
+            frame['Close'].values[valid_rows[back]] if len(valid_rows) else self.price,
+            self.price,
+        ).astype(np.float64)
+        self.momentum = (self.price - price_5d_ago) / price_5d_ago * 100
+
+        # Same additions in the same order as analyze_stock (bit-identical scores)
+        score = np.full(n, 0.5)
+        score = score + np.where((self.price > ema_20) & (ema_20 > ema_50), 0.15, 0.0)
+        score = score + np.where(macd > macd_signal, 0.15, 0.0)
+        score = score + np.where(self.momentum > 0, 0.10, 0.0)
+        score = score + np.where((self.rsi > 40) & (self.rsi < 70), 0.10, 0.0)
+        self.score = score
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def position(self, date) -> int:
+        """Index of the last bar on or before date (-1 if none)"""
+        return int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(date)), side='right')) - 1
+
+    def entry_mask(self, params: Dict) -> np.ndarray:
+        """Bars where the entry rules pass (before sizing)"""
+        return (self.ready &
+                (self.score >= params['min_confidence']) &
+                (self.momentum >= params['min_expected_return']) &
+                (self.rsi > 30) & (self.rsi < 75))
+
+
+def entry_signal(ticker: str, signals: SignalArrays, pos: int, available_capital: float,
+                 params: Dict) -> Optional[Dict]:
+    """
+    analyze_stock on precomputed arrays
+
+    Returns:
+        Signal dict (same keys as analyze_stock) or None
+    """
+    if pos < 0 or not signals.ready[pos]:
+        return None
+
+    price = float(signals.price[pos])
+    rsi = float(signals.rsi[pos])
+    score = float(signals.score[pos])
+    momentum = float(signals.momentum[pos])
+
+    if not (score >= params['min_confidence'] and momentum >= params['min_expected_return'] and 30 < rsi < 75):
+        return None
+
+    stop_loss = price - (params['atr_stop_mult'] * float(signals.atr[pos]))
+    risk_per_share = price - stop_loss
+    if risk_per_share <= 0:
+        return None
+
+    r1, r2, r3 = params['target_r']
+    shares = int(available_capital * params['risk_per_trade'] / risk_per_share)
+    shares = min(shares, int((available_capital * params['max_position_pct']) / price))
+
+    if shares > 0 and (shares * price) <= available_capital:
+        return {
+            'ticker': ticker,
+            'entry_price': price,
+            'shares': shares,
+            'stop_loss': stop_loss,
+            'target_1': price + (risk_per_share * r1),
+            'target_2': price + (risk_per_share * r2),
+            'target_3': price + (risk_per_share * r3),
+            'score': score,
+            'momentum': momentum
+        }
+    return None
+
+
+def plan_exit(trade, signals: SignalArrays, current: np.datetime64, params: Dict, intraday=None):
+    """
+    Resolve a new trade's exit once at entry
+
+    Exit outcomes do not depend on capital or other positions, so the first
+    hit after entry can be found up front and the trade closed on that date.
+    With intraday (an intraday_fills.IntradayBars) the exit day keeps its date
+    but the fill comes from the first touch on its intraday bars.
+
+    Returns:
+        (exit date as datetime64 or None if still open at the end, exit_price, exit_reason)
+    """
+    entry_pos = int(np.searchsorted(signals.dates, current, side='right')) - 1
+    pos, exit_price, exit_reason = resolve_exit(
+        signals.dates, signals.high, signals.low, signals.close, entry_pos, trade.stop_loss,
+        [trade.target_1, trade.target_2, trade.target_3], params['time_stop_days'],
+        entry_date=pd.Timestamp(trade.entry_date).to_datetime64()
+    )
+    if pos < 0:
+        return None, None, None
+    if intraday is not None:
+        exit_price, exit_reason = refine_exit(intraday, trade.ticker, signals.dates[pos], trade.stop_loss,
+                                              [trade.target_1, trade.target_2, trade.target_3],
+                                              exit_price, exit_reason)
+    return signals.dates[pos], exit_price, exit_reason
+
+
+def run_fast_backtest(stock_data: Dict[str, pd.DataFrame], tickers: List[str], start: str,
+                      params: Optional[Dict] = None, trade_factory: Callable = Trade,
+                      signals: Optional[Dict[str, SignalArrays]] = None, verbose: bool = True,
+                      intraday=None):
+    """
+    backtest_bot_fixed simulation on precomputed arrays
+
+    Args:
+        stock_data: Dict of ticker -> daily OHLCV DataFrame
+        tickers: Entry scan order (first come, first served like TEST_STOCKS)
+        start: First simulated date
+        params: Overrides for DEFAULT_PARAMS
+        trade_factory: Trade class (same constructor/close() as Trade)
+        signals: Precomputed SignalArrays per ticker (built here if None)
+        verbose: Print the progress line every 30 dates
+        intraday: intraday_fills.IntradayBars for first-touch exit fills (None = daily fills)
+
+    Returns:
+        (all_trades, final_capital, all_dates)
+    """
+    params = resolve_params(params)
+    if signals is None:
+        signals = {ticker: SignalArrays(df) for ticker, df in stock_data.items()}
+
+    all_dates = sorted(set(date for df in stock_data.values() for date in df.index))
+    start_idx = next(i for i, date in enumerate(all_dates) if date >= pd.Timestamp(start))
+
+    all_trades = []
+    open_trades = []
+    exit_plan = {}
+    capital = params['initial_capital']
+    scan = [ticker for ticker in tickers if ticker in signals]
+
+    for date_idx, current_date in enumerate(all_dates[start_idx:], 1):
+        current = np.datetime64(current_date)
+
+        if verbose and date_idx % 30 == 0:
+            open_capital = sum(t.capital_used for t in open_trades)
+            print(f"{current_date.strftime('%Y-%m-%d')} | Trades: {len(all_trades):3} | Open: {len(open_trades)} | "
+                  f"Capital: ₹{capital:>10,.0f} | Invested: ₹{open_capital:>10,.0f}")
+
+        # Check exits (resolved at entry; every bar date is in all_dates, so the exit lands on its bar)
+        for trade in open_trades[:]:
+            exit_date, exit_price, exit_reason = exit_plan[id(trade)]
+            if exit_date is not None and exit_date <= current:
+                trade.close(current_date, exit_price, exit_reason)
+                capital += trade.capital_used + trade.pnl
+                open_trades.remove(trade)
+                del exit_plan[id(trade)]
+
+        # Look for new entries
+        if len(open_trades) < params['max_positions']:
+            held = {t.ticker for t in open_trades}
+            for ticker in scan:
+                if ticker in held:
+                    continue
+
+                arrays = signals[ticker]
+                signal = entry_signal(ticker, arrays, arrays.position(current_date), capital, params)
+                if not signal:
+                    continue
+
+                trade = trade_factory(
+                    ticker=signal['ticker'],
+                    entry_date=current_date,
+                    entry_price=signal['entry_price'],
+                    shares=signal['shares'],
+                    stop_loss=signal['stop_loss'],
+                    target_1=signal['target_1'],
+                    target_2=signal['target_2'],
+                    target_3=signal['target_3']
+                )
+
+                if trade.capital_used <= capital:
+                    open_trades.append(trade)
+                    all_trades.append(trade)
+                    held.add(ticker)
+                    capital -= trade.capital_used
+                    exit_plan[id(trade)] = plan_exit(trade, arrays, current, params, intraday)
+
+                    if len(open_trades) >= params['max_positions']:
+                        break
+
+    # Close remaining trades at the last close on or before the final date
+    final_date = all_dates[-1]
+    for trade in open_trades:
+        arrays = signals[trade.ticker]
+        final_price = float(arrays.close[arrays.position(final_date)])
+        trade.close(final_date, final_price, 'BACKTEST_END')
+        capital += trade.capital_used + trade.pnl
+
+    return all_trades, capital, all_dates
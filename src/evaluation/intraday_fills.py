@@ -0,0 +1,222 @@
+"""
+Intraday Fill Simulator
+Replaces the daily-bar fill assumption (exact stop/target price, stop first
+when both are inside the day's range) with the first touch on hourly bars.
+No level is touched before the daily exit bar (the daily High/Low bound every
+intraday bar), so only the exit day's intraday bars are read, one vectorized
+first-touch pass per trade. Intraday OHLC arrays are cached per ticker-month
+in memory and as Parquet files
+
+Usage:
+    python3 src/evaluation/intraday_fills.py --universe RELIANCE.NS,TCS.NS --start 2024-06-01
+"""
+
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.exit_engine import REASON_STOP, REASON_TARGET, reason_name
+from utils.bar_store import ticker_filename
+
+INTRADAY_CACHE_DIR = os.getenv('INTRADAY_CACHE_DIR', 'data/intraday')
+INTRADAY_INTERVAL = os.getenv('INTRADAY_INTERVAL', '1h')
+INTRADAY_CACHE_MONTHS = int(os.getenv('INTRADAY_CACHE_MONTHS', '256'))   # ticker-months held in memory
+
+FIELDS = ['Open', 'High', 'Low', 'Close']
+
+
+def fetch_month(ticker: str, month: pd.Period, interval: str = INTRADAY_INTERVAL,
+                max_retries: int = 3, delay: float = 2.0):
+    """
+    Download one calendar month of intraday bars
+
+    Returns:
+        (DataFrame indexed by exchange-local bar start, or None; error message or None)
+    """
+    import yfinance as yf
+
+    for attempt in range(max_retries):
+        try:
+            df = yf.Ticker(ticker).history(start=month.start_time, end=(month + 1).start_time,
+                                           interval=interval, auto_adjust=True, timeout=15)
+            df = df.reindex(columns=FIELDS).astype('float64')
+            if df.index.tz is not None:
+                # Wall-clock exchange time, comparable with the naive daily dates
+                df.index = df.index.tz_localize(None)
+            df.index.name = 'Datetime'
+            return df, None
+        except Exception as e:
+            if attempt < max_retries - 1:
+                time.sleep(delay * (attempt + 1))
+            else:
+                return None, str(e)[:40]
+    return None, "failed"
+
+
+class IntradayBars:
+    """
+    Intraday OHLC arrays per (ticker, month)
+
+    Lookups go memory (LRU of max_months) -> Parquet cache -> download.
+    Finished months are written to the cache even when empty (older than the
+    provider's intraday history), so they are never requested twice; the
+    current month is always re-downloaded.
+    """
+
+    def __init__(self, interval: str = INTRADAY_INTERVAL, cache_dir: str = None,
+                 max_months: int = INTRADAY_CACHE_MONTHS):
+        self.interval = interval
+        self.cache_dir = os.path.join(cache_dir or INTRADAY_CACHE_DIR, interval)
+        self.max_months = max_months
+        self.months = OrderedDict()
+        self.stats = {'memory': 0, 'disk': 0, 'downloaded': 0, 'failed': 0}
+
+    def _path(self, ticker: str, month: pd.Period) -> str:
+        return os.path.join(self.cache_dir, ticker_filename(ticker), f"{month}.parquet")
+
+    def load_month(self, ticker: str, month: pd.Period) -> pd.DataFrame:
+        """One month from the Parquet cache, downloading (and caching) it if missing"""
+        path = self._path(ticker, month)
+        if os.path.exists(path):
+            self.stats['disk'] += 1
+            return pd.read_parquet(path)
+
+        df, error = fetch_month(ticker, month, self.interval)
+        if df is None:
+            self.stats['failed'] += 1
+            return pd.DataFrame(columns=FIELDS, index=pd.DatetimeIndex([], name='Datetime'))
+
+        self.stats['downloaded'] += 1
+        if month < pd.Period(pd.Timestamp.now(), 'M'):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            df.to_parquet(f"{path}.tmp")
+            os.replace(f"{path}.tmp", path)
+        return df
+
+    def month(self, ticker: str, month: pd.Period) -> Dict[str, np.ndarray]:
+        """time/open/high/low arrays of one ticker-month"""
+        key = (ticker, str(month))
+        if key in self.months:
+            self.stats['memory'] += 1
+            self.months.move_to_end(key)
+            return self.months[key]
+
+        df = self.load_month(ticker, month)
+        arrays = {
+            'time': df.index.values.astype('datetime64[ns]'),
+            'open': df['Open'].values.astype(np.float64),
+            'high': df['High'].values.astype(np.float64),
+            'low': df['Low'].values.astype(np.float64),
+        }
+        self.months[key] = arrays
+        if len(self.months) > self.max_months:
+            self.months.popitem(last=False)
+        return arrays
+
+    def day(self, ticker: str, date) -> Dict[str, np.ndarray]:
+        """Bars of one trading day (views into the cached month)"""
+        day = pd.Timestamp(date).normalize()
+        arrays = self.month(ticker, pd.Period(day, 'M'))
+        lo, hi = np.searchsorted(arrays['time'], [day.to_datetime64(), (day + pd.Timedelta(days=1)).to_datetime64()])
+        return {name: values[lo:hi] for name, values in arrays.items()}
+
+
+def first_touch(open_: np.ndarray, high: np.ndarray, low: np.ndarray, stop: float, targets):
+    """
+    First bar that reaches the stop or a target, and its fill
+
+    Within one bar the daily precedence still applies (stop, then the highest
+    target reached). A bar that opens beyond a level fills at the open.
+
+    Args:
+        open_, high, low: Bar arrays in time order
+        stop: Stop price
+        targets: Ascending target ladder (T1 < T2 < T3)
+
+    Returns:
+        (fill price, exit_engine reason code) or None if nothing is touched
+    """
+    targets = np.asarray(targets, dtype=np.float64)
+    hit_stop = low <= stop
+    hit = hit_stop | (high >= targets[0])
+    if not hit.any():
+        return None
+
+    bar = int(hit.argmax())
+    if hit_stop[bar]:
+        return float(min(open_[bar], stop)), REASON_STOP
+
+    j = int(np.searchsorted(targets, high[bar], side='right')) - 1
+    return float(max(open_[bar], targets[j])), REASON_TARGET + j
+
+
+def refine_exit(bars: IntradayBars, ticker: str, exit_date, stop: float, targets,
+                exit_price: Optional[float], exit_reason: Optional[str]):
+    """
+    Intraday fill for an exit resolved on daily bars
+
+    Time stops (no level touched on the exit day), open trades and days
+    without intraday bars keep the daily fill. So do days where the intraday
+    bars touch nothing, which happens when the two sources disagree on the range.
+
+    Returns:
+        (exit_price, exit_reason)
+    """
+    if exit_date is None or exit_reason is None or exit_reason == 'TIME_STOP':
+        return exit_price, exit_reason
+
+    day = bars.day(ticker, exit_date)
+    if not len(day['time']):
+        return exit_price, exit_reason
+
+    touch = first_touch(day['open'], day['high'], day['low'], stop, targets)
+    if touch is None:
+        return exit_price, exit_reason
+    return touch[0], reason_name(touch[1])
+
+
+def prefetch(bars: IntradayBars, tickers: List[str], start: str, end: str = None, max_workers: int = 8) -> Dict:
+    """Fill the Parquet cache for every ticker-month in [start, end]"""
+    months = pd.period_range(pd.Timestamp(start), pd.Timestamp(end or pd.Timestamp.now()), freq='M')
+    jobs = [(ticker, month) for ticker in tickers for month in months
+            if not os.path.exists(bars._path(ticker, month)) or month == months[-1]]
+    print(f"📥 {len(jobs)} ticker-months to download ({len(tickers) * len(months) - len(jobs)} cached)")
+
+    rows = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(bars.load_month, ticker, month) for ticker, month in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            rows += len(future.result())
+            if done % 100 == 0 or done == len(jobs):
+                print(f"  [{done:5}/{len(jobs)}] {rows:,} bars")
+    return {'months': len(jobs), 'bars': rows, **bars.stats}
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.bar_store import universe
+
+    parser = argparse.ArgumentParser(description="Prefetch the intraday bar cache used for exit fills")
+    parser.add_argument("--universe", default="stored", help="'nse', 'stored' or comma-separated tickers")
+    parser.add_argument("--start", required=True, help="First month (providers keep ~2 years of hourly bars)")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--interval", default=INTRADAY_INTERVAL)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    print("="*100)
+    print(f"🕐 INTRADAY CACHE ({args.interval})")
+    print("="*100)
+
+    started = time.perf_counter()
+    summary = prefetch(IntradayBars(args.interval), universe(args.universe), args.start, args.end, args.workers)
+    print(f"✅ {summary['months']} months, {summary['bars']:,} bars, {summary['failed']} failed "
+          f"in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,309 @@
+"""
+Walk-Forward Kronos Forecast Table
+Offline job that runs every rolling-origin context window of a ticker through
+Kronos in large batches and stores the forecasts in a columnar table keyed by
+(ticker, as-of date), so backtests get the Kronos component by a join
+
+Usage:
+    python3 src/evaluation/kronos_forecast_table.py --start 2023-01-01 --end 2024-11-26
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import warnings
+warnings.filterwarnings("ignore")
+
+FORECAST_TABLE_PATH = os.getenv('KRONOS_FORECAST_TABLE', 'data/kronos_forecasts.parquet')
+
+DEFAULT_HORIZONS = (1, 3, 5, 7)
+DEFAULT_CONTEXT_LENGTH = 120
+DEFAULT_BATCH_SIZE = 64
+NEUTRAL_KRONOS_SCORE = 0.5   # bot's Kronos component without a forecast
+
+# Same universe as the backtests
+DEFAULT_TICKERS = [
+    'RELIANCE.NS', 'TCS.NS', 'HDFCBANK.NS', 'INFY.NS', 'ICICIBANK.NS',
+    'HINDUNILVR.NS', 'BHARTIARTL.NS', 'ITC.NS', 'KOTAKBANK.NS', 'LT.NS',
+    'AXISBANK.NS', 'ASIANPAINT.NS', 'MARUTI.NS', 'SUNPHARMA.NS', 'TITAN.NS',
+    'ULTRACEMCO.NS', 'BAJFINANCE.NS', 'NESTLEIND.NS', 'WIPRO.NS', 'ADANIPORTS.NS',
+    'ONGC.NS', 'NTPC.NS', 'POWERGRID.NS', 'M&M.NS', 'TATAMOTORS.NS',
+    'TATASTEEL.NS', 'JSWSTEEL.NS', 'HINDALCO.NS', 'COALINDIA.NS', 'GRASIM.NS'
+]
+
+
+def kronos_score(pred_change: float, confidence: float) -> float:
+    """Bot's Kronos component: 0.5 +/- scaled change, shrunk by confidence"""
+    score = float(np.clip(0.5 + pred_change * 5, 0, 1))
+    return 0.5 + (score - 0.5) * confidence
+
+
+def _path_confidence(closes: np.ndarray) -> float:
+    # Same single-path heuristic as KronosPredictor.predict
+    if len(closes) > 1:
+        pred_returns = np.diff(closes) / closes[:-1]
+        return float(np.clip(1.0 / (1.0 + np.std(pred_returns) * 10), 0.7, 0.95))
+    return 0.85
+
+
+def download_history(ticker: str, start: str, end: str, context_length: int) -> Optional[pd.DataFrame]:
+    """Daily bars from enough calendar days before start to fill the first context window"""
+    import yfinance as yf
+
+    # ~1.6 calendar days per NSE trading day, plus slack for holidays
+    fetch_start = pd.Timestamp(start) - pd.Timedelta(days=int(context_length * 1.6) + 30)
+    try:
+        df = yf.download(ticker, start=fetch_start.strftime('%Y-%m-%d'), end=end,
+                         interval='1d', auto_adjust=True, progress=False)
+    except Exception:
+        return None
+
+    if df is None or df.empty:
+        return None
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
+    return df[['Open', 'High', 'Low', 'Close', 'Volume']].dropna()
+
+
+def build_windows(stock_data: Dict[str, pd.DataFrame], start: str, end: str,
+                  context_length: int) -> List[tuple]:
+    """
+    Every (ticker, as_of, context_df) with a full context window ending on as_of
+
+    All windows have the same length, so they batch together across tickers
+    and dates.
+    """
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    windows = []
+
+    for ticker, df in stock_data.items():
+        dates = df.index
+        for i in range(context_length - 1, len(df)):
+            as_of = dates[i]
+            if start <= as_of <= end:
+                windows.append((ticker, as_of, df.iloc[i - context_length + 1:i + 1]))
+
+    return windows
+
+
+def build_forecast_table(stock_data: Dict[str, pd.DataFrame], start: str, end: str,
+                         horizons: Sequence[int] = DEFAULT_HORIZONS,
+                         context_length: int = DEFAULT_CONTEXT_LENGTH,
+                         batch_size: int = DEFAULT_BATCH_SIZE,
+                         n_samples: int = 1,
+                         predictor=None) -> pd.DataFrame:
+    """
+    Run all rolling-origin windows through Kronos and collect one row per (ticker, as_of)
+
+    One decode to max(horizons) gives every shorter horizon too (generation is
+    autoregressive, step h never looks at later steps).
+
+    Args:
+        stock_data: Dict of ticker -> daily OHLCV DataFrame
+        start: First as-of date
+        end: Last as-of date
+        horizons: Forecast horizons in bars
+        context_length: Bars of history per forecast
+        batch_size: Windows per Kronos batch
+        n_samples: Sampled paths per window (> 1 adds prob_up columns)
+        predictor: KronosPredictor (default: global instance)
+
+    Returns:
+        DataFrame with ticker, as_of, close and per-horizon
+        pred_close_{h}d / pred_change_{h}d / confidence_{h}d columns
+    """
+    if predictor is None:
+        from models.kronos_predictor import get_kronos_predictor
+        predictor = get_kronos_predictor(model_name="NeoQuasar/Kronos-small")
+
+    horizons = sorted(set(int(h) for h in horizons))
+    max_horizon = horizons[-1]
+
+    windows = build_windows(stock_data, start, end, context_length)
+    print(f"🔧 {len(windows)} context windows ({context_length} bars) across {len(stock_data)} tickers")
+
+    rows = []
+    started = time.perf_counter()
+
+    for batch_start in range(0, len(windows), batch_size):
+        batch = windows[batch_start:batch_start + batch_size]
+        dfs = [w[2] for w in batch]
+        tickers = [w[0] for w in batch]
+
+        if n_samples > 1:
+            results = predictor.predict_distribution_batch(dfs, horizon=max_horizon,
+                                                           n_samples=n_samples, tickers=tickers)
+        else:
+            results = predictor.predict_batch(dfs, horizon=max_horizon, tickers=tickers)
+
+        for (ticker, as_of, context), result in zip(batch, results):
+            close = float(context['Close'].iloc[-1])
+            row = {'ticker': ticker, 'as_of': as_of, 'close': close}
+
+            for h in horizons:
+                if n_samples > 1:
+                    sample_change = result['sample_closes'][:, h - 1] / close - 1.0
+                    expected_change = float(sample_change.mean())
+                    prob_up = float((sample_change > 0).mean())
+                    row[f'pred_close_{h}d'] = close * (1.0 + expected_change)
+                    row[f'pred_change_{h}d'] = expected_change
+                    row[f'prob_up_{h}d'] = prob_up
+                    row[f'confidence_{h}d'] = prob_up if expected_change >= 0 else 1.0 - prob_up
+                else:
+                    path = np.asarray(result['predicted_close'][:h], dtype=float)
+                    row[f'pred_close_{h}d'] = float(path[-1])
+                    row[f'pred_change_{h}d'] = float(path[-1] / close - 1.0)
+                    row[f'confidence_{h}d'] = _path_confidence(path)
+
+            rows.append(row)
+
+        done = min(batch_start + batch_size, len(windows))
+        elapsed = time.perf_counter() - started
+        print(f"   [{done:6}/{len(windows)}] {done / max(elapsed, 1e-9):6.1f} windows/s", end="\r")
+
+    print()
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table = table.sort_values(['ticker', 'as_of']).reset_index(drop=True)
+    return table
+
+
+def save_forecast_table(table: pd.DataFrame, path: str = None, metadata: Optional[Dict] = None):
+    """Write the table as Parquet, with run parameters in a JSON sidecar"""
+    path = path or FORECAST_TABLE_PATH
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    table.to_parquet(path, index=False)
+
+    if metadata is not None:
+        with open(os.path.splitext(path)[0] + '.json', 'w') as f:
+            json.dump(metadata, f, indent=2, default=str)
+
+    print(f"✅ Saved {len(table)} forecasts to {path}")
+
+
+class KronosForecastTable:
+    """
+    Read side of the forecast table, used by the backtests
+
+    Lookups are by (ticker, as_of); as-of dates are normalized to midnight so
+    daily bars with or without a timezone join cleanly.
+    """
+
+    def __init__(self, table: pd.DataFrame):
+        table = table.copy()
+        table['as_of'] = pd.to_datetime(table['as_of'])
+        if table['as_of'].dt.tz is not None:
+            table['as_of'] = table['as_of'].dt.tz_localize(None)
+        table['as_of'] = table['as_of'].dt.normalize()
+
+        self.df = table.set_index(['ticker', 'as_of']).sort_index()
+        self.horizons = sorted(int(c[len('pred_change_'):-1]) for c in table.columns if c.startswith('pred_change_'))
+
+    @classmethod
+    def load(cls, path: str = None) -> Optional['KronosForecastTable']:
+        """Load from Parquet, or None if the table has not been built"""
+        path = path or FORECAST_TABLE_PATH
+        if not os.path.exists(path):
+            return None
+        return cls(pd.read_parquet(path))
+
+    @staticmethod
+    def _key_date(as_of) -> pd.Timestamp:
+        as_of = pd.Timestamp(as_of)
+        if as_of.tzinfo is not None:
+            as_of = as_of.tz_localize(None)
+        return as_of.normalize()
+
+    def get(self, ticker: str, as_of, horizon: int = 7) -> Optional[Dict]:
+        """
+        Forecast made at the close of as_of
+
+        Returns:
+            Dict with predicted_change and confidence (same meaning as
+            KronosPredictor.predict), or None if not in the table
+        """
+        try:
+            row = self.df.loc[(ticker, self._key_date(as_of))]
+        except KeyError:
+            return None
+
+        return {
+            'predicted_change': float(row[f'pred_change_{horizon}d']),
+            'confidence': float(row[f'confidence_{horizon}d']),
+            'predicted_close': float(row[f'pred_close_{horizon}d']),
+        }
+
+    def score(self, ticker: str, as_of, horizon: int = 7, default: float = NEUTRAL_KRONOS_SCORE) -> float:
+        """Kronos component score for (ticker, as_of), default (neutral) when missing"""
+        forecast = self.get(ticker, as_of, horizon)
+        if forecast is None:
+            return default
+        return kronos_score(forecast['predicted_change'], forecast['confidence'])
+
+    def panel(self, column: str = 'pred_change_7d') -> pd.DataFrame:
+        """One column as a (dates x tickers) panel"""
+        return self.df[column].unstack('ticker').sort_index()
+
+
+if __name__ == "__main__":
+    sys.path.append('src')
+
+    parser = argparse.ArgumentParser(description="Precompute walk-forward Kronos forecasts for backtests")
+    parser.add_argument("--tickers", nargs="+", default=DEFAULT_TICKERS)
+    parser.add_argument("--start", default="2023-01-01")
+    parser.add_argument("--end", default="2024-11-26")
+    parser.add_argument("--horizons", nargs="+", type=int, default=list(DEFAULT_HORIZONS))
+    parser.add_argument("--context-length", type=int, default=DEFAULT_CONTEXT_LENGTH)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--samples", type=int, default=1, help="Sampled paths per window (>1 adds prob_up)")
+    parser.add_argument("--output", default=FORECAST_TABLE_PATH)
+    args = parser.parse_args()
+
+    print("="*80)
+    print("🔮 WALK-FORWARD KRONOS FORECAST TABLE")
+    print("="*80)
+    print(f"Period: {args.start} to {args.end} | Horizons: {args.horizons} | Context: {args.context_length}")
+    print("="*80)
+
+    print("📥 Downloading historical data...")
+    stock_data = {}
+    for i, ticker in enumerate(args.tickers, 1):
+        df = download_history(ticker, args.start, args.end, args.context_length)
+        if df is not None and len(df) >= args.context_length:
+            stock_data[ticker] = df
+            print(f"[{i:2}/{len(args.tickers)}] {ticker:15} ✅ {len(df)} days")
+        else:
+            print(f"[{i:2}/{len(args.tickers)}] {ticker:15} ❌ Insufficient data")
+
+    started = time.perf_counter()
+    table = build_forecast_table(stock_data, args.start, args.end, args.horizons,
+                                 args.context_length, args.batch_size, args.samples)
+    elapsed = time.perf_counter() - started
+
+    from models.kronos_predictor import get_kronos_predictor
+    from models.kronos_compiled import model_fingerprint
+    predictor = get_kronos_predictor()
+
+    save_forecast_table(table, args.output, metadata={
+        'created': datetime.now().isoformat(),
+        'model': predictor.model_name,
+        'model_hash': model_fingerprint(predictor.model, predictor.tokenizer),
+        'start': args.start,
+        'end': args.end,
+        'horizons': args.horizons,
+        'context_length': args.context_length,
+        'samples': args.samples,
+        'tickers': sorted(stock_data),
+        'seconds': round(elapsed, 1),
+    })
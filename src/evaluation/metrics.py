@@ -0,0 +1,207 @@
+"""
+Portfolio Metrics Engine
+Risk/return metrics from daily marked-to-market portfolio values, computed
+with array ops over a (curves x days) matrix so one call scores a single
+backtest or every run of a sweep: CAGR, daily Sharpe/Sortino, volatility,
+max drawdown and its duration, exposure, turnover, plus per-trade stats
+grouped by run
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def _as_curves(values) -> np.ndarray:
+    """(T,) or (C, T) -> float64 (C, T), NaN gaps forward-filled along time"""
+    curves = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    if np.isnan(curves).any():
+        idx = np.where(np.isnan(curves), 0, np.arange(curves.shape[1]))
+        curves = curves[np.arange(len(curves))[:, None], np.maximum.accumulate(idx, axis=1)]
+    return curves
+
+
+def _years(n_days: int, dates=None, periods_per_year: int = TRADING_DAYS) -> float:
+    if dates is not None and len(dates) > 1:
+        span = pd.Timestamp(dates[-1]) - pd.Timestamp(dates[0])
+        return max(span.days / 365.25, 1e-9)
+    return max((n_days - 1) / periods_per_year, 1e-9)
+
+
+def daily_returns(equity) -> np.ndarray:
+    """(C, T) values -> (C, T-1) simple returns"""
+    curves = _as_curves(equity)
+    return curves[:, 1:] / curves[:, :-1] - 1
+
+
+def drawdowns(equity) -> np.ndarray:
+    """(C, T) drawdown from the running peak, as positive fractions"""
+    curves = _as_curves(equity)
+    return 1 - curves / np.maximum.accumulate(curves, axis=1)
+
+
+def max_drawdown(equity) -> np.ndarray:
+    """(C,) largest peak-to-trough loss, positive fraction"""
+    return drawdowns(equity).max(axis=1)
+
+
+def max_drawdown_duration(equity) -> np.ndarray:
+    """(C,) longest stretch (in bars) spent below a previous peak"""
+    curves = _as_curves(equity)
+    steps = np.arange(curves.shape[1])
+    at_peak = curves >= np.maximum.accumulate(curves, axis=1)
+    last_peak = np.maximum.accumulate(np.where(at_peak, steps, 0), axis=1)
+    return (steps - last_peak).max(axis=1)
+
+
+def equity_metrics(equity, dates=None, invested=None, traded=None, risk_free: float = 0.0,
+                   periods_per_year: int = TRADING_DAYS) -> Dict[str, np.ndarray]:
+    """
+    Metrics for every equity curve
+
+    Args:
+        equity: (T,) or (C, T) daily portfolio values (cash + positions at the close)
+        dates: (T,) dates of the columns (CAGR over calendar time; bar count otherwise)
+        invested: (C, T) gross value of open positions (exposure), optional
+        traded: (C, T) value bought + sold per day (turnover), optional
+        risk_free: Annual risk-free rate for Sharpe/Sortino
+        periods_per_year: Bars per year
+
+    Returns:
+        Dict of metric -> (C,) array
+    """
+    curves = _as_curves(equity)
+    n_days = curves.shape[1]
+    years = _years(n_days, dates, periods_per_year)
+
+    growth = curves[:, -1] / curves[:, 0]
+    returns = daily_returns(curves)
+    excess = returns - risk_free / periods_per_year
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = returns.std(axis=1, ddof=1) if n_days > 2 else np.zeros(len(curves))
+        downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2, axis=1)) if n_days > 1 else np.zeros(len(curves))
+        mean_excess = excess.mean(axis=1) if n_days > 1 else np.zeros(len(curves))
+
+        metrics = {
+            'total_return': growth - 1,
+            'cagr': np.where(growth > 0, np.abs(growth) ** (1 / years) - 1, -1.0),
+            'volatility': volatility * np.sqrt(periods_per_year),
+            'sharpe': np.where(volatility > 0, mean_excess / volatility * np.sqrt(periods_per_year), 0.0),
+            'sortino': np.where(downside > 0, mean_excess / downside * np.sqrt(periods_per_year), 0.0),
+            'max_drawdown': max_drawdown(curves),
+            'max_drawdown_days': max_drawdown_duration(curves),
+        }
+        metrics['calmar'] = np.where(metrics['max_drawdown'] > 0, metrics['cagr'] / metrics['max_drawdown'], 0.0)
+
+        if invested is not None:
+            gross = np.atleast_2d(np.nan_to_num(np.asarray(invested, dtype=np.float64))) / curves
+            metrics['exposure'] = (gross > 0).mean(axis=1)
+            metrics['avg_gross_exposure'] = gross.mean(axis=1)
+
+        if traded is not None:
+            flow = np.atleast_2d(np.nan_to_num(np.asarray(traded, dtype=np.float64)))
+            # One-way turnover: half of (buys + sells) per year, relative to average equity
+            metrics['turnover'] = flow.sum(axis=1) / 2 / curves.mean(axis=1) / years
+
+    return metrics
+
+
+def trade_stats(pnl, pnl_pct, days_held, groups=None, n_groups: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Per-trade statistics, optionally per run
+
+    Args:
+        pnl, pnl_pct, days_held: (N,) one entry per closed trade
+        groups: (N,) integer run id of each trade (e.g. config_id); None = one run
+        n_groups: Number of runs (default: max(groups) + 1)
+
+    Returns:
+        Dict of stat -> (G,) array (trades, win_rate, avg_win_pct, avg_loss_pct,
+        profit_factor, expectancy_pct, avg_days_held)
+    """
+    pnl = np.asarray(pnl, dtype=np.float64)
+    pnl_pct = np.asarray(pnl_pct, dtype=np.float64)
+    days_held = np.asarray(days_held, dtype=np.float64)
+    groups = np.zeros(len(pnl), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    n_groups = n_groups or (int(groups.max()) + 1 if len(groups) else 1)
+
+    def total(weights):
+        return np.bincount(groups, weights=weights, minlength=n_groups)
+
+    win = pnl > 0
+    count = total(None)
+    wins = total(win.astype(np.float64))
+    losses = count - wins
+    gross_win = total(np.where(win, pnl, 0.0))
+    gross_loss = -total(np.where(win, 0.0, pnl))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'trades': count.astype(np.int64),
+            'win_rate': np.where(count > 0, wins / count, 0.0),
+            'avg_win_pct': np.where(wins > 0, total(np.where(win, pnl_pct, 0.0)) / wins, 0.0),
+            'avg_loss_pct': np.where(losses > 0, total(np.where(win, 0.0, pnl_pct)) / losses, 0.0),
+            'profit_factor': np.where(gross_loss > 0, gross_win / gross_loss, np.where(gross_win > 0, np.inf, 0.0)),
+            'expectancy_pct': np.where(count > 0, total(pnl_pct) / count, 0.0),
+            'avg_days_held': np.where(count > 0, total(days_held) / count, 0.0),
+        }
+
+
+def equity_from_trades(trades: pd.DataFrame, closes: pd.DataFrame, initial_capital: float) -> Dict[str, pd.Series]:
+    """
+    Daily marked-to-market portfolio from a trade list
+
+    Cash moves on entry/exit dates; open positions are valued at the last
+    close on or before each date. Shares per (date, ticker) come from one
+    cumulative sum over entry/exit events, not a loop over dates.
+
+    Args:
+        trades: ticker, entry_date, entry_price, shares, exit_date, exit_price
+        closes: (dates x tickers) close prices
+        initial_capital: Starting cash
+
+    Returns:
+        Dict with equity, invested and traded Series over closes.index
+    """
+    dates = pd.DatetimeIndex(closes.index)
+    columns = {ticker: j for j, ticker in enumerate(closes.columns)}
+    n_dates = len(dates)
+
+    shares_delta = np.zeros((n_dates + 1, len(columns)))
+    cash_delta = np.zeros(n_dates + 1)
+    traded = np.zeros(n_dates + 1)
+
+    if len(trades):
+        col = trades['ticker'].map(columns).values.astype(np.int64)
+        entry_idx = dates.searchsorted(pd.DatetimeIndex(trades['entry_date']))
+        exit_dates = pd.DatetimeIndex(trades['exit_date'])
+        exit_idx = np.where(exit_dates.isna(), n_dates, dates.searchsorted(exit_dates))
+        shares = trades['shares'].values.astype(np.float64)
+        cost = shares * trades['entry_price'].values.astype(np.float64)
+        proceeds = np.where(exit_idx < n_dates, shares * trades['exit_price'].fillna(0).values.astype(np.float64), 0)
+
+        np.add.at(shares_delta, (entry_idx, col), shares)
+        np.add.at(shares_delta, (exit_idx, col), -shares)
+        np.add.at(cash_delta, entry_idx, -cost)
+        np.add.at(cash_delta, exit_idx, proceeds)
+        np.add.at(traded, entry_idx, cost)
+        np.add.at(traded, exit_idx, proceeds)
+
+    held = np.cumsum(shares_delta[:-1], axis=0)
+    invested = np.nansum(held * closes.ffill().values, axis=1)
+    cash = initial_capital + np.cumsum(cash_delta[:-1])
+
+    return {
+        'equity': pd.Series(cash + invested, index=dates, name='equity'),
+        'invested': pd.Series(invested, index=dates, name='invested'),
+        'traded': pd.Series(traded[:-1], index=dates, name='traded'),
+    }
+
+
+def metrics_table(equity, dates=None, invested=None, traded=None, index=None, **kwargs) -> pd.DataFrame:
+    """equity_metrics as a DataFrame, one row per curve"""
+    return pd.DataFrame(equity_metrics(equity, dates, invested, traded, **kwargs), index=index)
@@ -0,0 +1,446 @@
+"""
+Panel Portfolio Backtester
+Runs the backtest_bot_fixed strategy over a whole universe held as
+(dates x tickers) arrays from the local bar store. Entry eligibility, stops,
+targets and the first-hit exit of every eligible cell are computed up front;
+each simulated date then only does array ops across tickers (exits due,
+ranked candidates, sizing against the free position slots)
+
+Usage:
+    python3 src/utils/bar_store.py --universe nse --start 2014-01-01
+    python3 src/evaluation/panel_backtest.py --universe stored --start 2015-01-01
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.fast_backtest import SignalArrays, resolve_params
+from evaluation.exit_engine import resolve_exits, reason_name
+from evaluation.metrics import equity_metrics, trade_stats
+
+RANK_MODES = ('score', 'universe')
+
+# Fields of an open position carried from one run to the next (see sharded_backtest.py)
+CARRY_FIELDS = ('ticker', 'entry_date', 'entry_price', 'shares', 'capital_used', 'stop_loss',
+                'target_1', 'target_2', 'target_3', 'score')
+
+
+class PanelData:
+    """
+    Parameter-free inputs for every (date, ticker) cell, plus the raw bars
+
+    Cell (d, j) holds what entry_signal would see for ticker j on panel date d
+    (its last bar on or before d). Bars of all tickers are concatenated into
+    flat arrays (ticker j owns bar_* rows offsets[j]:offsets[j + 1]), so the
+    whole dataset is a fixed set of NumPy arrays that can be shared between
+    processes (see backtest_sweep.py).
+    """
+
+    CELL_ARRAYS = ('price', 'atr', 'score', 'momentum', 'rsi', 'ready', 'bar_pos', 'last_close')
+    BAR_ARRAYS = ('bar_dates', 'bar_high', 'bar_low', 'bar_close', 'offsets')
+
+    def __init__(self, dates: np.ndarray, tickers: List[str], arrays: Dict[str, np.ndarray]):
+        self.dates = dates
+        self.tickers = list(tickers)
+        for name in self.CELL_ARRAYS + self.BAR_ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """All arrays by name (dates included)"""
+        arrays = {name: getattr(self, name) for name in self.CELL_ARRAYS + self.BAR_ARRAYS}
+        arrays['dates'] = self.dates
+        return arrays
+
+    @classmethod
+    def from_bars(cls, bars: Dict[str, pd.DataFrame], verbose: bool = True) -> 'PanelData':
+        """Build from bar_store.panel() frames"""
+        close = bars['Close']
+        dates = pd.DatetimeIndex(close.index).values
+        tickers = list(close.columns)
+        shape = close.shape
+
+        arrays = {name: np.full(shape, np.nan) for name in ('price', 'atr', 'score', 'momentum', 'rsi')}
+        arrays['ready'] = np.zeros(shape, dtype=bool)
+        arrays['bar_pos'] = np.full(shape, -1, dtype=np.int64)
+        arrays['last_close'] = close.ffill().values.astype(np.float64)
+
+        fields = [field for field in ('Open', 'High', 'Low', 'Close', 'Volume') if field in bars]
+        chunks = {'bar_dates': [], 'bar_high': [], 'bar_low': [], 'bar_close': []}
+        offsets = [0]
+        started = time.perf_counter()
+
+        for j, ticker in enumerate(tickers):
+            df = pd.DataFrame({field: bars[field][ticker] for field in fields}).dropna(subset=['Close'])
+            if len(df):
+                signals = SignalArrays(df)
+                pos = np.searchsorted(signals.dates, dates, side='right') - 1
+                has_bar = pos >= 0
+                src = np.where(has_bar, pos, 0)
+
+                for name in ('price', 'atr', 'score', 'momentum', 'rsi'):
+                    arrays[name][:, j] = np.where(has_bar, getattr(signals, name)[src], np.nan)
+                arrays['ready'][:, j] = has_bar & signals.ready[src]
+                arrays['bar_pos'][:, j] = np.where(has_bar, offsets[-1] + pos, -1)
+
+                chunks['bar_dates'].append(signals.dates)
+                chunks['bar_high'].append(signals.high)
+                chunks['bar_low'].append(signals.low)
+                chunks['bar_close'].append(signals.close)
+            offsets.append(offsets[-1] + len(df))
+
+            if verbose and (j + 1) % 250 == 0:
+                print(f"  [{j + 1:4}/{len(tickers)}] signal arrays ({time.perf_counter() - started:.1f}s)")
+
+        arrays['bar_dates'] = np.concatenate(chunks['bar_dates']) if chunks['bar_dates'] \
+            else np.array([], dtype='datetime64[ns]')
+        for name in ('bar_high', 'bar_low', 'bar_close'):
+            arrays[name] = np.concatenate(chunks[name]) if chunks[name] else np.array([], dtype=np.float64)
+        arrays['offsets'] = np.asarray(offsets, dtype=np.int64)
+
+        return cls(dates, tickers, arrays)
+
+    @classmethod
+    def from_store(cls, tickers: List[str], start: str = None, end: str = None,
+                   store_dir: str = None, verbose: bool = True) -> 'PanelData':
+        """Build from the local bar store"""
+        from utils.bar_store import panel
+
+        return cls.from_bars(panel(tickers, start=start, end=end, store_dir=store_dir), verbose)
+
+
+class PanelSignals:
+    """
+    Entries and pre-resolved exits for one parameter set
+
+    Eligibility is one array expression over the whole panel. For eligible
+    cells the exit of an entry on that date is resolved in advance: exit
+    outcomes only depend on the entry price and ATR, never on capital or the
+    other positions.
+    """
+
+    def __init__(self, data: PanelData, params: Optional[Dict] = None):
+        params = resolve_params(params)
+        self.data = data
+        self.dates = data.dates
+        self.tickers = data.tickers
+        self.price = data.price
+        self.atr = data.atr
+        self.score = data.score
+        self.momentum = data.momentum
+        self.last_close = data.last_close
+
+        stop = data.price - params['atr_stop_mult'] * data.atr
+        self.eligible = (data.ready &
+                         (data.score >= params['min_confidence']) &
+                         (data.momentum >= params['min_expected_return']) &
+                         (data.rsi > 30) & (data.rsi < 75) &
+                         (data.price - stop > 0))
+
+        shape = self.eligible.shape
+        self.exit_day = np.full(shape, -1, dtype=np.int32)
+        self.exit_price = np.full(shape, np.nan)
+        self.exit_reason = np.zeros(shape, dtype=np.int8)
+
+        target_r = np.asarray(params['target_r'], dtype=np.float64)
+        for j in np.flatnonzero(self.eligible.any(axis=0)):
+            rows = np.flatnonzero(self.eligible[:, j])
+            lo, hi = int(data.offsets[j]), int(data.offsets[j + 1])
+            bar_dates = data.bar_dates[lo:hi]
+
+            price = data.price[rows, j]
+            risk = price - stop[rows, j]
+            exits = resolve_exits(
+                bar_dates, data.bar_high[lo:hi], data.bar_low[lo:hi], data.bar_close[lo:hi],
+                data.bar_pos[rows, j] - lo, stop[rows, j],
+                price[:, None] + risk[:, None] * target_r[None, :],
+                params['time_stop_days'], entry_dates=data.dates[rows]
+            )
+            closed = exits['exit_pos'] >= 0
+            # Every bar date is a panel date, so the lookup is exact
+            self.exit_day[rows[closed], j] = np.searchsorted(data.dates, bar_dates[exits['exit_pos'][closed]])
+            self.exit_price[rows, j] = exits['exit_price']
+            self.exit_reason[rows, j] = exits['reason']
+
+    @classmethod
+    def from_store(cls, tickers: List[str], start: str = None, end: str = None,
+                   params: Optional[Dict] = None, store_dir: str = None, verbose: bool = True) -> 'PanelSignals':
+        """Build from the local bar store"""
+        return cls(PanelData.from_store(tickers, start=start, end=end, store_dir=store_dir, verbose=verbose), params)
+
+
+def carry_position(signals: PanelSignals, position: Dict, params: Dict) -> Dict:
+    """
+    Open position from an earlier run's state, its exit re-resolved on this panel's bars
+
+    The bars the earlier run already checked are checked again and give no
+    hit, so the first exit found is the one a single continuous run would take.
+    """
+    if position['ticker'] not in signals.tickers:
+        raise ValueError(f"Carried position in {position['ticker']} has no bars in this panel")
+
+    data = signals.data
+    column = signals.tickers.index(position['ticker'])
+    lo, hi = int(data.offsets[column]), int(data.offsets[column + 1])
+    bar_dates = data.bar_dates[lo:hi]
+    entry_date = pd.Timestamp(position['entry_date'])
+
+    exits = resolve_exits(
+        bar_dates, data.bar_high[lo:hi], data.bar_low[lo:hi], data.bar_close[lo:hi],
+        [int(np.searchsorted(bar_dates, entry_date.to_datetime64(), side='right')) - 1], position['stop_loss'],
+        [position['target_1'], position['target_2'], position['target_3']],
+        params['time_stop_days'], entry_dates=[entry_date.to_datetime64()]
+    )
+    pos = int(exits['exit_pos'][0])
+    return {
+        **position,
+        'entry_date': entry_date,
+        'column': column,
+        'exit_day': int(np.searchsorted(signals.dates, bar_dates[pos])) if pos >= 0 else -1,
+        'planned_exit_price': float(exits['exit_price'][0]),
+        'planned_reason': reason_name(int(exits['reason'][0])),
+    }
+
+
+def run_panel_backtest(signals: PanelSignals, start: str = None, params: Optional[Dict] = None,
+                       rank_by: str = 'score', verbose: bool = True, initial_state: Optional[Dict] = None,
+                       close_at_end: bool = True) -> Dict:
+    """
+    Portfolio simulation over the panel
+
+    Same rules and accounting as run_fast_backtest: exits first, then entries
+    until max_positions, each sized against the capital left at that point.
+
+    Args:
+        signals: PanelSignals for the universe
+        start: First simulated date (earlier bars only warm up the indicators)
+        params: Overrides for DEFAULT_PARAMS
+        rank_by: 'score' (score, then momentum, descending) or 'universe'
+                 (column order, first come first served like TEST_STOCKS)
+        verbose: Print progress every 250 dates
+        initial_state: Start from an earlier run's result['state'] (cash and open
+                       positions) instead of initial_capital in cash
+        close_at_end: Close remaining positions at the last close (BACKTEST_END);
+                      False leaves them open in result['state']
+
+    Returns:
+        Dict with trades (DataFrame), equity / invested / traded (Series),
+        final_capital (marked to market) and state (cash, open positions)
+    """
+    if rank_by not in RANK_MODES:
+        raise ValueError(f"rank_by must be one of {RANK_MODES}")
+
+    params = resolve_params(params)
+    dates = signals.dates
+    n_dates, n_tickers = signals.eligible.shape
+    start_idx = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start))))
+
+    capital = float(params['initial_capital'])
+    held = np.zeros(n_tickers, dtype=bool)
+    open_positions = []     # entry order, like open_trades
+    trades = []
+    equity = np.full(n_dates - start_idx, np.nan)
+    invested = np.zeros(n_dates - start_idx)
+    traded = np.zeros(n_dates - start_idx)
+
+    if initial_state is not None:
+        capital = float(initial_state['capital'])
+        for position in initial_state['positions']:
+            position = carry_position(signals, position, params)
+            if position['exit_day'] >= 0:
+                position['exit_day'] = max(position['exit_day'], start_idx)
+            open_positions.append(position)
+            held[position['column']] = True
+
+    def close_position(position, day, exit_price, reason):
+        pnl = (exit_price - position['entry_price']) * position['shares']
+        trades.append({
+            **position,
+            'exit_date': pd.Timestamp(dates[day]),
+            'exit_price': exit_price,
+            'exit_reason': reason,
+            'pnl': pnl,
+            'pnl_pct': (exit_price - position['entry_price']) / position['entry_price'] * 100,
+            'days_held': (pd.Timestamp(dates[day]) - position['entry_date']).days,
+        })
+        held[position['column']] = False
+        traded[day - start_idx] += exit_price * position['shares']
+        return position['capital_used'] + pnl
+
+    for d in range(start_idx, n_dates):
+        # Exits resolved at entry and due today
+        for position in [p for p in open_positions if p['exit_day'] == d]:
+            capital += close_position(position, d, position['planned_exit_price'], position['planned_reason'])
+            open_positions.remove(position)
+
+        # Entries: ranked candidates, sized one at a time (capital shrinks with each entry)
+        free = params['max_positions'] - len(open_positions)
+        if free > 0:
+            candidates = np.flatnonzero(signals.eligible[d] & ~held)
+            if rank_by == 'score' and len(candidates):
+                order = np.lexsort((candidates, -signals.momentum[d, candidates], -signals.score[d, candidates]))
+                candidates = candidates[order]
+
+            price = signals.price[d, candidates]
+            stop = price - params['atr_stop_mult'] * signals.atr[d, candidates]
+            risk = price - stop
+
+            while free > 0 and len(candidates):
+                shares = np.minimum(np.floor(capital * params['risk_per_trade'] / risk),
+                                    np.floor(capital * params['max_position_pct'] / price))
+                fits = (shares > 0) & (shares * price <= capital)
+                if not fits.any():
+                    break
+
+                # Shares only shrink as capital is spent, so skipped candidates stay skipped
+                k = int(np.argmax(fits))
+                column, entry_price, n_shares = int(candidates[k]), float(price[k]), int(shares[k])
+                r1, r2, r3 = params['target_r']
+                open_positions.append({
+                    'ticker': signals.tickers[column],
+                    'column': column,
+                    'entry_date': pd.Timestamp(dates[d]),
+                    'entry_price': entry_price,
+                    'shares': n_shares,
+                    'capital_used': entry_price * n_shares,
+                    'stop_loss': float(stop[k]),
+                    'target_1': entry_price + float(risk[k]) * r1,
+                    'target_2': entry_price + float(risk[k]) * r2,
+                    'target_3': entry_price + float(risk[k]) * r3,
+                    'score': float(signals.score[d, column]),
+                    'exit_day': int(signals.exit_day[d, column]),
+                    'planned_exit_price': float(signals.exit_price[d, column]),
+                    'planned_reason': reason_name(int(signals.exit_reason[d, column])),
+                })
+                held[column] = True
+                capital -= entry_price * n_shares
+                traded[d - start_idx] += entry_price * n_shares
+                free -= 1
+
+                candidates, price, risk, stop = candidates[k + 1:], price[k + 1:], risk[k + 1:], stop[k + 1:]
+
+        if open_positions:
+            columns = np.array([p['column'] for p in open_positions])
+            shares = np.array([p['shares'] for p in open_positions], dtype=np.float64)
+            invested[d - start_idx] = float(shares @ signals.last_close[d, columns])
+            equity[d - start_idx] = capital + invested[d - start_idx]
+        else:
+            equity[d - start_idx] = capital
+
+        if verbose and (d - start_idx + 1) % 250 == 0:
+            print(f"{pd.Timestamp(dates[d]).strftime('%Y-%m-%d')} | Trades: {len(trades) + len(open_positions):5} | "
+                  f"Open: {len(open_positions)} | Equity: ₹{equity[d - start_idx]:>12,.0f}")
+
+    # Close remaining positions at the last close on or before the final date
+    if close_at_end:
+        for position in open_positions:
+            capital += close_position(position, n_dates - 1, float(signals.last_close[-1, position['column']]),
+                                      'BACKTEST_END')
+        open_positions = []
+
+    columns = ['ticker', 'entry_date', 'entry_price', 'shares', 'capital_used', 'stop_loss',
+               'target_1', 'target_2', 'target_3', 'score', 'exit_date', 'exit_price', 'exit_reason',
+               'pnl', 'pnl_pct', 'days_held']
+    trades_df = pd.DataFrame(trades, columns=columns)
+    if len(trades_df):
+        trades_df = trades_df.sort_values(['entry_date', 'exit_date'], kind='stable').reset_index(drop=True)
+
+    index = pd.DatetimeIndex(dates[start_idx:])
+    return {
+        'trades': trades_df,
+        'equity': pd.Series(equity, index=index, name='equity'),
+        'invested': pd.Series(invested, index=index, name='invested'),
+        'traded': pd.Series(traded, index=index, name='traded'),
+        'final_capital': float(equity[-1]) if open_positions and len(equity) else capital,
+        'state': {
+            'capital': capital,
+            'positions': [{
+                **{field: position[field] for field in CARRY_FIELDS},
+                'entry_date': position['entry_date'].strftime('%Y-%m-%d'),
+            } for position in open_positions],
+        },
+    }
+
+
+def summarize_result(result: Dict, initial_capital: float) -> Dict:
+    """Headline numbers of a run_panel_backtest result (daily-equity metrics + trade stats)"""
+    trades, equity = result['trades'], result['equity']
+    summary = {'total_return': result['final_capital'] / initial_capital - 1}
+
+    if len(equity):
+        metrics = equity_metrics(equity.values, dates=equity.index,
+                                 invested=result['invested'].values, traded=result['traded'].values)
+        summary.update({name: float(values[0]) for name, values in metrics.items() if name != 'total_return'})
+
+    stats = trade_stats(trades['pnl'].values, trades['pnl_pct'].values, trades['days_held'].values)
+    summary.update({name: float(values[0]) for name, values in stats.items()})
+    summary['trades'] = int(stats['trades'][0])
+    return summary
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.bar_store import universe, update_store
+    from evaluation.trade_ledger import TradeLedger
+
+    parser = argparse.ArgumentParser(description="Universe-scale panel portfolio backtest")
+    parser.add_argument("--universe", default="stored", help="'nse', 'stored' or comma-separated tickers")
+    parser.add_argument("--start", default="2015-01-01", help="First simulated date")
+    parser.add_argument("--end", default=None)
+    parser.add_argument("--warmup-days", type=int, default=180, help="Calendar days loaded before --start")
+    parser.add_argument("--rank", choices=RANK_MODES, default="score")
+    parser.add_argument("--max-positions", type=int, default=None)
+    parser.add_argument("--update", action="store_true", help="Update the bar store first")
+    parser.add_argument("--output", default=None, help="Write the trades to this CSV (.parquet: trade ledger)")
+    args = parser.parse_args()
+
+    tickers = universe(args.universe)
+    if args.update:
+        update_store(tickers)
+
+    params = {}
+    if args.max_positions:
+        params['max_positions'] = args.max_positions
+
+    print("="*100)
+    print(f"🔬 PANEL BACKTEST: {len(tickers)} tickers from {args.start} (rank: {args.rank})")
+    print("="*100)
+
+    started = time.perf_counter()
+    load_from = (pd.Timestamp(args.start) - pd.Timedelta(days=args.warmup_days)).strftime('%Y-%m-%d')
+    signals = PanelSignals.from_store(tickers, start=load_from, end=args.end, params=params)
+    print(f"⚡ Panel {signals.eligible.shape[0]} dates x {signals.eligible.shape[1]} tickers, "
+          f"{int(signals.eligible.sum()):,} eligible cells ({time.perf_counter() - started:.1f}s)")
+
+    sim_started = time.perf_counter()
+    result = run_panel_backtest(signals, start=args.start, params=params, rank_by=args.rank)
+    print(f"\n⏱️  Simulation: {time.perf_counter() - sim_started:.1f}s | total {time.perf_counter() - started:.1f}s")
+
+    summary = summarize_result(result, resolve_params(params)['initial_capital'])
+
+    print("\n" + "="*100)
+    print("📊 RESULTS")
+    print("="*100)
+    print(f"Trades:        {summary['trades']}")
+    if summary['trades']:
+        print(f"Win rate:      {summary['win_rate']:.1%}")
+        print(f"Expectancy:    {summary['expectancy_pct']:+.2f}% per trade | profit factor {summary['profit_factor']:.2f}")
+    print(f"Final capital: ₹{result['final_capital']:,.0f} ({summary['total_return']:+.2%})")
+    if 'cagr' in summary:
+        print(f"CAGR:          {summary['cagr']:+.2%}")
+        print(f"Sharpe:        {summary['sharpe']:.2f} | Sortino {summary['sortino']:.2f} (daily)")
+        print(f"Max drawdown:  {-summary['max_drawdown']:.2%} ({summary['max_drawdown_days']:.0f} days underwater)")
+        print(f"Exposure:      {summary['exposure']:.0%} of days | turnover {summary['turnover']:.1f}x / year")
+
+    if args.output:
+        if args.output.endswith('.parquet'):
+            TradeLedger.from_frame(result['trades']).save(args.output)
+        else:
+            result['trades'].to_csv(args.output, index=False)
+        print(f"💾 Trades saved to {args.output}")
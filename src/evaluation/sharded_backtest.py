@@ -0,0 +1,313 @@
+"""
+Sharded Multi-Year Backtest
+Splits a long date range into yearly shards. Each shard loads its own panel
+with warm-up bars before the shard start. The EMAs are adjusted ewm averages
+whose values depend on where loading starts, so the default warm-up is sized
+from the longest span until bars before it carry less than
+SHARD_WARMUP_TOLERANCE of the weight (--full-history loads every stored bar
+for exact parity). Independent shards start flat and run in parallel processes; with
+--carry each shard starts from the previous shard's cash and open positions.
+Every shard is saved on its own (trade ledger, daily equity, end state), so a
+changed year is re-run alone and the rest are reused. Trade logs and equity
+curves are then merged in shard order
+
+Usage:
+    python3 src/evaluation/sharded_backtest.py --universe stored --start 2015-01-01 --end 2024-12-31
+    python3 src/evaluation/sharded_backtest.py --universe stored --start 2015-01-01 --end 2024-12-31 --rerun 2020
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.fast_backtest import LONGEST_EMA_SPAN, MIN_HISTORY, resolve_params
+from evaluation.panel_backtest import PanelSignals, run_panel_backtest, summarize_result
+from evaluation.trade_ledger import TradeLedger
+
+SHARDED_BACKTEST_DIR = os.getenv('SHARDED_BACKTEST_DIR', 'results/sharded_backtests')
+SHARD_WARMUP_TOLERANCE = float(os.getenv('SHARD_WARMUP_TOLERANCE', '1e-8'))
+
+TRADING_DAYS_PER_YEAR = 240    # below NSE's ~248, so the calendar warm-up never comes up short
+
+EQUITY_COLUMNS = ('equity', 'invested', 'traded')
+
+
+def default_warmup_days(tolerance: float = SHARD_WARMUP_TOLERANCE) -> int:
+    """
+    Calendar days of warm-up so every EMA matches a continuous run to within tolerance
+
+    An adjusted ewm weights the bar k bars back by (1 - alpha)^k with
+    alpha = 2 / (span + 1); after enough bars the weight of everything before
+    the warm-up falls below tolerance. MIN_HISTORY more bars cover readiness.
+    """
+    alpha = 2 / (LONGEST_EMA_SPAN + 1)
+    bars = math.ceil(math.log(tolerance) / math.log(1 - alpha)) + MIN_HISTORY
+    return math.ceil(bars * 365.25 / TRADING_DAYS_PER_YEAR)
+
+
+def year_shards(start: str, end: str) -> List[Dict]:
+    """Calendar-year shards covering [start, end], the first and last clipped"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    shards = []
+    for year in range(start.year, end.year + 1):
+        shards.append({
+            'shard': str(year),
+            'start': max(start, pd.Timestamp(year=year, month=1, day=1)).strftime('%Y-%m-%d'),
+            'end': min(end, pd.Timestamp(year=year, month=12, day=31)).strftime('%Y-%m-%d'),
+        })
+    return shards
+
+
+def run_shard(shard: Dict, tickers: List[str], params: Dict, rank_by: str = 'score',
+              warmup_days: Optional[int] = None, initial_state: Optional[Dict] = None, close_at_end: bool = True,
+              store_dir: str = None) -> Dict:
+    """
+    Backtest one shard on its own panel
+
+    Bars from warmup_days before the shard start (None = every stored bar)
+    are loaded for the indicators and for re-resolving carried positions;
+    only the shard's own dates are simulated.
+    """
+    started = time.perf_counter()
+    load_from = None if warmup_days is None else \
+        (pd.Timestamp(shard['start']) - pd.Timedelta(days=warmup_days)).strftime('%Y-%m-%d')
+    signals = PanelSignals.from_store(tickers, start=load_from, end=shard['end'], params=params,
+                                      store_dir=store_dir, verbose=False)
+    result = run_panel_backtest(signals, start=shard['start'], params=params, rank_by=rank_by, verbose=False,
+                                initial_state=initial_state, close_at_end=close_at_end)
+    result['shard'] = shard
+    result['initial_state'] = initial_state
+    result['close_at_end'] = close_at_end
+    result['seconds'] = round(time.perf_counter() - started, 2)
+    return result
+
+
+# === Shard files ===
+
+def save_shard(result: Dict, shard_dir: str, config: Dict):
+    """trades.parquet (ledger), equity.parquet and shard.json (config, states, timing)"""
+    os.makedirs(shard_dir, exist_ok=True)
+    TradeLedger.from_frame(result['trades']).save(os.path.join(shard_dir, 'trades.parquet'))
+    pd.DataFrame({name: result[name] for name in EQUITY_COLUMNS}).to_parquet(os.path.join(shard_dir, 'equity.parquet'))
+    with open(os.path.join(shard_dir, 'shard.json'), 'w') as f:
+        json.dump({
+            'shard': result['shard'],
+            'config': config,
+            'initial_state': result['initial_state'],
+            'close_at_end': result['close_at_end'],
+            'state': result['state'],
+            'final_capital': result['final_capital'],
+            'seconds': result['seconds'],
+        }, f, indent=2)
+
+
+def load_shard(shard_dir: str, config: Dict, shard: Dict, close_at_end: bool = True) -> Optional[Dict]:
+    """
+    A saved shard, or None if missing or not the same run
+
+    The saved shard must match the config, the shard's date range (a clipped
+    first/last year differs from the full year) and whether its positions were
+    liquidated at the end (only the last carried shard closes them).
+    """
+    path = os.path.join(shard_dir, 'shard.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        meta = json.load(f)
+    if meta['config'] != config or meta['shard'] != shard or meta.get('close_at_end') != close_at_end:
+        return None
+
+    equity = pd.read_parquet(os.path.join(shard_dir, 'equity.parquet'))
+    trades = TradeLedger.load(os.path.join(shard_dir, 'trades.parquet')).to_frame()
+    trades['ticker'] = trades['ticker'].astype(str)
+    trades['exit_reason'] = trades['exit_reason'].astype(str)
+    return {
+        **meta,
+        'trades': trades.drop(columns=['run_id']),
+        **{name: equity[name] for name in EQUITY_COLUMNS},
+    }
+
+
+def merge_shards(results: List[Dict], initial_capital: float, carry: bool) -> Dict:
+    """
+    One result from shard results, in shard order
+
+    Carried shards already form one continuous portfolio. Independent shards
+    each start at initial_capital, so each equity curve (and its invested /
+    traded flows) is scaled to continue from the previous shard's end value,
+    which chains the shard returns. Trade P&L stays in each shard's own capital.
+    """
+    results = sorted(results, key=lambda r: r['shard']['start'])
+    curves = {name: [] for name in EQUITY_COLUMNS}
+    trades = []
+    value = float(initial_capital)
+
+    for result in results:
+        equity = result['equity']
+        scale = 1.0 if carry or not len(equity) else value / initial_capital
+        for name in EQUITY_COLUMNS:
+            curves[name].append(result[name] * scale)
+        if len(equity):
+            value = float(equity.iloc[-1]) * scale
+
+        shard_trades = result['trades'].copy()
+        shard_trades.insert(0, 'shard', result['shard']['shard'])
+        trades.append(shard_trades)
+
+    merged = {name: pd.concat(parts) if parts else pd.Series(dtype=np.float64, name=name)
+              for name, parts in curves.items()}
+    merged['trades'] = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame()
+    merged['final_capital'] = float(merged['equity'].iloc[-1]) if len(merged['equity']) else float(initial_capital)
+    return merged
+
+
+def run_sharded(tickers: List[str], start: str, end: str, params: Optional[Dict] = None, rank_by: str = 'score',
+                warmup_days: Optional[int] = None, full_history: bool = False, carry: bool = False,
+                rerun: Optional[List[str]] = None, max_workers: int = None, output_dir: str = None,
+                store_dir: str = None) -> Dict:
+    """
+    Run (or reuse) every yearly shard and merge them
+
+    Args:
+        tickers: Universe
+        start, end: Simulated date range
+        params: Overrides for DEFAULT_PARAMS
+        rank_by: Entry ranking (see run_panel_backtest)
+        warmup_days: Calendar days of bars loaded before each shard (default: default_warmup_days())
+        full_history: Load every stored bar before each shard instead (exact parity, slower)
+        carry: Start each shard from the previous shard's cash and open positions
+               (shards then run in order; a reused shard must have the same starting state)
+        rerun: Shard names to run again even if saved
+        max_workers: Pool size for independent shards (default: all cores)
+        output_dir: Shard directories + merged outputs (default: SHARDED_BACKTEST_DIR/<start>_<end>)
+        store_dir: Bar store directory
+
+    Returns:
+        Merged result (trades, equity, invested, traded, final_capital) plus
+        per-shard summary rows
+    """
+    params = resolve_params(params)
+    warmup_days = None if full_history else (default_warmup_days() if warmup_days is None else warmup_days)
+    output_dir = output_dir or os.path.join(SHARDED_BACKTEST_DIR, f"{start}_{end}")
+    rerun = set(rerun or [])
+    shards = year_shards(start, end)
+    config = {
+        'tickers': list(tickers), 'rank_by': rank_by, 'warmup_days': warmup_days, 'carry': carry,
+        'params': {k: list(v) if isinstance(v, tuple) else v for k, v in params.items()},
+    }
+
+    def shard_dir(shard):
+        return os.path.join(output_dir, 'shards', shard['shard'])
+
+    results = {}
+    if carry:
+        state = None
+        for i, shard in enumerate(shards):
+            close_at_end = i == len(shards) - 1
+            result = None if shard['shard'] in rerun else load_shard(shard_dir(shard), config, shard, close_at_end)
+            if result is not None and result['initial_state'] == state:
+                print(f"  ♻️  {shard['shard']}: reused ({len(result['trades'])} trades)")
+            else:
+                result = run_shard(shard, tickers, params, rank_by, warmup_days, initial_state=state,
+                                   close_at_end=close_at_end, store_dir=store_dir)
+                save_shard(result, shard_dir(shard), config)
+                print(f"  ✅ {shard['shard']}: {len(result['trades'])} trades, "
+                      f"{len(result['state']['positions'])} carried ({result['seconds']:.1f}s)")
+            # Round-trip through JSON so fresh and reused states compare equal
+            state = json.loads(json.dumps(result['state']))
+            results[shard['shard']] = result
+    else:
+        pending = []
+        for shard in shards:
+            result = None if shard['shard'] in rerun else load_shard(shard_dir(shard), config, shard)
+            if result is None:
+                pending.append(shard)
+            else:
+                results[shard['shard']] = result
+                print(f"  ♻️  {shard['shard']}: reused ({len(result['trades'])} trades)")
+
+        if pending:
+            max_workers = min(max_workers or os.cpu_count() or 1, len(pending))
+            print(f"🔧 {len(pending)} shards on {max_workers} workers")
+            with ProcessPoolExecutor(max_workers=max_workers, mp_context=mp.get_context('spawn')) as pool:
+                futures = {pool.submit(run_shard, shard, tickers, params, rank_by, warmup_days,
+                                       store_dir=store_dir): shard for shard in pending}
+                for future in as_completed(futures):
+                    shard = futures[future]
+                    result = future.result()
+                    save_shard(result, shard_dir(shard), config)
+                    results[shard['shard']] = result
+                    print(f"  ✅ {shard['shard']}: {len(result['trades'])} trades ({result['seconds']:.1f}s)")
+
+    ordered = [results[shard['shard']] for shard in shards]
+    merged = merge_shards(ordered, params['initial_capital'], carry)
+
+    # Carried shards start from the previous shard's marked-to-market value
+    rows, base = [], float(params['initial_capital'])
+    for result in ordered:
+        rows.append({'shard': result['shard']['shard'], **summarize_result(result, base)})
+        if carry:
+            base = float(result['final_capital'])
+    merged['shards'] = pd.DataFrame(rows)
+
+    ledger = TradeLedger.from_frame(merged['trades'].assign(run_id=merged['trades']['shard'].astype(int))) \
+        if len(merged['trades']) else TradeLedger.concat([])
+    ledger.save(os.path.join(output_dir, 'trades.parquet'))
+    pd.DataFrame({name: merged[name] for name in EQUITY_COLUMNS}).to_csv(os.path.join(output_dir, 'equity.csv'))
+    merged['shards'].to_csv(os.path.join(output_dir, 'shards.csv'), index=False)
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+    from utils.bar_store import universe
+
+    parser = argparse.ArgumentParser(description="Yearly-sharded parallel panel backtest")
+    parser.add_argument("--universe", default="stored", help="'nse', 'stored' or comma-separated tickers")
+    parser.add_argument("--start", default="2015-01-01")
+    parser.add_argument("--end", default=pd.Timestamp.now().strftime('%Y-%m-%d'))
+    parser.add_argument("--warmup-days", type=int, default=None,
+                        help="Calendar days loaded before each shard (default: sized from the EMA span)")
+    parser.add_argument("--full-history", action="store_true",
+                        help="Load every stored bar before each shard (exact parity with one continuous run)")
+    parser.add_argument("--rank", choices=('score', 'universe'), default="score")
+    parser.add_argument("--carry", action="store_true", help="Carry cash and open positions across shards")
+    parser.add_argument("--rerun", default=None, help="Comma-separated shards to run again, e.g. 2020,2021")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Output directory")
+    args = parser.parse_args()
+
+    print("="*100)
+    print(f"🧩 SHARDED BACKTEST: {args.start} to {args.end} ({'carried' if args.carry else 'independent'} shards)")
+    print("="*100)
+
+    started = time.perf_counter()
+    params = resolve_params()
+    merged = run_sharded(universe(args.universe), args.start, args.end, rank_by=args.rank,
+                         warmup_days=args.warmup_days, full_history=args.full_history, carry=args.carry,
+                         rerun=[s for s in (args.rerun or '').split(',') if s.strip()],
+                         max_workers=args.workers, output_dir=args.output)
+    summary = summarize_result(merged, params['initial_capital'])
+
+    print("\n" + "="*100)
+    print("📊 MERGED RESULTS")
+    print("="*100)
+    print(merged['shards'][['shard', 'trades', 'win_rate', 'total_return', 'max_drawdown']].to_string(index=False))
+    print()
+    print(f"Trades:        {summary['trades']}")
+    print(f"Final capital: ₹{merged['final_capital']:,.0f} ({summary['total_return']:+.2%})")
+    if 'cagr' in summary:
+        print(f"CAGR:          {summary['cagr']:+.2%}")
+        print(f"Sharpe:        {summary['sharpe']:.2f} | Sortino {summary['sortino']:.2f} (daily)")
+        print(f"Max drawdown:  {-summary['max_drawdown']:.2%} ({summary['max_drawdown_days']:.0f} days underwater)")
+    print(f"\n⏱️  {(time.perf_counter() - started) / 60:.1f} minutes")
@@ -0,0 +1,323 @@
+"""
+Trade Ledger
+Closed trades as one NumPy structured array (a column per field, tickers and
+exit reasons dictionary-encoded) instead of a list of Trade objects. Filters
+and per-run/per-ticker aggregates are array ops, TradeRow gives the familiar
+Trade attribute access, and the ledger round-trips through a compact Parquet
+file that loads in milliseconds
+
+Usage:
+    python3 src/evaluation/trade_ledger.py --input results/backtest_sweeps/<run>/trades.parquet --by run_id
+"""
+
+import os
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from evaluation.metrics import trade_stats
+
+LEDGER_DTYPE = np.dtype([
+    ('run_id', 'i4'),           # config_id in a sweep, 0 for a single backtest
+    ('ticker', 'i4'),           # code into TradeLedger.tickers
+    ('entry_date', 'M8[D]'),
+    ('entry_price', 'f8'),
+    ('shares', 'i8'),
+    ('capital_used', 'f8'),
+    ('stop_loss', 'f8'),
+    ('target_1', 'f8'),
+    ('target_2', 'f8'),
+    ('target_3', 'f8'),
+    ('score', 'f4'),
+    ('exit_date', 'M8[D]'),     # NaT while open
+    ('exit_price', 'f8'),
+    ('exit_reason', 'i2'),      # code into TradeLedger.reasons, -1 while open
+    ('pnl', 'f8'),
+    ('pnl_pct', 'f8'),
+    ('days_held', 'i4'),
+])
+
+ENCODED = ('ticker', 'exit_reason')
+DATE_FIELDS = ('entry_date', 'exit_date')
+
+
+def _encode(values) -> Tuple[np.ndarray, List[str]]:
+    """Values -> (codes, vocabulary); missing values get code -1"""
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return codes, [str(u) for u in uniques]
+
+
+def _remap(codes: np.ndarray, old: List[str], new: pd.Index) -> np.ndarray:
+    """Re-point codes from vocabulary old to new, keeping -1"""
+    lookup = np.append(new.get_indexer(old), -1)
+    return lookup[codes]
+
+
+class TradeRow:
+    """Read-only view of one ledger row with the attribute names of Trade"""
+
+    __slots__ = ('_ledger', '_i')
+
+    def __init__(self, ledger: 'TradeLedger', i: int):
+        self._ledger = ledger
+        self._i = i
+
+    def __getattr__(self, name):
+        if name not in LEDGER_DTYPE.names:
+            raise AttributeError(name)
+        return self._ledger.value(self._i, name)
+
+    @property
+    def status(self) -> str:
+        return 'OPEN' if np.isnat(self._ledger.records['exit_date'][self._i]) else 'CLOSED'
+
+    def to_dict(self) -> Dict:
+        """Same layout as Trade.to_dict"""
+        exit_date = self.exit_date
+        return {
+            'ticker': self.ticker,
+            'entry_date': self.entry_date.strftime('%Y-%m-%d'),
+            'entry_price': round(self.entry_price, 2),
+            'shares': self.shares,
+            'capital_used': round(self.capital_used, 2),
+            'stop_loss': round(self.stop_loss, 2),
+            'target_1': round(self.target_1, 2),
+            'exit_date': exit_date.strftime('%Y-%m-%d') if exit_date is not None else None,
+            'exit_price': round(self.exit_price, 2) if exit_date is not None else None,
+            'exit_reason': self.exit_reason,
+            'pnl': round(self.pnl, 2),
+            'pnl_pct': round(self.pnl_pct, 2),
+            'days_held': self.days_held,
+            'status': self.status
+        }
+
+    def __repr__(self):
+        return f"TradeRow({self.ticker}, {self.entry_date.date()}, {self.exit_reason}, pnl={self.pnl:,.2f})"
+
+
+class TradeLedger:
+    """
+    Structure-of-arrays trade log
+
+    Indexing with an int gives a TradeRow; with a slice, mask or index array
+    a new TradeLedger sharing the vocabularies.
+    """
+
+    def __init__(self, records: np.ndarray, tickers: List[str], reasons: List[str]):
+        self.records = records
+        self.tickers = list(tickers)
+        self.reasons = list(reasons)
+
+    # === Construction ===
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Iterable], run_id: int = 0) -> 'TradeLedger':
+        """
+        Ledger from a dict of field -> values (missing fields stay empty)
+
+        Args:
+            columns: Must include ticker; run_id is taken from here when present
+            run_id: Run id for every row otherwise
+        """
+        n = len(columns['ticker'])
+        records = np.zeros(n, dtype=LEDGER_DTYPE)
+
+        ticker_codes, tickers = _encode(columns['ticker'])
+        reason_codes, reasons = _encode(columns.get('exit_reason', [None] * n))
+        records['ticker'] = ticker_codes
+        records['exit_reason'] = reason_codes
+        records['run_id'] = columns.get('run_id', run_id)
+
+        for name in LEDGER_DTYPE.names:
+            if name in ENCODED or name == 'run_id':
+                continue
+            kind = LEDGER_DTYPE[name].kind
+            if name not in columns:
+                records[name] = np.datetime64('NaT') if kind == 'M' else (np.nan if kind == 'f' else 0)
+            elif kind == 'M':
+                records[name] = pd.to_datetime(pd.Series(columns[name], dtype=object)).values.astype('M8[D]')
+            else:
+                values = pd.to_numeric(pd.Series(columns[name], dtype=object), errors='coerce').values
+                records[name] = values if kind == 'f' else np.nan_to_num(values)
+
+        return cls(records, tickers, reasons)
+
+    @classmethod
+    def from_trades(cls, trades: Iterable, run_id: int = 0) -> 'TradeLedger':
+        """Ledger from Trade objects (fast_backtest.Trade, backtest_bot.Trade or TradeRow)"""
+        trades = list(trades)
+        columns = {
+            name: [getattr(t, name, None) for t in trades]
+            for name in LEDGER_DTYPE.names if name != 'run_id'
+        }
+        return cls.from_columns(columns, run_id)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, run_id: int = 0) -> 'TradeLedger':
+        """Ledger from a trades DataFrame (run_panel_backtest, to_frame)"""
+        return cls.from_columns({name: frame[name].values for name in frame.columns}, run_id)
+
+    @classmethod
+    def concat(cls, ledgers: List['TradeLedger']) -> 'TradeLedger':
+        """One ledger from many (e.g. one per sweep config), vocabularies merged"""
+        ledgers = [ledger for ledger in ledgers if ledger is not None]
+        if not ledgers:
+            return cls(np.zeros(0, dtype=LEDGER_DTYPE), [], [])
+
+        tickers = pd.Index(pd.unique(pd.Series([t for ledger in ledgers for t in ledger.tickers], dtype=object)))
+        reasons = pd.Index(pd.unique(pd.Series([r for ledger in ledgers for r in ledger.reasons], dtype=object)))
+
+        parts = []
+        for ledger in ledgers:
+            records = ledger.records.copy()
+            records['ticker'] = _remap(records['ticker'], ledger.tickers, tickers)
+            records['exit_reason'] = _remap(records['exit_reason'], ledger.reasons, reasons)
+            parts.append(records)
+        return cls(np.concatenate(parts), list(tickers), list(reasons))
+
+    # === Persistence ===
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame with categorical ticker / exit_reason columns"""
+        frame = pd.DataFrame({name: self.records[name] for name in LEDGER_DTYPE.names})
+        frame['ticker'] = pd.Categorical.from_codes(self.records['ticker'], categories=self.tickers)
+        frame['exit_reason'] = pd.Categorical.from_codes(self.records['exit_reason'], categories=self.reasons)
+        for name in DATE_FIELDS:
+            frame[name] = self.records[name].astype('datetime64[ns]')
+        return frame
+
+    def save(self, path: str):
+        """Write as Parquet (categoricals become dictionary-encoded columns)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.to_frame().to_parquet(path, index=False)
+
+    @classmethod
+    def load(cls, path: str) -> 'TradeLedger':
+        return cls.from_frame(pd.read_parquet(path))
+
+    def to_dicts(self) -> List[Dict]:
+        """Trade.to_dict rows (for JSON consumers)"""
+        return [row.to_dict() for row in self]
+
+    # === Access ===
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return (TradeRow(self, i) for i in range(len(self.records)))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return TradeRow(self, range(len(self.records))[key])
+        return TradeLedger(self.records[key], self.tickers, self.reasons)
+
+    def value(self, i: int, name: str):
+        """One field of row i as a plain Python value"""
+        value = self.records[name][i]
+        if name == 'ticker':
+            return self.tickers[value]
+        if name == 'exit_reason':
+            return self.reasons[value] if value >= 0 else None
+        if name in DATE_FIELDS:
+            return None if np.isnat(value) else pd.Timestamp(value)
+        return value.item()
+
+    def column(self, name: str) -> np.ndarray:
+        """Field as an array; ticker / exit_reason decoded to strings"""
+        if name == 'ticker':
+            return np.asarray(self.tickers, dtype=object)[self.records['ticker']]
+        if name == 'exit_reason':
+            vocabulary = np.asarray(self.reasons + [None], dtype=object)
+            return vocabulary[self.records['exit_reason']]
+        return self.records[name]
+
+    def _codes(self, values, vocabulary: List[str]) -> np.ndarray:
+        values = [values] if isinstance(values, str) else list(values)
+        return pd.Index(vocabulary).get_indexer(values)
+
+    def filter(self, ticker=None, exit_reason=None, run_id=None, start: Optional[str] = None,
+               end: Optional[str] = None, winners: Optional[bool] = None, closed: Optional[bool] = None) -> 'TradeLedger':
+        """
+        Rows matching every given condition
+
+        Args:
+            ticker, exit_reason: One value or a list
+            run_id: One id or a list
+            start, end: Entry date range (inclusive)
+            winners: True = pnl > 0, False = pnl <= 0
+            closed: True = has an exit, False = still open
+        """
+        records = self.records
+        mask = np.ones(len(records), dtype=bool)
+        if ticker is not None:
+            mask &= np.isin(records['ticker'], self._codes(ticker, self.tickers))
+        if exit_reason is not None:
+            mask &= np.isin(records['exit_reason'], self._codes(exit_reason, self.reasons))
+        if run_id is not None:
+            mask &= np.isin(records['run_id'], np.atleast_1d(run_id))
+        if start is not None:
+            mask &= records['entry_date'] >= np.datetime64(pd.Timestamp(start).date())
+        if end is not None:
+            mask &= records['entry_date'] <= np.datetime64(pd.Timestamp(end).date())
+        if winners is not None:
+            mask &= (records['pnl'] > 0) == winners
+        if closed is not None:
+            mask &= ~np.isnat(records['exit_date']) == closed
+        return self[mask]
+
+    # === Aggregates ===
+
+    def stats(self, by: Optional[str] = 'run_id') -> pd.DataFrame:
+        """
+        metrics.trade_stats per group
+
+        Args:
+            by: 'run_id', 'ticker', 'exit_reason' or None (whole ledger)
+
+        Returns:
+            DataFrame indexed by group, plus a total pnl column
+        """
+        records = self.records
+        if by is None:
+            labels, groups = np.array(['all']), np.zeros(len(records), dtype=np.int64)
+        else:
+            labels, groups = np.unique(records[by], return_inverse=True)
+            if by == 'ticker':
+                labels = np.asarray(self.tickers, dtype=object)[labels]
+            elif by == 'exit_reason':
+                labels = np.asarray(self.reasons + [None], dtype=object)[labels]
+
+        stats = trade_stats(records['pnl'], records['pnl_pct'], records['days_held'],
+                            groups=groups, n_groups=len(labels))
+        stats['pnl'] = np.bincount(groups, weights=records['pnl'], minlength=len(labels))
+        return pd.DataFrame(stats, index=pd.Index(labels, name=by))
+
+    def reason_counts(self) -> pd.Series:
+        """Trades per exit reason"""
+        codes = self.records['exit_reason']
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.reasons))
+        return pd.Series(counts, index=self.reasons, name='trades').sort_values(ascending=False)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Summarize a trade ledger Parquet file")
+    parser.add_argument("--input", required=True)
+    parser.add_argument("--by", choices=('run_id', 'ticker', 'exit_reason', 'all'), default="run_id")
+    parser.add_argument("--top", type=int, default=20, help="Groups shown, best total pnl first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    ledger = TradeLedger.load(args.input)
+    print(f"⚡ {len(ledger):,} trades loaded in {(time.perf_counter() - started) * 1000:.0f} ms "
+          f"({os.path.getsize(args.input) / 1e3:,.0f} KB)")
+
+    table = ledger.stats(None if args.by == 'all' else args.by).sort_values('pnl', ascending=False)
+    print(table.head(args.top).round(3).to_string())
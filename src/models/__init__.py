@@ -2,6 +2,13 @@
 AI/ML Models for NSE AlphaBot
 """
 
-from .kronos_predictor import KronosPredictor, get_kronos_predictor, predict_price
-
 __all__ = ['KronosPredictor', 'get_kronos_predictor', 'predict_price']
+
+
+def __getattr__(name):
+    # Resolved lazily so importing a light submodule (e.g. models.drl_agent)
+    # does not pull in torch through kronos_predictor
+    if name in __all__:
+        from . import kronos_predictor
+        return getattr(kronos_predictor, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,218 @@
+"""
+DRL Agent Loader
+Loads the trained SAC agent on first use so importing the bot stays cheap, and
+scores many observations (screened tickers, or dates x tickers) per forward pass
+"""
+
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Tried in order - newest/largest training universe first
+DRL_MODEL_PATHS = [
+    ("models/sac_nse_nifty100.zip", "Nifty 100 DRL agent (100 stocks, 200k timesteps)"),
+    ("models/sac_nse_nifty50.zip", "Nifty 50 DRL agent (50 stocks, 150k timesteps)"),
+    ("models/sac_nse_retrained.zip", "retrained DRL agent"),
+    ("models/sac_nse_10y_final.zip", "original DRL agent"),
+]
+
+# Rows per actor forward pass when scoring large (dates x tickers) tensors
+DRL_BATCH_SIZE = int(os.getenv('DRL_BATCH_SIZE', '4096'))
+
+# 'auto' = use <model>_actor.npz when present, 'off' = always load the SB3 zip
+DRL_EXPORTED_POLICY = os.getenv('DRL_EXPORTED_POLICY', 'auto')
+
+_drl_agent = None
+_drl_loaded = False
+
+
+def load_drl_agent(paths=None):
+    """
+    Load the first available SAC agent
+
+    An exported actor (<model>_actor.npz, see drl_policy.py) is preferred over
+    the SB3 zip when it is at least as new: it loads in milliseconds and does
+    not import stable_baselines3/torch. Set DRL_EXPORTED_POLICY=off to always
+    load the full SB3 agent.
+
+    Args:
+        paths: List of (path, description) tuples to try (default: DRL_MODEL_PATHS)
+
+    Returns:
+        SAC agent (or NumpyPolicy) or None if no model file could be loaded
+    """
+    from models.drl_policy import NumpyPolicy, exported_policy_path
+
+    paths = paths or DRL_MODEL_PATHS
+
+    for path, description in paths:
+        policy_path = exported_policy_path(path)
+        if DRL_EXPORTED_POLICY == 'off' or not os.path.exists(policy_path):
+            continue
+        if os.path.exists(path) and os.path.getmtime(policy_path) < os.path.getmtime(path):
+            print(f"⚠️  {policy_path} is older than {path}, re-export it (python3 src/models/drl_policy.py)")
+            continue
+        try:
+            agent = NumpyPolicy.load(policy_path)
+            print(f"✅ Loaded {description} (exported actor)")
+            return agent
+        except Exception as e:
+            print(f"⚠️  Could not load {policy_path}: {str(e)[:60]}")
+
+    candidates = [(path, description) for path, description in paths if os.path.exists(path)]
+    if not candidates:
+        print("⚠️  DRL agent not found, will use reduced AI scoring")
+        return None
+
+    # stable_baselines3 pulls in torch + gymnasium, so only import it when a model exists
+    from stable_baselines3 import SAC
+
+    for path, description in candidates:
+        try:
+            agent = SAC.load(path)
+            print(f"✅ Loaded {description}")
+            return agent
+        except Exception as e:
+            print(f"⚠️  Could not load {path}: {str(e)[:60]}")
+
+    print("⚠️  DRL agent not found, will use reduced AI scoring")
+    return None
+
+
+def get_drl_agent():
+    """
+    Get global DRL agent instance (loaded on first call)
+
+    Returns:
+        SAC agent or None
+    """
+    global _drl_agent, _drl_loaded
+
+    if not _drl_loaded:
+        _drl_agent = load_drl_agent()
+        _drl_loaded = True
+
+    return _drl_agent
+
+
+def build_observations(price, rsi, macd, capital_ratio=1.0, shares_held=0.0) -> np.ndarray:
+    """
+    DRL observations from indicator values (same normalization as the bot)
+
+    Inputs broadcast against each other: scalars give one (5,) observation,
+    (N,) arrays give (N, 5), (dates, tickers) arrays give (dates, tickers, 5).
+
+    Args:
+        price: Close price(s)
+        rsi: RSI value(s), 0-100
+        macd: MACD value(s)
+        capital_ratio: Free capital / initial capital
+        shares_held: Position indicator (0 = flat)
+
+    Returns:
+        float32 array with a trailing dimension of 5
+    """
+    price, rsi, macd, capital_ratio, shares_held = np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.float64) for v in (price, rsi, macd, capital_ratio, shares_held))
+    )
+    obs = np.stack([
+        np.clip(price / 10000.0, 0, 10),
+        np.clip(rsi / 100.0, 0, 1),
+        np.clip(macd / 100.0, -1, 1),
+        capital_ratio,
+        shares_held,
+    ], axis=-1).astype(np.float32)
+    return np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=0.0)
+
+
+def predict_actions(agent, observations: np.ndarray, batch_size: int = None) -> np.ndarray:
+    """
+    Deterministic actions for any number of observations
+
+    Runs the SAC actor directly on (N, 5) tensors (chunks of batch_size rows)
+    instead of one agent.predict call per ticker. Agents without an SB3
+    policy (e.g. an exported NumpyPolicy) get a single batched predict call.
+
+    Args:
+        agent: Loaded SAC agent
+        observations: Array of shape (..., 5)
+        batch_size: Rows per forward pass (default: DRL_BATCH_SIZE)
+
+    Returns:
+        Actions in [-1, 1] with the observations' leading shape
+    """
+    obs = np.asarray(observations, dtype=np.float32)
+    shape = obs.shape[:-1]
+    flat = obs.reshape(-1, obs.shape[-1])
+    if len(flat) == 0:
+        return np.zeros(shape, dtype=np.float32)
+
+    policy = getattr(agent, 'policy', None)
+    if policy is None or not hasattr(policy, 'actor'):
+        actions, _ = agent.predict(flat, deterministic=True)
+        return np.asarray(actions, dtype=np.float32).reshape(len(flat), -1)[:, 0].reshape(shape)
+
+    import torch
+
+    batch_size = batch_size or DRL_BATCH_SIZE
+    actions = np.empty(len(flat), dtype=np.float32)
+    policy.set_training_mode(False)
+
+    with torch.no_grad():
+        for start in range(0, len(flat), batch_size):
+            chunk = torch.as_tensor(flat[start:start + batch_size], device=policy.device)
+            scaled = policy.actor(chunk, deterministic=True).cpu().numpy()
+            # Same post-processing as SAC.predict (tanh-squashed -> action space bounds)
+            actions[start:start + len(scaled)] = policy.unscale_action(scaled)[:, 0]
+
+    return actions.reshape(shape)
+
+
+def action_to_score(actions):
+    """DRL action(s) in [-1, 1] -> 0-1 score used in the confidence formula"""
+    return np.clip(0.5 + np.asarray(actions) * 0.5, 0, 1)
+
+
+def predict_latest_actions(agent, frames: Dict[str, pd.DataFrame]) -> Dict[str, float]:
+    """
+    One forward pass over the latest bar of every ticker
+
+    Args:
+        agent: Loaded SAC agent
+        frames: Dict of ticker -> DataFrame with Close, rsi and macd columns
+
+    Returns:
+        Dict of ticker -> action
+    """
+    tickers = [ticker for ticker, df in frames.items() if len(df)]
+    if agent is None or not tickers:
+        return {}
+
+    last = [frames[ticker].iloc[-1] for ticker in tickers]
+    obs = build_observations(
+        [row['Close'] for row in last],
+        [row['rsi'] for row in last],
+        [row['macd'] for row in last],
+    )
+    return dict(zip(tickers, predict_actions(agent, obs).tolist()))
+
+
+def drl_score_panel(agent, close: pd.DataFrame, rsi: pd.DataFrame, macd: pd.DataFrame,
+                    capital_ratio: float = 1.0, shares_held: float = 0.0) -> pd.DataFrame:
+    """
+    DRL score for every (date, ticker) cell of a backtest in one call
+
+    Args:
+        agent: Loaded SAC agent
+        close, rsi, macd: (dates x tickers) panels with identical index/columns
+        capital_ratio, shares_held: Portfolio features (scalars or matching panels)
+
+    Returns:
+        (dates x tickers) DataFrame of scores, NaN where close is missing
+    """
+    obs = build_observations(close.values, rsi.values, macd.values, capital_ratio, shares_held)
+    scores = action_to_score(predict_actions(agent, obs))
+    scores = np.where(np.isnan(close.values), np.nan, scores)
+    return pd.DataFrame(scores, index=close.index, columns=close.columns)
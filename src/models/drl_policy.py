@@ -0,0 +1,221 @@
+"""
+Exported DRL Policy
+Extracts the deterministic SAC actor (MLP + tanh squash) into a small .npz file
+and evaluates it with NumPy, so inference needs neither stable_baselines3,
+gymnasium nor torch, and no critics/optimizer state are read from disk
+
+Usage:
+    python3 src/models/drl_policy.py --model models/sac_nse_nifty100.zip
+"""
+
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+POLICY_FORMAT_VERSION = 1
+
+_ACTIVATIONS = {
+    'ReLU': lambda x: np.maximum(x, 0),
+    'Tanh': np.tanh,
+    'ELU': lambda x: np.where(x > 0, x, np.expm1(np.minimum(x, 0))),
+    'LeakyReLU': lambda x: np.where(x > 0, x, 0.01 * x),
+}
+
+
+def exported_policy_path(model_path: str) -> str:
+    """models/sac_nse_nifty100.zip -> models/sac_nse_nifty100_actor.npz"""
+    root, _ = os.path.splitext(model_path)
+    return f"{root}_actor.npz"
+
+
+class NumpyPolicy:
+    """
+    Deterministic SAC actor evaluated with NumPy
+
+    predict() follows the SB3 signature and output shapes, so it is a drop-in
+    replacement for DRL_AGENT wherever only deterministic actions are needed.
+    """
+
+    def __init__(self, weights, biases, activation: str, mu_weight: np.ndarray, mu_bias: np.ndarray,
+                 action_low: np.ndarray, action_high: np.ndarray, clip_mean: float = 0.0):
+        if activation not in _ACTIVATIONS:
+            raise ValueError(f"Unsupported activation: {activation}")
+
+        self.weights = [np.asarray(w, dtype=np.float32) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float32) for b in biases]
+        self.activation = activation
+        self.mu_weight = np.asarray(mu_weight, dtype=np.float32)
+        self.mu_bias = np.asarray(mu_bias, dtype=np.float32)
+        self.action_low = np.asarray(action_low, dtype=np.float32)
+        self.action_high = np.asarray(action_high, dtype=np.float32)
+        self.clip_mean = float(clip_mean)
+        self.obs_dim = self.weights[0].shape[1] if self.weights else self.mu_weight.shape[1]
+
+    def forward(self, observations: np.ndarray) -> np.ndarray:
+        """(N, obs_dim) observations -> (N, action_dim) actions in action-space units"""
+        x = np.asarray(observations, dtype=np.float32)
+        act = _ACTIVATIONS[self.activation]
+
+        for weight, bias in zip(self.weights, self.biases):
+            x = act(x @ weight.T + bias)
+
+        mean = x @ self.mu_weight.T + self.mu_bias
+        if self.clip_mean > 0:
+            mean = np.clip(mean, -self.clip_mean, self.clip_mean)
+
+        # Tanh squash, then rescale [-1, 1] to the action space (identity for [-1, 1])
+        squashed = np.tanh(mean)
+        return self.action_low + 0.5 * (squashed + 1.0) * (self.action_high - self.action_low)
+
+    def predict(self, observation, state=None, episode_start=None, deterministic: bool = True):
+        """SB3-compatible predict: (5,) -> (action_dim,), (N, 5) -> (N, action_dim)"""
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.ndim == 1
+        actions = self.forward(obs.reshape(-1, self.obs_dim))
+        return (actions[0] if single else actions), state
+
+    def save(self, path: str, source: Optional[str] = None):
+        """Write the actor to a .npz file"""
+        arrays = {
+            'format_version': np.array(POLICY_FORMAT_VERSION),
+            'n_layers': np.array(len(self.weights)),
+            'activation': np.array(self.activation),
+            'mu_weight': self.mu_weight,
+            'mu_bias': self.mu_bias,
+            'action_low': self.action_low,
+            'action_high': self.action_high,
+            'clip_mean': np.array(self.clip_mean),
+            'source': np.array(source or ''),
+        }
+        for i, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            arrays[f'weight_{i}'] = weight
+            arrays[f'bias_{i}'] = bias
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'NumpyPolicy':
+        """Load an exported actor"""
+        with np.load(path) as data:
+            if int(data['format_version']) != POLICY_FORMAT_VERSION:
+                raise ValueError(f"Unsupported policy format in {path}")
+
+            n_layers = int(data['n_layers'])
+            return cls(
+                weights=[data[f'weight_{i}'] for i in range(n_layers)],
+                biases=[data[f'bias_{i}'] for i in range(n_layers)],
+                activation=str(data['activation']),
+                mu_weight=data['mu_weight'],
+                mu_bias=data['mu_bias'],
+                action_low=data['action_low'],
+                action_high=data['action_high'],
+                clip_mean=float(data['clip_mean']),
+            )
+
+    @classmethod
+    def from_sac(cls, agent) -> 'NumpyPolicy':
+        """Extract the actor of a loaded SB3 SAC agent"""
+        import torch.nn as nn
+
+        actor = agent.policy.actor
+        if type(actor.features_extractor).__name__ != 'FlattenExtractor':
+            raise ValueError("Only MlpPolicy (flattened Box observations) can be exported")
+
+        weights, biases, activation = [], [], None
+        for module in actor.latent_pi:
+            if isinstance(module, nn.Linear):
+                weights.append(module.weight.detach().cpu().numpy())
+                biases.append(module.bias.detach().cpu().numpy())
+            else:
+                activation = type(module).__name__
+
+        # gSDE actors wrap mu as Linear + Hardtanh(-clip_mean, clip_mean)
+        clip_mean = 0.0
+        mu = actor.mu
+        if isinstance(mu, nn.Sequential):
+            for module in mu:
+                if isinstance(module, nn.Hardtanh):
+                    clip_mean = float(module.max_val)
+            mu = next(module for module in mu if isinstance(module, nn.Linear))
+
+        return cls(
+            weights=weights,
+            biases=biases,
+            activation=activation or 'ReLU',
+            mu_weight=mu.weight.detach().cpu().numpy(),
+            mu_bias=mu.bias.detach().cpu().numpy(),
+            action_low=agent.action_space.low,
+            action_high=agent.action_space.high,
+            clip_mean=clip_mean,
+        )
+
+
+def export_policy(model_path: str, output_path: Optional[str] = None) -> str:
+    """
+    Export the actor of a saved SAC agent next to it
+
+    Args:
+        model_path: SB3 .zip file
+        output_path: Destination (default: <model>_actor.npz)
+
+    Returns:
+        Path of the exported policy
+    """
+    from stable_baselines3 import SAC
+
+    output_path = output_path or exported_policy_path(model_path)
+    agent = SAC.load(model_path, device='cpu')
+    NumpyPolicy.from_sac(agent).save(output_path, source=os.path.basename(model_path))
+    return output_path
+
+
+def check_parity(agent, policy: NumpyPolicy, n_obs: int = 1000, seed: int = 0) -> float:
+    """
+    Max absolute action difference between agent.predict and the exported policy
+
+    Observations cover the ranges the bot produces (price 0-10, rsi 0-1,
+    macd -1..1, capital 0-2, shares 0-1).
+    """
+    rng = np.random.default_rng(seed)
+    obs = np.column_stack([
+        rng.uniform(0, 10, n_obs),
+        rng.uniform(0, 1, n_obs),
+        rng.uniform(-1, 1, n_obs),
+        rng.uniform(0, 2, n_obs),
+        rng.uniform(0, 1, n_obs),
+    ]).astype(np.float32)
+
+    expected, _ = agent.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs)
+    return float(np.max(np.abs(np.asarray(expected) - actual)))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export the SAC actor to a NumPy policy file")
+    parser.add_argument("--model", default="models/sac_nse_nifty100.zip")
+    parser.add_argument("--output", default=None, help="Default: <model>_actor.npz")
+    parser.add_argument("--no-check", action="store_true", help="Skip the parity check against SAC.predict")
+    args = parser.parse_args()
+
+    output = export_policy(args.model, args.output)
+    print(f"✅ Exported actor: {output} ({os.path.getsize(output) / 1024:.1f} KB)")
+
+    started = time.perf_counter()
+    policy = NumpyPolicy.load(output)
+    print(f"⚡ Loaded in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    if not args.no_check:
+        from stable_baselines3 import SAC
+
+        max_diff = check_parity(SAC.load(args.model, device='cpu'), policy)
+        print(f"🔧 Parity vs SAC.predict: max |Δaction| = {max_diff:.2e}")
+        if max_diff > 1e-5:
+            print("❌ Exported policy does not match the SB3 agent")
+            raise SystemExit(1)
@@ -0,0 +1,211 @@
+"""
+Kronos Prediction Cache
+Disk-backed store of Kronos forecasts keyed by the input fingerprint, so reruns on
+the same bars (bot after signal generator, restarts, threshold tweaks) are instant
+"""
+
+import os
+import time
+import pickle
+import sqlite3
+import hashlib
+import argparse
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# Cache location and size bound (least recently used entries are evicted first)
+KRONOS_PREDICTION_CACHE = os.getenv('KRONOS_PREDICTION_CACHE', 'cache/kronos_predictions.db')
+KRONOS_PREDICTION_CACHE_MB = float(os.getenv('KRONOS_PREDICTION_CACHE_MB', '256'))
+KRONOS_PREDICTION_CACHE_ENABLED = os.getenv('KRONOS_PREDICTION_CACHE_ENABLED', '1').lower() in ('1', 'true', 'yes')
+
+# Columns the forecast depends on (Kronos normalizes over the whole context)
+INPUT_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    key TEXT PRIMARY KEY,
+    ticker TEXT,
+    last_bar TEXT,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL,
+    value BLOB NOT NULL
+)
+"""
+
+
+def make_cache_key(df: pd.DataFrame, horizon: int, sampling: Dict, model_hash: str,
+                   ticker: Optional[str] = None) -> str:
+    """
+    Cache key for one forecast
+
+    Combines ticker, last bar timestamp, context length, horizon, sampling params
+    and model hash with a digest of the context bars, so revised history (e.g. a
+    split adjustment) never hits a stale entry.
+
+    Args:
+        df: Context DataFrame with OHLCV columns and a DatetimeIndex
+        horizon: Forecast horizon in bars
+        sampling: Sampling parameters (T, top_k, top_p, sample_count, ...)
+        model_hash: Fingerprint of the Kronos weights
+        ticker: Optional ticker symbol
+
+    Returns:
+        Hex digest string
+    """
+    bars = np.ascontiguousarray(df[INPUT_COLUMNS].values, dtype=np.float64)
+    stamps = np.ascontiguousarray(pd.DatetimeIndex(df.index).asi8)
+
+    digest = hashlib.sha1()
+    digest.update(repr((
+        ticker,
+        str(df.index[-1]) if len(df) else None,
+        len(df),
+        int(horizon),
+        sorted(sampling.items()),
+        model_hash,
+    )).encode())
+    digest.update(bars.tobytes())
+    digest.update(stamps.tobytes())
+    return digest.hexdigest()
+
+
+class PredictionCache:
+    """
+    SQLite-backed forecast cache shared by every process on the machine
+
+    Values are pickled (the raw forecast DataFrame). The total
+    stored size is bounded by max_mb; the least recently used entries go first.
+    """
+
+    def __init__(self, path: str = None, max_mb: float = None):
+        """
+        Args:
+            path: SQLite file (default: KRONOS_PREDICTION_CACHE)
+            max_mb: Size bound in megabytes (default: KRONOS_PREDICTION_CACHE_MB)
+        """
+        self.path = path or KRONOS_PREDICTION_CACHE
+        self.max_bytes = int((max_mb if max_mb is not None else KRONOS_PREDICTION_CACHE_MB) * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON predictions(last_used)")
+
+    @contextmanager
+    def _connect(self):
+        # Short-lived connections: safe across forked workers and concurrent scripts
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def get(self, key: str):
+        """Return the cached value or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM predictions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE predictions SET last_used = ? WHERE key = ?", (time.time(), key))
+
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def put(self, key: str, value, ticker: Optional[str] = None, last_bar: Optional[str] = None):
+        """Store a value and evict old entries if the size bound is exceeded"""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO predictions (key, ticker, last_bar, created, last_used, size, value) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, ticker, last_bar, now, now, len(blob), sqlite3.Binary(blob))
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM predictions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used rows until we are back under the bound
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute("SELECT key, size FROM predictions ORDER BY last_used ASC"):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM predictions WHERE key = ?", stale)
+
+    def clear(self):
+        """Remove every cached forecast"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM predictions")
+        with self._connect() as conn:
+            conn.execute("VACUUM")
+
+    def stats(self) -> Dict:
+        """Entry count, stored size and this process's hit/miss counts"""
+        with self._connect() as conn:
+            entries, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM predictions").fetchone()
+        return {
+            'path': self.path,
+            'entries': entries,
+            'size_mb': size / (1024 * 1024),
+            'max_mb': self.max_bytes / (1024 * 1024),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+# Global instance (lazy loaded)
+_cache_instance = None
+
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """
+    Get the shared prediction cache (None when KRONOS_PREDICTION_CACHE_ENABLED=0)
+    """
+    global _cache_instance
+
+    if not KRONOS_PREDICTION_CACHE_ENABLED:
+        return None
+
+    if _cache_instance is None:
+        try:
+            _cache_instance = PredictionCache()
+        except Exception as e:
+            print(f"⚠️  Kronos prediction cache unavailable: {e}")
+            return None
+
+    return _cache_instance
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or clear the Kronos prediction cache")
+    parser.add_argument("--clear", action="store_true", help="Delete all cached forecasts")
+    args = parser.parse_args()
+
+    cache = PredictionCache()
+    if args.clear:
+        cache.clear()
+        print(f"✅ Cleared {cache.path}")
+
+    stats = cache.stats()
+    print(f"📦 {stats['path']}: {stats['entries']} forecasts, "
+          f"{stats['size_mb']:.1f} / {stats['max_mb']:.0f} MB")
@@ -0,0 +1,366 @@
+"""
+Compiled Kronos Backend for CPU Serving
+Exports shape-specialized TorchScript graphs of the Kronos decode step and the
+KronosTokenizer encode/decode passes, cached on disk so tracing is paid once
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import warnings
+from typing import List, Sequence, Tuple
+
+import torch
+import torch.nn as nn
+
+warnings.filterwarnings("ignore")
+
+# Default shape grid: batch sizes x context lengths (one traced variant each)
+DEFAULT_BATCH_SIZES = (1, 8, 32)
+DEFAULT_CONTEXT_LENGTHS = (64, 128, 256, 512)
+
+# Where compiled artifacts live, and whether KronosPredictor may use them
+COMPILED_DIR = os.getenv('KRONOS_COMPILED_DIR', 'models/kronos_compiled')
+KRONOS_BACKEND = os.getenv('KRONOS_BACKEND', 'auto')  # 'auto' or 'eager'
+
+GRAPH_NAMES = ('decode_s1', 'encode', 'decode')
+
+
+def model_fingerprint(model, tokenizer) -> str:
+    """
+    Stable hash of the Kronos model + tokenizer weights
+
+    Used to key compiled artifacts (and anything else derived from the weights)
+    so a weight update never silently reuses a stale graph.
+
+    Returns:
+        16-character hex digest
+    """
+    cached = getattr(model, '_kronos_fingerprint', None)
+    if cached:
+        return cached
+
+    digest = hashlib.sha1()
+    for module in (model, tokenizer):
+        for name, tensor in module.state_dict().items():
+            digest.update(name.encode())
+            digest.update(tensor.detach().cpu().contiguous().numpy().tobytes())
+
+    fingerprint = digest.hexdigest()[:16]
+    model._kronos_fingerprint = fingerprint
+    return fingerprint
+
+
+def _variant_name(graph: str, batch_size: int, context_length: int) -> str:
+    return f"{graph}_b{batch_size}_t{context_length}"
+
+
+class _KronosServingGraph(nn.Module):
+    """
+    Tensor-only entry points of Kronos + KronosTokenizer used by
+    auto_regressive_inference. Every method only depends on positions <= t for
+    output position t (causal attention, per-token norms/embeddings), so inputs
+    can be right-padded up to a traced shape without changing the result.
+    """
+
+    def __init__(self, model, tokenizer):
+        super().__init__()
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def decode_s1(self, s1_ids, s2_ids, stamp):
+        return self.model.decode_s1(s1_ids, s2_ids, stamp)
+
+    def encode(self, x):
+        z_indices = self.tokenizer.encode(x, half=True)
+        return z_indices[0], z_indices[1]
+
+    def decode(self, pre_ids, post_ids):
+        return self.tokenizer.decode([pre_ids, post_ids], half=True)
+
+
+def _example_inputs(graph: str, batch_size: int, context_length: int, d_in: int):
+    tokens = torch.zeros(batch_size, context_length, dtype=torch.long)
+    if graph == 'decode_s1':
+        return (tokens, tokens.clone(), torch.zeros(batch_size, context_length, 5))
+    if graph == 'encode':
+        return (torch.zeros(batch_size, context_length, d_in),)
+    return (tokens, tokens.clone())
+
+
+def _pad_to(x: torch.Tensor, batch_size: int, context_length: int) -> torch.Tensor:
+    """Right-pad the leading (batch, seq_len) dims of x with zeros"""
+    if x.shape[0] == batch_size and x.shape[1] == context_length:
+        return x.contiguous()
+    padded = x.new_zeros((batch_size, context_length) + tuple(x.shape[2:]))
+    padded[:x.shape[0], :x.shape[1]] = x
+    return padded
+
+
+def export_compiled_kronos(
+    model,
+    tokenizer,
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    context_lengths: Sequence[int] = DEFAULT_CONTEXT_LENGTHS,
+    output_dir: str = COMPILED_DIR,
+    max_context: int = 512
+) -> str:
+    """
+    Trace Kronos decode step + tokenizer encode/decode for every shape variant
+
+    All variants are traced as methods of one module so the weights are stored
+    once in a single TorchScript file.
+
+    Args:
+        model: Loaded Kronos model
+        tokenizer: Loaded KronosTokenizer
+        batch_sizes: Batch sizes to specialize for
+        context_lengths: Context lengths (token windows) to specialize for
+        output_dir: Root directory for compiled artifacts
+        max_context: Kronos max context (longer variants are clamped)
+
+    Returns:
+        Path of the saved TorchScript artifact
+    """
+    model = model.to('cpu').eval()
+    tokenizer = tokenizer.to('cpu').eval()
+    fingerprint = model_fingerprint(model, tokenizer)
+
+    batch_sizes = sorted(set(int(b) for b in batch_sizes))
+    context_lengths = sorted(set(min(int(t), max_context) for t in context_lengths))
+
+    # One method per (graph, batch, context) so trace_module can specialize each
+    variant_methods = {}
+    inputs = {}
+    for graph in GRAPH_NAMES:
+        for b in batch_sizes:
+            for t in context_lengths:
+                name = _variant_name(graph, b, t)
+                variant_methods[name] = getattr(_KronosServingGraph, graph)
+                inputs[name] = _example_inputs(graph, b, t, tokenizer.d_in)
+    serving_cls = type('KronosServingGraph', (_KronosServingGraph,), variant_methods)
+    serving = serving_cls(model, tokenizer).eval()
+
+    print(f"⚙️  Tracing {len(variant_methods)} Kronos graph variants...")
+    print(f"   Batch sizes: {batch_sizes}")
+    print(f"   Context lengths: {context_lengths}")
+
+    start = time.perf_counter()
+    with torch.no_grad():
+        traced = torch.jit.trace_module(serving, inputs, check_trace=False)
+
+    target_dir = os.path.join(output_dir, fingerprint)
+    os.makedirs(target_dir, exist_ok=True)
+    artifact_path = os.path.join(target_dir, 'kronos_cpu.pt')
+    torch.jit.save(traced, artifact_path)
+
+    manifest = {
+        'fingerprint': fingerprint,
+        'artifact': 'kronos_cpu.pt',
+        'batch_sizes': batch_sizes,
+        'context_lengths': context_lengths,
+        'graphs': list(GRAPH_NAMES),
+        'torch_version': torch.__version__,
+        'created': time.strftime('%Y-%m-%d %H:%M:%S')
+    }
+    with open(os.path.join(target_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    size_mb = os.path.getsize(artifact_path) / (1024 * 1024)
+    print(f"✅ Compiled Kronos saved: {artifact_path} ({size_mb:.1f} MB, "
+          f"{time.perf_counter() - start:.1f}s)")
+    return artifact_path
+
+
+class _BucketedGraphs:
+    """Dispatches a call to the smallest traced (batch, context) variant that fits"""
+
+    def __init__(self, scripted, graph: str, batch_sizes: List[int], context_lengths: List[int]):
+        self.scripted = scripted
+        self.graph = graph
+        self.batch_sizes = batch_sizes
+        self.context_lengths = context_lengths
+
+    def supports(self, seq_len: int) -> bool:
+        return seq_len <= self.context_lengths[-1]
+
+    def __call__(self, *inputs: torch.Tensor) -> Tuple[torch.Tensor, ...]:
+        batch, seq_len = inputs[0].shape[0], inputs[0].shape[1]
+        context_length = next(t for t in self.context_lengths if t >= seq_len)
+        max_batch = self.batch_sizes[-1]
+
+        chunks = []
+        for start in range(0, batch, max_batch):
+            chunk = [x[start:start + max_batch] for x in inputs]
+            n = chunk[0].shape[0]
+            batch_size = next(b for b in self.batch_sizes if b >= n)
+            padded = [_pad_to(x, batch_size, context_length) for x in chunk]
+
+            method = getattr(self.scripted, _variant_name(self.graph, batch_size, context_length))
+            outputs = method(*padded)
+            if not isinstance(outputs, tuple):
+                outputs = (outputs,)
+            chunks.append(tuple(o[:n, :seq_len] for o in outputs))
+
+        if len(chunks) == 1:
+            return chunks[0]
+        return tuple(torch.cat(parts, dim=0) for parts in zip(*chunks))
+
+
+class CompiledKronos:
+    """
+    Drop-in replacement for Kronos inside auto_regressive_inference
+
+    decode_s1 (the 8-layer transformer pass, i.e. the hot loop) runs through the
+    compiled graph; decode_s2 is a single cross-attention layer and stays eager.
+    Falls back to the eager model for shapes outside the compiled grid.
+    """
+
+    def __init__(self, model, graphs: _BucketedGraphs):
+        self.model = model
+        self.graphs = graphs
+
+    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None):
+        if stamp is None or padding_mask is not None or s1_ids.device.type != 'cpu' \
+                or not self.graphs.supports(s1_ids.shape[1]):
+            return self.model.decode_s1(s1_ids, s2_ids, stamp, padding_mask)
+        s1_logits, context = self.graphs(s1_ids, s2_ids, stamp.float())
+        return s1_logits, context
+
+    def decode_s2(self, context, s1_ids, padding_mask=None):
+        return self.model.decode_s2(context, s1_ids, padding_mask)
+
+    def to(self, device):
+        self.model = self.model.to(device)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class CompiledKronosTokenizer:
+    """Drop-in replacement for KronosTokenizer encode/decode (half=True path)"""
+
+    def __init__(self, tokenizer, encode_graphs: _BucketedGraphs, decode_graphs: _BucketedGraphs):
+        self.tokenizer = tokenizer
+        self.encode_graphs = encode_graphs
+        self.decode_graphs = decode_graphs
+
+    def encode(self, x, half=False):
+        if not half or x.device.type != 'cpu' or not self.encode_graphs.supports(x.shape[1]):
+            return self.tokenizer.encode(x, half)
+        pre_ids, post_ids = self.encode_graphs(x.float())
+        return [pre_ids, post_ids]
+
+    def decode(self, x, half=False):
+        if not half or x[0].device.type != 'cpu' or not self.decode_graphs.supports(x[0].shape[1]):
+            return self.tokenizer.decode(x, half)
+        z, = self.decode_graphs(x[0], x[1])
+        return z
+
+    def to(self, device):
+        self.tokenizer = self.tokenizer.to(device)
+        return self
+
+    def __getattr__(self, name):
+        return getattr(self.tokenizer, name)
+
+
+def load_compiled_backend(model, tokenizer, compiled_dir: str = COMPILED_DIR):
+    """
+    Load compiled Kronos graphs matching these weights, if they were exported
+
+    Args:
+        model: Loaded Kronos model (used for fingerprint + eager fallback)
+        tokenizer: Loaded KronosTokenizer
+        compiled_dir: Root directory of compiled artifacts
+
+    Returns:
+        (CompiledKronos, CompiledKronosTokenizer) or None if no artifact exists
+    """
+    fingerprint = model_fingerprint(model, tokenizer)
+    manifest_path = os.path.join(compiled_dir, fingerprint, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+        if manifest.get('torch_version') != torch.__version__:
+            print(f"⚠️  Compiled Kronos was built with torch {manifest.get('torch_version')}, "
+                  f"running {torch.__version__} - re-export if loading fails")
+
+        scripted = torch.jit.load(os.path.join(compiled_dir, fingerprint, manifest['artifact']),
+                                  map_location='cpu')
+        scripted.eval()
+
+        batch_sizes = manifest['batch_sizes']
+        context_lengths = manifest['context_lengths']
+        graphs = {name: _BucketedGraphs(scripted, name, batch_sizes, context_lengths)
+                  for name in GRAPH_NAMES}
+
+        return (CompiledKronos(model, graphs['decode_s1']),
+                CompiledKronosTokenizer(tokenizer, graphs['encode'], graphs['decode']))
+
+    except Exception as e:
+        print(f"⚠️  Could not load compiled Kronos ({e}), using eager model")
+        return None
+
+
+def verify_compiled_backend(model, tokenizer, backend, batch_size: int = 2, seq_len: int = 100) -> float:
+    """
+    Compare compiled vs eager decode_s1 logits on random tokens
+
+    Returns:
+        Max absolute difference of the s1 logits
+    """
+    compiled_model, _ = backend
+    vocab = 2 ** model.s1_bits
+    s1_ids = torch.randint(0, vocab, (batch_size, seq_len))
+    s2_ids = torch.randint(0, vocab, (batch_size, seq_len))
+    stamp = torch.zeros(batch_size, seq_len, 5)
+    stamp[:, :, 2] = torch.randint(0, 7, (batch_size, seq_len))
+    stamp[:, :, 3] = torch.randint(1, 32, (batch_size, seq_len))
+    stamp[:, :, 4] = torch.randint(1, 13, (batch_size, seq_len))
+
+    with torch.no_grad():
+        eager_logits, _ = model.decode_s1(s1_ids, s2_ids, stamp)
+        compiled_logits, _ = compiled_model.decode_s1(s1_ids, s2_ids, stamp)
+
+    return float((eager_logits - compiled_logits).abs().max())
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Export compiled Kronos graphs for CPU serving")
+    parser.add_argument('--model', default="NeoQuasar/Kronos-small")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument('--context-lengths', type=int, nargs='+', default=list(DEFAULT_CONTEXT_LENGTHS))
+    parser.add_argument('--output-dir', default=COMPILED_DIR)
+    args = parser.parse_args()
+
+    sys.path.append('src')
+    from models.kronos_official_loader import load_official_kronos
+
+    print("="*80)
+    print("⚙️  EXPORTING COMPILED KRONOS (TorchScript, CPU)")
+    print("="*80)
+
+    tokenizer, model, _ = load_official_kronos(model_name=args.model, device='cpu')
+    if model is None:
+        sys.exit(1)
+
+    export_compiled_kronos(model, tokenizer, args.batch_sizes, args.context_lengths, args.output_dir)
+
+    backend = load_compiled_backend(model, tokenizer, args.output_dir)
+    if backend is None:
+        print("❌ Exported artifact could not be loaded")
+        sys.exit(1)
+
+    max_diff = verify_compiled_backend(model, tokenizer, backend)
+    print(f"🔍 Parity check: max |compiled - eager| logits = {max_diff:.2e}")
+    print("="*80)
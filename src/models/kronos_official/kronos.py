@@ -388,16 +388,18 @@ def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_l
     return x
 
 
-def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False):
+def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False, average=True):
     with torch.no_grad():
         x = torch.clip(x, -clip, clip)
 
         device = x.device
-        x = x.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, x.size(1), x.size(2)).to(device)
-        x_stamp = x_stamp.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, x_stamp.size(1), x_stamp.size(2)).to(device)
-        y_stamp = y_stamp.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, y_stamp.size(1), y_stamp.size(2)).to(device)
 
-        x_token = tokenizer.encode(x, half=True)
+        # The context is identical for every sample of a series: encode it once and
+        # repeat the tokens, instead of encoding sample_count copies of the input
+        x_token = tokenizer.encode(x.to(device), half=True)
+        x_token = [t.repeat_interleave(sample_count, dim=0) for t in x_token]
+        x_stamp = x_stamp.repeat_interleave(sample_count, dim=0).to(device)
+        y_stamp = y_stamp.repeat_interleave(sample_count, dim=0).to(device)
         
         initial_seq_len = x.size(1)
         batch_size = x_token[0].size(0)
@@ -435,7 +437,14 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
             context_start = max(0, context_end - max_context)
             current_stamp = full_stamp[:, context_start:context_end, :].contiguous()
 
-            s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp)
+            if i == 0 and sample_count > 1:
+                # First step only sees the shared context, so run it once per series. Later
+                # steps recompute every sample (no KV cache), so this is the only shared step
+                s1_logits, context = model.decode_s1(input_tokens[0][::sample_count], input_tokens[1][::sample_count], current_stamp[::sample_count])
+                s1_logits = s1_logits.repeat_interleave(sample_count, dim=0)
+                context = context.repeat_interleave(sample_count, dim=0)
+            else:
+                s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp)
             s1_logits = s1_logits[:, -1, :]
             sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
 
@@ -466,8 +475,10 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
         z = tokenizer.decode(input_tokens, half=True)
         z = z.reshape(-1, sample_count, z.size(1), z.size(2))
         preds = z.cpu().numpy()
-        preds = np.mean(preds, axis=1)
+        if average:
+            preds = np.mean(preds, axis=1)
 
+        # (B, L, F) averaged, or (B, sample_count, L, F) with average=False
         return preds
 
 
@@ -505,15 +516,15 @@ class KronosPredictor:
         self.tokenizer = self.tokenizer.to(self.device)
         self.model = self.model.to(self.device)
 
-    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose):
+    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, average=True):
 
         x_tensor = torch.from_numpy(np.array(x).astype(np.float32)).to(self.device)
         x_stamp_tensor = torch.from_numpy(np.array(x_stamp).astype(np.float32)).to(self.device)
         y_stamp_tensor = torch.from_numpy(np.array(y_stamp).astype(np.float32)).to(self.device)
 
         preds = auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
-                                          self.clip, T, top_k, top_p, sample_count, verbose)
-        preds = preds[:, -pred_len:, :]
+                                          self.clip, T, top_k, top_p, sample_count, verbose, average)
+        preds = preds[..., -pred_len:, :]
         return preds
 
     def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True):
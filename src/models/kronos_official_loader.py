@@ -3,22 +3,162 @@ Official Kronos Model Loader
 Loads NeoQuasar/Kronos-small with proper configuration
 """
 
+import os
 import torch
 import numpy as np
 import pandas as pd
 from typing import Dict, Optional
 import json
+import hashlib
 import warnings
 warnings.filterwarnings("ignore")
 
+# Pinned local weight cache - downloads land here once, later runs read from disk
+KRONOS_CACHE_DIR = os.getenv('KRONOS_CACHE_DIR', 'models/kronos_cache')
+KRONOS_REVISION = os.getenv('KRONOS_REVISION', 'main')
 
-def load_official_kronos(model_name: str = "NeoQuasar/Kronos-small", device: str = None):
+TOKENIZER_WEIGHTS = "tokenizer.safetensors"
+
+
+def is_offline() -> bool:
+    """Offline mode never touches the HuggingFace hub (KRONOS_OFFLINE=1)"""
+    return os.getenv('KRONOS_OFFLINE', '0').lower() in ('1', 'true', 'yes')
+
+
+def get_local_model_dir(model_name: str, cache_dir: str = None, revision: str = None) -> str:
+    """Directory holding the pinned files for one model revision"""
+    cache_dir = cache_dir or KRONOS_CACHE_DIR
+    revision = revision or KRONOS_REVISION
+    return os.path.join(cache_dir, model_name.replace('/', '--'), revision)
+
+
+def resolve_model_file(model_name: str, filename: str, cache_dir: str = None,
+                       revision: str = None, offline: bool = None) -> str:
+    """
+    Return a local path for a model file, downloading into the pinned cache if needed
+    
+    Args:
+        model_name: HuggingFace repo id
+        filename: File inside the repo (e.g. 'config.json')
+        cache_dir: Root of the local weight cache
+        revision: Repo revision to pin
+        offline: If True, never contact the hub (default: KRONOS_OFFLINE)
+        
+    Returns:
+        Local file path
+    """
+    revision = revision or KRONOS_REVISION
+    offline = is_offline() if offline is None else offline
+    local_dir = get_local_model_dir(model_name, cache_dir, revision)
+    local_path = os.path.join(local_dir, filename)
+    
+    if os.path.exists(local_path):
+        return local_path
+    
+    if offline:
+        raise FileNotFoundError(f"{filename} not in local cache {local_dir} (offline mode)")
+    
+    from huggingface_hub import hf_hub_download
+    
+    os.makedirs(local_dir, exist_ok=True)
+    return hf_hub_download(repo_id=model_name, filename=filename, revision=revision, local_dir=local_dir)
+
+
+SAFETENSORS_DTYPES = {
+    'F64': torch.float64, 'F32': torch.float32, 'F16': torch.float16, 'BF16': torch.bfloat16,
+    'I64': torch.int64, 'I32': torch.int32, 'I16': torch.int16, 'I8': torch.int8,
+    'U8': torch.uint8, 'BOOL': torch.bool,
+}
+
+
+def load_safetensors_mmap(path: str) -> Dict[str, torch.Tensor]:
+    """
+    Tensors of a safetensors file as views into one private memory map
+    
+    The file is mapped with torch.UntypedStorage.from_file and each tensor is
+    a slice of it, so nothing is read until a page is first touched
+    (copy-on-write: writes never reach the file). safe_open().get_tensor
+    would copy every tensor into fresh memory up front.
+    
+    Args:
+        path: .safetensors file
+        
+    Returns:
+        Dict of name -> CPU tensor backed by the mapping
+    """
+    with open(path, 'rb') as f:
+        header_len = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_len))
+    header.pop('__metadata__', None)
+    
+    nbytes = os.path.getsize(path)
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=nbytes)
+    data = torch.empty(0, dtype=torch.uint8).set_(storage)[8 + header_len:]
+    
+    state_dict = {}
+    for key, info in header.items():
+        begin, end = info['data_offsets']
+        raw = data[begin:end]
+        dtype = SAFETENSORS_DTYPES[info['dtype']]
+        if raw.storage_offset() % torch.empty(0, dtype=dtype).element_size():
+            raw = raw.clone()  # misaligned for a zero-copy view (never written by safetensors itself)
+        state_dict[key] = raw.view(dtype).reshape(info['shape'])
+    return state_dict
+
+
+def load_state_dict_mmap(module, state_dict: Dict[str, torch.Tensor]):
+    """Load weights, keeping the mmapped tensors as parameters when torch supports it"""
+    try:
+        return module.load_state_dict(state_dict, strict=False, assign=True)
+    except TypeError:
+        # torch < 2.1 has no assign=, fall back to copying into the parameters
+        return module.load_state_dict(state_dict, strict=False)
+
+
+def _weights_fingerprint(local_dir: str) -> str:
+    """
+    Hash of the pinned weight files, stored next to them
+    
+    The stored hash is keyed on each file's size and mtime and recomputed when
+    either changes (e.g. model.safetensors downloaded after a failed first run).
+    """
+    fingerprint_path = os.path.join(local_dir, "fingerprint.json")
+    files = {}
+    for filename in ("model.safetensors", TOKENIZER_WEIGHTS):
+        path = os.path.join(local_dir, filename)
+        if os.path.exists(path):
+            stat = os.stat(path)
+            files[filename] = [stat.st_size, stat.st_mtime_ns]
+    
+    if os.path.exists(fingerprint_path):
+        with open(fingerprint_path, 'r') as f:
+            stored = json.load(f)
+        if stored.get('files') == files:
+            return stored['fingerprint']
+    
+    digest = hashlib.sha1()
+    for filename in files:
+        with open(os.path.join(local_dir, filename), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    
+    fingerprint = digest.hexdigest()[:16]
+    with open(fingerprint_path, 'w') as f:
+        json.dump({'files': files, 'fingerprint': fingerprint}, f, indent=2)
+    return fingerprint
+
+
+def load_official_kronos(model_name: str = "NeoQuasar/Kronos-small", device: str = None,
+                         cache_dir: str = None, revision: str = None, offline: bool = None):
     """
     Load official Kronos model with proper configuration
     
     Args:
         model_name: Model to load from HuggingFace
         device: Device to use ('cuda', 'mps', 'cpu', or None for auto)
+        cache_dir: Pinned local weight cache (default: KRONOS_CACHE_DIR)
+        revision: Model revision to pin (default: KRONOS_REVISION)
+        offline: Never touch the hub, load only from cache_dir (default: KRONOS_OFFLINE)
         
     Returns:
         Tuple of (tokenizer, model, predictor) or (None, None, None) if loading fails
@@ -27,7 +167,9 @@ def load_official_kronos(model_name: str = "NeoQuasar/Kronos-small", device: str
         import sys
         sys.path.append('src')
         from models.kronos_official.kronos import KronosTokenizer, Kronos, KronosPredictor
-        from huggingface_hub import hf_hub_download
+        
+        offline = is_offline() if offline is None else offline
+        local_dir = get_local_model_dir(model_name, cache_dir, revision)
         
         # Auto-detect device
         if device is None:
@@ -40,9 +182,10 @@ def load_official_kronos(model_name: str = "NeoQuasar/Kronos-small", device: str
         
         print(f"📥 Loading official Kronos from {model_name}...")
         print(f"   Device: {device}")
+        print(f"   Weight cache: {local_dir}{' (offline)' if offline else ''}")
         
-        # Download config
-        config_path = hf_hub_download(repo_id=model_name, filename="config.json")
+        # Config (from the pinned cache, downloaded on first run)
+        config_path = resolve_model_file(model_name, "config.json", cache_dir, revision, offline)
         with open(config_path, 'r') as f:
             config = json.load(f)
         
@@ -113,22 +256,42 @@ def load_official_kronos(model_name: str = "NeoQuasar/Kronos-small", device: str
         )
         
         # Try to load pretrained weights
+        pretrained = False
         try:
             print(f"📥 Loading pretrained weights...")
-            model_path = hf_hub_download(repo_id=model_name, filename="model.safetensors")
+            model_path = resolve_model_file(model_name, "model.safetensors", cache_dir, revision, offline)
             
-            # Load weights using safetensors
-            from safetensors.torch import load_file
-            state_dict = load_file(model_path)
+            # Memory-mapped safetensors: pages are read lazily on first use
+            state_dict = load_safetensors_mmap(model_path)
             
             # Load into model
-            model.load_state_dict(state_dict, strict=False)
+            load_state_dict_mmap(model, state_dict)
+            pretrained = True
             print(f"✅ Pretrained weights loaded")
             
         except Exception as e:
             print(f"⚠️  Could not load pretrained weights: {e}")
             print(f"   Using randomly initialized model")
         
+        # The model repo ships no tokenizer weights, so the tokenizer is initialized
+        # here. Pin the first initialization to the cache so every process (and the
+        # compiled/prediction caches keyed on the weights) sees identical weights.
+        tokenizer_path = os.path.join(local_dir, TOKENIZER_WEIGHTS)
+        try:
+            if os.path.exists(tokenizer_path):
+                load_state_dict_mmap(tokenizer, load_safetensors_mmap(tokenizer_path))
+            else:
+                from safetensors.torch import save_file
+                os.makedirs(local_dir, exist_ok=True)
+                save_file({k: v.contiguous() for k, v in tokenizer.state_dict().items()}, tokenizer_path)
+            
+            # A randomly initialized model keeps no stored fingerprint: model_fingerprint
+            # then hashes its actual weights, so caches never mix it with the real model
+            if pretrained:
+                model._kronos_fingerprint = _weights_fingerprint(local_dir)
+        except Exception as e:
+            print(f"⚠️  Could not pin tokenizer weights: {e}")
+        
         # Move to device
         tokenizer = tokenizer.to(device)
         model = model.to(device)
@@ -3,6 +3,7 @@ Kronos Price Prediction Module
 Uses official NeoQuasar/Kronos-small model (24.7M params) for financial time-series prediction
 """
 
+import os
 import torch
 import numpy as np
 import pandas as pd
@@ -10,6 +11,18 @@ from typing import Dict, List, Optional, Tuple
 import warnings
 warnings.filterwarnings("ignore")
 
+# Sampling parameters for every forecast (also part of the prediction cache key)
+KRONOS_SAMPLING = {'T': 1.0, 'top_k': 0, 'top_p': 0.9, 'sample_count': 1}
+
+# Monte Carlo forecast distribution (predict_distribution). The bot and signal
+# generator only use it when KRONOS_MC_SAMPLES > 1 (opt-in: it costs n_samples
+# decodes per signal and confidence becomes the share of paths agreeing on direction)
+KRONOS_MC_SAMPLES = int(os.getenv('KRONOS_MC_SAMPLES', '1'))
+DEFAULT_MC_SAMPLES = 32
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+OHLCVA_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'amount']
+
 class KronosPredictor:
     """
     Wrapper for official Kronos foundation model for NSE stock price prediction
@@ -78,12 +91,36 @@ class KronosPredictor:
             print(f"   Context: 512 tokens")
             print(f"   Using official NeoQuasar/Kronos-small")
             
+            self._load_compiled_backend()
+            
         except Exception as e:
             print(f"❌ CRITICAL ERROR: Failed to load official Kronos model")
             print(f"   Error: {e}")
             print(f"   The bot cannot run without Kronos model.")
             raise Exception(f"Kronos model loading failed: {e}")
     
+    def _load_compiled_backend(self):
+        """Swap in the compiled TorchScript graphs when they were exported for these weights"""
+        self.backend = 'eager'
+        
+        if self.device.type != 'cpu':
+            return
+        
+        from models.kronos_compiled import KRONOS_BACKEND, load_compiled_backend
+        
+        if KRONOS_BACKEND == 'eager':
+            return
+        
+        backend = load_compiled_backend(self.model, self.tokenizer)
+        if backend is None:
+            return
+        
+        # The official predictor only calls decode_s1/decode_s2/encode/decode,
+        # which the compiled wrappers provide (with eager fallback per shape)
+        self.predictor_obj.model, self.predictor_obj.tokenizer = backend
+        self.backend = 'torchscript'
+        print(f"⚡ Using compiled Kronos backend (TorchScript, CPU)")
+    
     def prepare_input(self, df: pd.DataFrame, sequence_length: int = 60) -> Dict:
         """
         Prepare input data for Kronos
@@ -122,7 +159,8 @@ class KronosPredictor:
         self, 
         df: pd.DataFrame, 
         horizon: int = 7,
-        return_full_candles: bool = False
+        return_full_candles: bool = False,
+        ticker: Optional[str] = None
     ) -> Dict:
         """
         Predict future prices using official Kronos model
@@ -131,6 +169,7 @@ class KronosPredictor:
             df: DataFrame with historical OHLCV data
             horizon: Number of days to predict ahead
             return_full_candles: If True, return full OHLCVA predictions
+            ticker: Optional ticker symbol (part of the prediction cache key)
             
         Returns:
             Dict with predictions:
@@ -144,61 +183,313 @@ class KronosPredictor:
             raise Exception("Kronos model not loaded. Cannot make predictions.")
         
         try:
-            # Prepare input data for official Kronos predictor
-            input_df = df[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
-            input_df.columns = ['open', 'high', 'low', 'close', 'volume']
+            # Identical inputs (same bars, horizon, sampling, weights) are served from disk
+            cache_key = self._cache_key(df, horizon, ticker)
+            pred_df = self._cache_get(cache_key)
             
-            # Use the official Kronos predictor
-            with torch.no_grad():
-                # Get timestamps
-                x_timestamp = df.index
-                last_date = x_timestamp[-1]
-                y_timestamp = pd.date_range(start=last_date + pd.Timedelta(days=1), periods=horizon, freq='D')
-                
-                # Make prediction using official predictor
-                pred_df = self.predictor_obj.predict(
-                    df=input_df,
-                    x_timestamp=x_timestamp,
-                    y_timestamp=y_timestamp,
-                    pred_len=horizon,
-                    T=1.0,
-                    top_k=0,
-                    top_p=0.9,
-                    sample_count=1,
-                    verbose=False
-                )
-                
-                # Extract predictions
-                predicted_closes = pred_df['close'].values
-                current_close = df['Close'].iloc[-1]
-                predicted_change = (predicted_closes[-1] - current_close) / current_close
-                
-                # Calculate confidence based on prediction consistency
-                if len(predicted_closes) > 1:
-                    pred_returns = np.diff(predicted_closes) / predicted_closes[:-1]
-                    pred_volatility = np.std(pred_returns)
-                    confidence = 1.0 / (1.0 + pred_volatility * 10)
-                    confidence = np.clip(confidence, 0.7, 0.95)
-                else:
-                    confidence = 0.85
-                
-                result = {
-                    'predicted_close': predicted_closes,
-                    'predicted_change': predicted_change,
-                    'confidence': float(confidence),
-                    'horizon': horizon,
-                    'official_kronos': True
-                }
+            if pred_df is None:
+                # Prepare input data for official Kronos predictor
+                input_df = self._prepare_frame(df)
                 
-                if return_full_candles:
-                    result['full_candles'] = pred_df
+                # Use the official Kronos predictor
+                with torch.no_grad():
+                    # Make prediction using official predictor
+                    pred_df = self.predictor_obj.predict(
+                        df=input_df,
+                        x_timestamp=df.index,
+                        y_timestamp=self._future_timestamps(df, horizon),
+                        pred_len=horizon,
+                        verbose=False,
+                        **KRONOS_SAMPLING
+                    )
                 
-                return result
+                self._cache_put(cache_key, pred_df, df, ticker)
+            
+            return self._summarize(df, pred_df, horizon, return_full_candles)
             
         except Exception as e:
             print(f"❌ Kronos prediction failed: {e}")
             raise Exception(f"Kronos prediction error: {e}")
     
+    def predict_batch(
+        self,
+        dfs: List[pd.DataFrame],
+        horizon: int = 7,
+        return_full_candles: bool = False,
+        tickers: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Predict many series at once (one batched decode per context length)
+        
+        Args:
+            dfs: List of DataFrames with historical OHLCV data
+            horizon: Number of days to predict ahead
+            return_full_candles: If True, return full OHLCVA predictions
+            tickers: Optional ticker symbols, aligned with dfs
+            
+        Returns:
+            List of prediction dicts (same format as predict), in input order
+        """
+        
+        if self.model is None or self.tokenizer is None:
+            raise Exception("Kronos model not loaded. Cannot make predictions.")
+        
+        tickers = tickers or [None] * len(dfs)
+        pred_dfs = [None] * len(dfs)
+        cache_keys = [self._cache_key(df, horizon, ticker) for df, ticker in zip(dfs, tickers)]
+        
+        # Cache misses grouped by context length (the official batch path needs equal lengths)
+        pending = {}
+        for i, key in enumerate(cache_keys):
+            pred_dfs[i] = self._cache_get(key)
+            if pred_dfs[i] is None:
+                pending.setdefault(len(dfs[i]), []).append(i)
+        
+        try:
+            for indices in pending.values():
+                with torch.no_grad():
+                    batch_preds = self.predictor_obj.predict_batch(
+                        df_list=[self._prepare_frame(dfs[i]) for i in indices],
+                        x_timestamp_list=[dfs[i].index for i in indices],
+                        y_timestamp_list=[self._future_timestamps(dfs[i], horizon) for i in indices],
+                        pred_len=horizon,
+                        verbose=False,
+                        **KRONOS_SAMPLING
+                    )
+                
+                for i, pred_df in zip(indices, batch_preds):
+                    pred_dfs[i] = pred_df
+                    self._cache_put(cache_keys[i], pred_df, dfs[i], tickers[i])
+            
+        except Exception as e:
+            print(f"❌ Kronos batch prediction failed: {e}")
+            raise Exception(f"Kronos prediction error: {e}")
+        
+        return [self._summarize(df, pred_df, horizon, return_full_candles)
+                for df, pred_df in zip(dfs, pred_dfs)]
+    
+    def predict_distribution(
+        self,
+        df: pd.DataFrame,
+        horizon: int = 7,
+        n_samples: int = DEFAULT_MC_SAMPLES,
+        quantiles: Tuple[float, ...] = DEFAULT_QUANTILES,
+        ticker: Optional[str] = None
+    ) -> Dict:
+        """
+        Monte Carlo forecast: n_samples sampled paths from one batched decode
+        
+        The context is encoded once per series and the first decode step is
+        shared by all samples; every later step still runs once per sample
+        (the decoder keeps no KV cache), so cost grows roughly with n_samples.
+        Confidence here is the share of paths agreeing with the expected
+        direction, not predict's volatility-based value.
+        
+        Args:
+            df: DataFrame with historical OHLCV data
+            horizon: Number of days to predict ahead
+            n_samples: Number of sampled paths
+            quantiles: Quantiles of the horizon return to report
+            ticker: Optional ticker symbol (part of the prediction cache key)
+            
+        Returns:
+            Dict with the same keys as predict plus:
+            - 'expected_change': Mean % change over the samples
+            - 'prob_positive': Fraction of paths ending above the current close
+            - 'change_quantiles': {q: % change} at the horizon
+            - 'close_quantiles': {q: close path} per step
+            - 'sample_closes': (n_samples, horizon) sampled close paths
+        """
+        return self.predict_distribution_batch([df], horizon, n_samples, quantiles, [ticker])[0]
+    
+    def predict_distribution_batch(
+        self,
+        dfs: List[pd.DataFrame],
+        horizon: int = 7,
+        n_samples: int = DEFAULT_MC_SAMPLES,
+        quantiles: Tuple[float, ...] = DEFAULT_QUANTILES,
+        tickers: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Monte Carlo forecasts for many series (one decode per context length)
+        
+        Args:
+            dfs: List of DataFrames with historical OHLCV data
+            horizon: Number of days to predict ahead
+            n_samples: Number of sampled paths per series
+            quantiles: Quantiles of the horizon return to report
+            tickers: Optional ticker symbols, aligned with dfs
+            
+        Returns:
+            List of distribution dicts (see predict_distribution), in input order
+        """
+        
+        if self.model is None or self.tokenizer is None:
+            raise Exception("Kronos model not loaded. Cannot make predictions.")
+        
+        tickers = tickers or [None] * len(dfs)
+        sampling = dict(KRONOS_SAMPLING, sample_count=n_samples, paths=True)
+        samples = [None] * len(dfs)
+        cache_keys = [self._cache_key(df, horizon, ticker, sampling) for df, ticker in zip(dfs, tickers)]
+        
+        pending = {}
+        for i, key in enumerate(cache_keys):
+            samples[i] = self._cache_get(key)
+            if samples[i] is None:
+                pending.setdefault(len(dfs[i]), []).append(i)
+        
+        try:
+            for indices in pending.values():
+                batch_samples = self._sample_paths([dfs[i] for i in indices], horizon, n_samples)
+                for i, paths in zip(indices, batch_samples):
+                    samples[i] = paths
+                    self._cache_put(cache_keys[i], paths, dfs[i], tickers[i])
+            
+        except Exception as e:
+            print(f"❌ Kronos sampling failed: {e}")
+            raise Exception(f"Kronos prediction error: {e}")
+        
+        return [self._summarize_distribution(df, paths, horizon, quantiles)
+                for df, paths in zip(dfs, samples)]
+    
+    def _sample_paths(self, dfs: List[pd.DataFrame], horizon: int, n_samples: int) -> np.ndarray:
+        """
+        Sampled OHLCVA paths for equal-length series, without averaging
+        
+        Returns:
+            Array of shape (len(dfs), n_samples, horizon, 6) in price units
+        """
+        from models.kronos_official.kronos import calc_time_stamps
+        
+        predictor = self.predictor_obj
+        x, x_stamp, y_stamp = [], [], []
+        
+        for df in dfs:
+            frame = self._prepare_frame(df)
+            frame['amount'] = frame['volume'] * frame[['open', 'high', 'low', 'close']].mean(axis=1)
+            x.append(frame[OHLCVA_COLUMNS].values.astype(np.float32))
+            x_stamp.append(calc_time_stamps(df.index).values.astype(np.float32))
+            y_stamp.append(calc_time_stamps(self._future_timestamps(df, horizon)).values.astype(np.float32))
+        
+        x = np.stack(x)
+        if np.isnan(x).any():
+            raise ValueError("Input DataFrame contains NaN values in price or volume columns.")
+        
+        # Same per-series normalization as the official predictor
+        x_mean = x.mean(axis=1, keepdims=True)
+        x_std = x.std(axis=1, keepdims=True)
+        x_norm = np.clip((x - x_mean) / (x_std + 1e-5), -predictor.clip, predictor.clip)
+        
+        sampling = dict(KRONOS_SAMPLING, sample_count=n_samples)
+        with torch.no_grad():
+            paths = predictor.generate(x_norm, np.stack(x_stamp), np.stack(y_stamp), horizon,
+                                       verbose=False, average=False, **sampling)
+        
+        # (B, S, L, F) - broadcast the (B, 1, F) stats over samples
+        return paths * (x_std[:, None] + 1e-5) + x_mean[:, None]
+    
+    @staticmethod
+    def _summarize_distribution(df: pd.DataFrame, paths: np.ndarray, horizon: int,
+                                quantiles: Tuple[float, ...]) -> Dict:
+        """Quantiles / probability of gain over the sampled close paths"""
+        current_close = df['Close'].iloc[-1]
+        closes = paths[:, :, OHLCVA_COLUMNS.index('close')]  # (S, L)
+        changes = closes[:, -1] / current_close - 1.0
+        
+        expected_change = float(changes.mean())
+        prob_positive = float((changes > 0).mean())
+        
+        # Confidence = share of paths agreeing with the expected direction
+        confidence = prob_positive if expected_change >= 0 else 1.0 - prob_positive
+        
+        return {
+            'predicted_close': np.median(closes, axis=0),
+            'predicted_change': expected_change,
+            'expected_change': expected_change,
+            'prob_positive': prob_positive,
+            'change_quantiles': {q: float(np.quantile(changes, q)) for q in quantiles},
+            'close_quantiles': {q: np.quantile(closes, q, axis=0) for q in quantiles},
+            'sample_closes': closes,
+            'n_samples': len(closes),
+            'confidence': float(confidence),
+            'horizon': horizon,
+            'official_kronos': True
+        }
+    
+    @staticmethod
+    def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+        """OHLCV columns renamed to the official predictor's lowercase names"""
+        input_df = df[['Open', 'High', 'Low', 'Close', 'Volume']].copy()
+        input_df.columns = ['open', 'high', 'low', 'close', 'volume']
+        return input_df
+    
+    @staticmethod
+    def _future_timestamps(df: pd.DataFrame, horizon: int) -> pd.DatetimeIndex:
+        last_date = df.index[-1]
+        return pd.date_range(start=last_date + pd.Timedelta(days=1), periods=horizon, freq='D')
+    
+    @staticmethod
+    def _summarize(df: pd.DataFrame, pred_df: pd.DataFrame, horizon: int, return_full_candles: bool) -> Dict:
+        """Turn a forecast frame into the prediction dict used by the bot"""
+        # Extract predictions
+        predicted_closes = pred_df['close'].values
+        current_close = df['Close'].iloc[-1]
+        predicted_change = (predicted_closes[-1] - current_close) / current_close
+        
+        # Calculate confidence based on prediction consistency
+        if len(predicted_closes) > 1:
+            pred_returns = np.diff(predicted_closes) / predicted_closes[:-1]
+            pred_volatility = np.std(pred_returns)
+            confidence = 1.0 / (1.0 + pred_volatility * 10)
+            confidence = np.clip(confidence, 0.7, 0.95)
+        else:
+            confidence = 0.85
+        
+        result = {
+            'predicted_close': predicted_closes,
+            'predicted_change': predicted_change,
+            'confidence': float(confidence),
+            'horizon': horizon,
+            'official_kronos': True
+        }
+        
+        if return_full_candles:
+            result['full_candles'] = pred_df
+        
+        return result
+    
+    def _cache_key(self, df: pd.DataFrame, horizon: int, ticker: Optional[str],
+                   sampling: Optional[Dict] = None) -> Optional[str]:
+        from models.kronos_cache import get_prediction_cache, make_cache_key
+        from models.kronos_compiled import model_fingerprint
+        
+        if get_prediction_cache() is None:
+            return None
+        
+        sampling = dict(sampling or KRONOS_SAMPLING, max_context=self.predictor_obj.max_context, clip=self.predictor_obj.clip)
+        return make_cache_key(df, horizon, sampling, model_fingerprint(self.model, self.tokenizer), ticker)
+    
+    def _cache_get(self, key: Optional[str]):
+        from models.kronos_cache import get_prediction_cache
+        
+        if key is None:
+            return None
+        try:
+            return get_prediction_cache().get(key)
+        except Exception as e:
+            print(f"⚠️  Kronos cache read failed: {str(e)[:60]}")
+            return None
+    
+    def _cache_put(self, key: Optional[str], value, df: pd.DataFrame, ticker: Optional[str]):
+        from models.kronos_cache import get_prediction_cache
+        
+        if key is None:
+            return
+        try:
+            get_prediction_cache().put(key, value, ticker=ticker, last_bar=str(df.index[-1]))
+        except Exception as e:
+            print(f"⚠️  Kronos cache write failed: {str(e)[:60]}")
+    
     def _create_input_sequence(self, input_data: Dict) -> torch.Tensor:
         """Create input sequence for Kronos"""
         # Stack OHLCVA data
@@ -0,0 +1,347 @@
+"""
+Kronos Inference Server
+Long-lived localhost HTTP service that keeps one warm Kronos model and coalesces
+forecast requests from many processes (bot, backtests, signal generator) into
+micro-batches bounded by a max-latency window
+
+Usage:
+    python3 src/models/kronos_server.py --port 8765 --max-batch 32 --max-wait-ms 20
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+KRONOS_SERVER_URL = os.getenv('KRONOS_SERVER_URL', 'http://127.0.0.1:8765')
+KRONOS_SERVER = os.getenv('KRONOS_SERVER', 'auto')  # 'auto' = use if running, 'off' = never
+
+DEFAULT_MAX_BATCH = 32
+DEFAULT_MAX_WAIT_MS = 20.0
+
+INPUT_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+# === Wire format ===
+
+def frame_to_payload(df: pd.DataFrame) -> Dict:
+    """OHLCV frame -> JSON-safe dict (exact float round trip, timezone preserved)"""
+    index = pd.DatetimeIndex(df.index)
+    payload = {
+        'index': index.asi8.tolist(),
+        'tz': str(index.tz) if index.tz is not None else None,
+    }
+    for column in INPUT_COLUMNS:
+        payload[column] = df[column].astype(float).tolist()
+    return payload
+
+
+def frame_from_payload(payload: Dict) -> pd.DataFrame:
+    """Inverse of frame_to_payload"""
+    if payload.get('tz'):
+        index = pd.to_datetime(payload['index'], unit='ns', utc=True).tz_convert(payload['tz'])
+    else:
+        index = pd.to_datetime(payload['index'], unit='ns')
+    return pd.DataFrame({column: payload[column] for column in INPUT_COLUMNS}, index=index)
+
+
+def _to_jsonable(value):
+    if isinstance(value, pd.DataFrame):
+        return {'index': [str(i) for i in value.index], 'columns': {c: value[c].tolist() for c in value.columns}}
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, dict):
+        return {str(k): _to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_jsonable(v) for v in value]
+    return value
+
+
+def _from_jsonable(result: Dict) -> Dict:
+    """Restore the numpy/pandas types KronosPredictor returns"""
+    for key in ('predicted_close', 'sample_closes'):
+        if key in result:
+            result[key] = np.asarray(result[key])
+    if 'change_quantiles' in result:
+        result['change_quantiles'] = {float(q): v for q, v in result['change_quantiles'].items()}
+    if 'close_quantiles' in result:
+        result['close_quantiles'] = {float(q): np.asarray(v) for q, v in result['close_quantiles'].items()}
+    if 'full_candles' in result:
+        candles = result['full_candles']
+        result['full_candles'] = pd.DataFrame(candles['columns'], index=pd.to_datetime(candles['index']))
+    return result
+
+
+# === Server ===
+
+class MicroBatcher:
+    """
+    Collects requests from handler threads and runs them as batches
+
+    A batch is flushed when it reaches max_batch requests or when max_wait_ms
+    has passed since its first request, whichever comes first.
+    """
+
+    def __init__(self, predictor, max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS):
+        self.predictor = predictor
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = queue.Queue()
+        self.requests = 0
+        self.batches = 0
+
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, request: Dict) -> Dict:
+        """Queue one request and block until its batch has been processed"""
+        item = {'request': request, 'done': threading.Event(), 'result': None, 'error': None}
+        self.queue.put(item)
+        item['done'].wait()
+
+        if item['error'] is not None:
+            raise RuntimeError(item['error'])
+        return item['result']
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.max_wait
+
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._process(batch)
+
+    def _process(self, batch: List[Dict]):
+        # Requests can only share a decode if horizon and sampling match
+        groups = {}
+        for item in batch:
+            request = item['request']
+            key = (
+                int(request.get('horizon', 7)),
+                int(request.get('n_samples', 1)),
+                tuple(request.get('quantiles') or ()),
+                bool(request.get('return_full_candles', False)),
+            )
+            groups.setdefault(key, []).append(item)
+
+        for (horizon, n_samples, quantiles, full_candles), items in groups.items():
+            try:
+                dfs = [frame_from_payload(item['request']['bars']) for item in items]
+                tickers = [item['request'].get('ticker') for item in items]
+
+                if n_samples > 1:
+                    kwargs = {'quantiles': quantiles} if quantiles else {}
+                    results = self.predictor.predict_distribution_batch(
+                        dfs, horizon=horizon, n_samples=n_samples, tickers=tickers, **kwargs
+                    )
+                else:
+                    results = self.predictor.predict_batch(
+                        dfs, horizon=horizon, return_full_candles=full_candles, tickers=tickers
+                    )
+
+                for item, result in zip(items, results):
+                    item['result'] = _to_jsonable(result)
+            except Exception as e:
+                for item in items:
+                    item['error'] = str(e)
+            finally:
+                for item in items:
+                    item['done'].set()
+
+        self.requests += len(batch)
+        self.batches += 1
+
+
+class _KronosRequestHandler(BaseHTTPRequestHandler):
+    batcher: MicroBatcher = None
+    model_name: str = None
+
+    def _send_json(self, status: int, body: Dict):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        batcher = self.batcher
+        self._send_json(200, {
+            'status': 'ok',
+            'model': self.model_name,
+            'backend': getattr(batcher.predictor, 'backend', 'eager'),
+            'requests': batcher.requests,
+            'batches': batcher.batches,
+            'avg_batch_size': batcher.requests / batcher.batches if batcher.batches else 0.0,
+        })
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'not found'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length))
+            result = self.batcher.submit(request)
+            self._send_json(200, result)
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+    def log_message(self, format, *args):
+        # One line per request would swamp the console at batch sizes of 32
+        pass
+
+
+def serve(model_name: str = "NeoQuasar/Kronos-small", host: str = '127.0.0.1', port: int = 8765,
+          max_batch: int = DEFAULT_MAX_BATCH, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+          threads: Optional[int] = None):
+    """
+    Load Kronos once and serve forecasts until interrupted
+
+    Args:
+        model_name: Kronos model to load
+        host: Bind address (localhost only by default)
+        port: TCP port
+        max_batch: Maximum requests per micro-batch
+        max_wait_ms: Maximum time the first request of a batch waits for company
+        threads: Torch intra-op threads (default: all cores, owned by this process only)
+    """
+    import torch
+    from models.kronos_predictor import KronosPredictor
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    predictor = KronosPredictor(model_name=model_name)
+
+    _KronosRequestHandler.batcher = MicroBatcher(predictor, max_batch, max_wait_ms)
+    _KronosRequestHandler.model_name = model_name
+
+    server = ThreadingHTTPServer((host, port), _KronosRequestHandler)
+    server.daemon_threads = True
+
+    print("="*80)
+    print(f"🚀 Kronos inference server on http://{host}:{port}")
+    print(f"   Micro-batching: up to {max_batch} requests / {max_wait_ms:.0f} ms window")
+    print(f"   Torch threads: {torch.get_num_threads()}")
+    print("="*80)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down Kronos server")
+    finally:
+        server.server_close()
+
+
+# === Client ===
+
+class KronosClient:
+    """
+    Drop-in stand-in for KronosPredictor that forwards to the local server
+
+    Exposes the same predict / predict_distribution signatures and return
+    dicts, without importing torch in the calling process.
+    """
+
+    def __init__(self, url: str = None, timeout: float = 120.0):
+        self.url = (url or KRONOS_SERVER_URL).rstrip('/')
+        self.timeout = timeout
+        self.backend = 'server'
+
+    def health(self, timeout: float = None) -> Dict:
+        """Server status dict (raises if unreachable)"""
+        with urllib.request.urlopen(f"{self.url}/health", timeout=timeout or self.timeout) as response:
+            return json.loads(response.read())
+
+    def _post(self, request: Dict) -> Dict:
+        data = json.dumps(request).encode()
+        http_request = urllib.request.Request(
+            f"{self.url}/predict", data=data, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(http_request, timeout=self.timeout) as response:
+                return _from_jsonable(json.loads(response.read()))
+        except urllib.error.HTTPError as e:
+            raise Exception(f"Kronos prediction error: {json.loads(e.read()).get('error', e)}")
+
+    def predict(self, df: pd.DataFrame, horizon: int = 7, return_full_candles: bool = False,
+                ticker: Optional[str] = None) -> Dict:
+        """Same as KronosPredictor.predict, served remotely"""
+        return self._post({
+            'bars': frame_to_payload(df),
+            'horizon': horizon,
+            'return_full_candles': return_full_candles,
+            'ticker': ticker,
+        })
+
+    def predict_distribution(self, df: pd.DataFrame, horizon: int = 7, n_samples: int = 32,
+                             quantiles=None, ticker: Optional[str] = None) -> Dict:
+        """Same as KronosPredictor.predict_distribution, served remotely"""
+        return self._post({
+            'bars': frame_to_payload(df),
+            'horizon': horizon,
+            'n_samples': n_samples,
+            'quantiles': list(quantiles) if quantiles else None,
+            'ticker': ticker,
+        })
+
+
+def connect_kronos_server(url: str = None) -> Optional[KronosClient]:
+    """
+    Return a client if a Kronos server is running, else None
+
+    Disabled with KRONOS_SERVER=off. Callers fall back to loading the model
+    in-process when this returns None.
+    """
+    if KRONOS_SERVER == 'off':
+        return None
+
+    client = KronosClient(url)
+    try:
+        status = client.health(timeout=1.0)
+    except Exception:
+        return None
+
+    print(f"✅ Using Kronos server at {client.url} ({status.get('model')}, {status.get('backend')})")
+    return client
+
+
+if __name__ == "__main__":
+    sys.path.append('src')
+
+    parser = argparse.ArgumentParser(description="Local Kronos inference server with micro-batching")
+    parser.add_argument("--model", default="NeoQuasar/Kronos-small")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS)
+    parser.add_argument("--threads", type=int, default=None, help="Torch intra-op threads")
+    args = parser.parse_args()
+
+    serve(args.model, args.host, args.port, args.max_batch, args.max_wait_ms, args.threads)
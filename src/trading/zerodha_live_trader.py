@@ -7,12 +7,12 @@ Automated trading system with DRL agent decision making
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 import json
 import logging
 from datetime import datetime
 import pandas as pd
-import numpy as np
 
 try:
     from kiteconnect import KiteConnect
@@ -20,7 +20,9 @@ except ImportError:
     print("⚠️  kiteconnect not installed. Install with: pip install kiteconnect")
     KiteConnect = None
 
-from stable_baselines3 import SAC
+# Exported NumPy actor when available (no stable_baselines3/torch import), else the SB3 zip
+from models.drl_agent import DRL_MODEL_PATHS, build_observations, predict_actions
+from models.drl_agent import load_drl_agent as load_drl_model
 
 # Setup logging
 logging.basicConfig(
@@ -61,16 +63,10 @@ class ZerodhaLiveTrader:
     def load_drl_agent(self):
         """Load the trained DRL agent"""
         print("🤖 Loading DRL Agent...")
-        try:
-            self.drl_agent = SAC.load("models/sac_nse_nifty100.zip")
-            print("✅ Nifty 100 DRL Agent loaded")
-        except:
-            try:
-                self.drl_agent = SAC.load("models/sac_nse_retrained.zip")
-                print("✅ Retrained DRL Agent loaded")
-            except:
-                print("❌ DRL Agent not found!")
-                self.drl_agent = None
+        # Nifty 100 agent first, then the retrained one
+        self.drl_agent = load_drl_model([DRL_MODEL_PATHS[0], DRL_MODEL_PATHS[2]])
+        if self.drl_agent is None:
+            print("❌ DRL Agent not found!")
 
     def authenticate(self):
         """Authenticate with Zerodha Kite"""
@@ -166,44 +162,49 @@ class ZerodhaLiveTrader:
 
     def get_drl_decision(self, ticker, signal_data):
         """Get DRL agent's decision"""
-        if self.drl_agent is None:
-            return 'HOLD', 0.5
+        return self.get_drl_decisions({ticker: signal_data})[ticker]
+
+    def get_drl_decisions(self, signals):
+        """
+        Get DRL agent's decisions for many tickers in one forward pass
+        
+        Args:
+            signals: Dict of ticker -> signal_data (needs 'price', optional 'rsi')
+        
+        Returns:
+            Dict of ticker -> (decision, confidence)
+        """
+        decisions = {ticker: ('HOLD', 0.5) for ticker in signals}
+        if self.drl_agent is None or not signals:
+            return decisions
         
         try:
-            price = signal_data['price']
-            rsi = signal_data.get('rsi', 50)
-            
-            # Normalize inputs
-            price_norm = np.clip(price / 10000.0, 0, 10)
-            rsi_norm = np.clip(rsi / 100.0, 0, 1)
-            macd_norm = 0.0
-            capital_ratio = 0.8
-            shares_held = 1.0 if ticker in self.positions else 0.0
-            
-            # Create observation
-            obs = np.array([price_norm, rsi_norm, macd_norm, capital_ratio, shares_held], dtype=np.float32)
-            obs = np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=0.0)
-            
-            # Get DRL action
-            action, _ = self.drl_agent.predict(obs, deterministic=True)
-            action_value = float(action[0])
-            
-            # Convert to decision
-            if action_value > 0.3:
-                decision = 'BUY'
-                confidence = min(0.5 + action_value * 0.5, 1.0)
-            elif action_value < -0.3:
-                decision = 'SELL'
-                confidence = min(0.5 + abs(action_value) * 0.5, 1.0)
-            else:
-                decision = 'HOLD'
-                confidence = 0.5
-            
-            return decision, confidence
+            tickers = list(signals)
+            
+            # Normalize inputs (no MACD in signal_data, 80% capital free)
+            obs = build_observations(
+                price=[signals[t]['price'] for t in tickers],
+                rsi=[signals[t].get('rsi', 50) for t in tickers],
+                macd=0.0,
+                capital_ratio=0.8,
+                shares_held=[1.0 if t in self.positions else 0.0 for t in tickers],
+            )
+            
+            # Get DRL actions
+            actions = predict_actions(self.drl_agent, obs)
+            
+            for ticker, action_value in zip(tickers, actions.tolist()):
+                # Convert to decision
+                if action_value > 0.3:
+                    decisions[ticker] = ('BUY', min(0.5 + action_value * 0.5, 1.0))
+                elif action_value < -0.3:
+                    decisions[ticker] = ('SELL', min(0.5 + abs(action_value) * 0.5, 1.0))
+            
+            return decisions
             
         except Exception as e:
-            logging.error(f"DRL decision error for {ticker}: {e}")
-            return 'HOLD', 0.5
+            logging.error(f"DRL decision error for {', '.join(signals)}: {e}")
+            return {ticker: ('HOLD', 0.5) for ticker in signals}
 
     def place_buy_order(self, ticker, signal_data, drl_confidence):
         """Place a BUY order on Zerodha"""
@@ -0,0 +1,315 @@
+"""
+Resumable DRL Training
+Periodic model + replay-buffer checkpoints with a latest.json pointer (resume
+after a crash or preemption), and held-out evaluation that runs in a separate
+process on the exported NumPy actor so it never stalls training
+"""
+
+import os
+import re
+import sys
+import glob
+import json
+import time
+import shutil
+import multiprocessing as mp
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from stable_baselines3.common.callbacks import BaseCallback
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from training.vec_trading_env import (
+    TickerPanel, BUY_THRESHOLD, SELL_THRESHOLD, CAPITAL_FRACTION,
+)
+
+DRL_CHECKPOINT_DIR = os.getenv('DRL_CHECKPOINT_DIR', 'models/checkpoints')
+DRL_CHECKPOINT_FREQ = int(os.getenv('DRL_CHECKPOINT_FREQ', '20000'))
+DRL_EVAL_FREQ = int(os.getenv('DRL_EVAL_FREQ', '0'))   # off: evaluation holds tickers out of training
+DRL_EVAL_HOLDOUT = float(os.getenv('DRL_EVAL_HOLDOUT', '0.1'))
+
+LATEST_FILE = 'latest.json'
+CHECKPOINT_PATTERN = re.compile(r'step_(\d+)\.zip')   # excludes .tmp.zip files mid-write
+
+
+# === Checkpoints ===
+
+def _write_json_atomic(path: str, payload: Dict):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def find_latest_checkpoint(checkpoint_dir: str = None) -> Optional[Dict]:
+    """
+    Most recent complete checkpoint, or None
+
+    Returns:
+        Dict with timesteps, model and replay_buffer paths
+    """
+    path = os.path.join(checkpoint_dir or DRL_CHECKPOINT_DIR, LATEST_FILE)
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'r') as f:
+        latest = json.load(f)
+
+    if not os.path.exists(latest['model']):
+        return None
+    return latest
+
+
+class ResumableCheckpointCallback(BaseCallback):
+    """
+    Save model + replay buffer every save_freq timesteps
+
+    Files are written under a temporary name and renamed, and latest.json is
+    only updated once both are complete, so a kill at any point leaves the
+    previous checkpoint usable. Only the newest keep_last checkpoints in the
+    directory are kept, including those of earlier (resumed) sessions.
+    """
+
+    def __init__(self, checkpoint_dir: str = None, save_freq: int = DRL_CHECKPOINT_FREQ,
+                 keep_last: int = 2, save_replay_buffer: bool = True, verbose: int = 1):
+        super().__init__(verbose)
+        self.checkpoint_dir = checkpoint_dir or DRL_CHECKPOINT_DIR
+        self.save_freq = save_freq
+        self.keep_last = keep_last
+        self.save_replay_buffer = save_replay_buffer
+        self.last_saved = 0
+
+    def _on_training_start(self):
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.last_saved = self.num_timesteps
+
+    def _on_step(self) -> bool:
+        if self.save_freq > 0 and self.num_timesteps - self.last_saved >= self.save_freq:
+            self.save()
+        return True
+
+    def _on_training_end(self):
+        if self.num_timesteps > self.last_saved:
+            self.save()
+
+    def save(self):
+        """Write one checkpoint and point latest.json at it"""
+        started = time.perf_counter()
+        name = f"step_{self.num_timesteps:09d}"
+        model_path = os.path.join(self.checkpoint_dir, f"{name}.zip")
+        buffer_path = os.path.join(self.checkpoint_dir, f"{name}_replay_buffer.pkl")
+
+        self.model.save(os.path.join(self.checkpoint_dir, f"{name}.tmp.zip"))
+        os.replace(os.path.join(self.checkpoint_dir, f"{name}.tmp.zip"), model_path)
+
+        if self.save_replay_buffer and hasattr(self.model, 'save_replay_buffer'):
+            self.model.save_replay_buffer(os.path.join(self.checkpoint_dir, f"{name}.tmp_replay_buffer.pkl"))
+            os.replace(os.path.join(self.checkpoint_dir, f"{name}.tmp_replay_buffer.pkl"), buffer_path)
+        else:
+            buffer_path = None
+
+        _write_json_atomic(os.path.join(self.checkpoint_dir, LATEST_FILE), {
+            'timesteps': int(self.num_timesteps),
+            'model': model_path,
+            'replay_buffer': buffer_path,
+            'saved_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+
+        self.last_saved = self.num_timesteps
+        self.prune(keep=model_path)
+
+        if self.verbose:
+            print(f"💾 Checkpoint at {self.num_timesteps:,} timesteps ({time.perf_counter() - started:.1f}s)")
+
+    def prune(self, keep: str):
+        """
+        Delete all but the newest keep_last checkpoints found on disk
+
+        Checkpoints are ordered by step. The one just saved (keep) always
+        survives, even when an older session left higher-step files behind.
+        """
+        checkpoints = []
+        for path in glob.glob(os.path.join(self.checkpoint_dir, 'step_*.zip')):
+            match = CHECKPOINT_PATTERN.fullmatch(os.path.basename(path))
+            if match and path != keep:
+                checkpoints.append((int(match.group(1)), path))
+        checkpoints.sort()
+
+        stale = checkpoints[:max(len(checkpoints) - (self.keep_last - 1), 0)]
+        for _, path in stale:
+            for stale_path in (path, path[:-len('.zip')] + '_replay_buffer.pkl'):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+
+
+# === Held-out evaluation ===
+
+def split_holdout(frames: Dict[str, pd.DataFrame], fraction: float = DRL_EVAL_HOLDOUT,
+                  seed: int = 0) -> Tuple[Dict[str, pd.DataFrame], Dict[str, pd.DataFrame]]:
+    """
+    Deterministically hold out a fraction of tickers for evaluation
+
+    The split only depends on the ticker names and seed, so a resumed run
+    evaluates on the same tickers as the original one.
+
+    Returns:
+        (train_frames, eval_frames)
+    """
+    tickers = sorted(frames)
+    n_eval = int(round(len(tickers) * fraction))
+    if fraction <= 0 or n_eval == 0 or n_eval >= len(tickers):
+        return dict(frames), {}
+
+    held_out = set(np.random.default_rng(seed).choice(tickers, size=n_eval, replace=False).tolist())
+    train = {t: df for t, df in frames.items() if t not in held_out}
+    held = {t: df for t, df in frames.items() if t in held_out}
+    return train, held
+
+
+def evaluate_panel(policy, panel: TickerPanel, initial_capital: float = 100000) -> Dict:
+    """
+    Run one deterministic episode per ticker, all tickers in lockstep
+
+    Same trade rules as TradingEnv; every ticker starts flat with
+    initial_capital and trades through its whole history.
+
+    Args:
+        policy: Anything with SB3-style predict (SAC agent or NumpyPolicy)
+        panel: Held-out tickers
+
+    Returns:
+        Dict with mean/median return, share of profitable tickers and per-ticker returns
+    """
+    position = panel.offsets[:-1].astype(np.int64).copy()
+    last_row = panel.offsets[1:].astype(np.int64) - 1
+    capital = np.full(len(panel), float(initial_capital))
+    shares_held = np.zeros(len(panel))
+    total_value = capital.copy()
+
+    active = np.flatnonzero(position < last_row)
+    while len(active):
+        obs = panel.features[position[active]].copy()
+        obs[:, 3] = np.clip(capital[active] / initial_capital, 0, 2)
+        obs[:, 4] = np.clip(shares_held[active] / 100.0, 0, 1)
+
+        actions, _ = policy.predict(obs, deterministic=True)
+        action = np.asarray(actions, dtype=np.float64).reshape(len(active), -1)[:, 0]
+        price = panel.closes[position[active]]
+
+        cap, held = capital[active], shares_held[active]
+        shares_to_buy = np.floor(cap * CAPITAL_FRACTION / price)
+        buy = (action > BUY_THRESHOLD) & (shares_to_buy > 0)
+        cap = np.where(buy, cap - shares_to_buy * price, cap)
+        held = np.where(buy, held + shares_to_buy, held)
+
+        sell = (action < SELL_THRESHOLD) & (held > 0)
+        cap = np.where(sell, cap + held * price, cap)
+        held = np.where(sell, 0.0, held)
+
+        capital[active], shares_held[active] = cap, held
+        total_value[active] = cap + held * price
+        position[active] += 1
+        active = active[position[active] < last_row[active]]
+
+    returns = total_value / initial_capital - 1
+    return {
+        'mean_return': float(returns.mean()) if len(returns) else 0.0,
+        'median_return': float(np.median(returns)) if len(returns) else 0.0,
+        'profitable_share': float((returns > 0).mean()) if len(returns) else 0.0,
+        'per_ticker': dict(zip(panel.tickers, returns.round(6).tolist())),
+    }
+
+
+def _eval_worker(panel_dir: str, jobs, results_path: str, initial_capital: float):
+    """Evaluation process: load each exported actor and score it on the held-out panel"""
+    from models.drl_policy import NumpyPolicy
+
+    panel = TickerPanel.load(panel_dir, mmap_mode='r')
+    best = -np.inf
+
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+
+        started = time.perf_counter()
+        policy = NumpyPolicy.load(job['policy_path'])
+        result = evaluate_panel(policy, panel, initial_capital)
+        result.update({'timesteps': job['timesteps'], 'eval_seconds': round(time.perf_counter() - started, 3)})
+
+        with open(results_path, 'a') as f:
+            f.write(json.dumps(result) + '\n')
+
+        if result['mean_return'] > best:
+            best = result['mean_return']
+            shutil.copyfile(job['policy_path'], os.path.join(os.path.dirname(results_path), 'best_actor.npz'))
+
+        print(f"📊 Eval @ {job['timesteps']:,}: mean return {result['mean_return']:+.2%} | "
+              f"profitable {result['profitable_share']:.0%} of {len(panel)} held-out tickers")
+
+
+class AsyncEvaluator:
+    """
+    Separate process that evaluates exported actors on held-out tickers
+
+    Training only pays for exporting the actor (a few KB); the episodes run
+    in the worker. Results are appended to evaluations.jsonl and the best
+    actor so far is copied to best_actor.npz.
+    """
+
+    def __init__(self, eval_frames: Dict[str, pd.DataFrame], output_dir: str = None,
+                 initial_capital: float = 100000):
+        self.output_dir = os.path.join(output_dir or DRL_CHECKPOINT_DIR, 'eval')
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        panel_dir = os.path.join(self.output_dir, 'panel')
+        TickerPanel.from_frames(eval_frames).save(panel_dir)
+        self.results_path = os.path.join(self.output_dir, 'evaluations.jsonl')
+
+        # spawn: the worker must not inherit torch's thread pools from the trainer
+        ctx = mp.get_context('spawn')
+        self.jobs = ctx.Queue()
+        self.process = ctx.Process(
+            target=_eval_worker, args=(panel_dir, self.jobs, self.results_path, initial_capital), daemon=True
+        )
+        self.process.start()
+
+    def submit(self, timesteps: int, policy_path: str):
+        self.jobs.put({'timesteps': int(timesteps), 'policy_path': policy_path})
+
+    def close(self, timeout: float = None):
+        """Finish queued evaluations and stop the worker"""
+        self.jobs.put(None)
+        self.process.join(timeout)
+
+
+class AsyncEvalCallback(BaseCallback):
+    """Export the actor every eval_freq timesteps and hand it to an AsyncEvaluator"""
+
+    def __init__(self, evaluator: AsyncEvaluator, eval_freq: int = DRL_EVAL_FREQ, verbose: int = 0):
+        super().__init__(verbose)
+        self.evaluator = evaluator
+        self.eval_freq = eval_freq
+        self.last_eval = 0
+
+    def _on_training_start(self):
+        self.last_eval = self.num_timesteps
+
+    def _on_step(self) -> bool:
+        if self.eval_freq > 0 and self.num_timesteps - self.last_eval >= self.eval_freq:
+            self._submit()
+        return True
+
+    def _on_training_end(self):
+        if self.num_timesteps > self.last_eval:
+            self._submit()
+
+    def _submit(self):
+        from models.drl_policy import NumpyPolicy
+
+        policy_path = os.path.join(self.evaluator.output_dir, f"actor_{self.num_timesteps:09d}.npz")
+        NumpyPolicy.from_sac(self.model).save(policy_path)
+        self.evaluator.submit(self.num_timesteps, policy_path)
+        self.last_eval = self.num_timesteps
@@ -0,0 +1,189 @@
+"""
+DRL Training Data Loader
+Downloads the training universe concurrently (bounded parallelism) and keeps
+the indicator-enriched series in a persistent cache: one .npz per ticker plus
+a manifest.json, so re-training starts without touching the network
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from utils.bar_store import ticker_filename
+
+DRL_DATA_CACHE = os.getenv('DRL_DATA_CACHE', 'data/drl_cache')
+DRL_LOAD_WORKERS = int(os.getenv('DRL_LOAD_WORKERS', '8'))
+DRL_DATA_MAX_AGE_DAYS = float(os.getenv('DRL_DATA_MAX_AGE_DAYS', '7'))
+
+MIN_POINTS = 200
+PERIODS = ['5y', '3y', '2y', '1y']
+CACHE_VERSION = 1
+
+# Columns stored per ticker (besides the date index)
+COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume', 'rsi', 'macd', 'macd_signal', 'volume_ma', 'volume_ratio']
+
+
+def _cache_file(cache_dir: str, ticker: str) -> str:
+    return os.path.join(cache_dir, ticker_filename(ticker) + '.npz')
+
+
+def load_manifest(cache_dir: str = None) -> Dict:
+    """Manifest of cached tickers (empty if the cache does not exist yet)"""
+    path = os.path.join(cache_dir or DRL_DATA_CACHE, 'manifest.json')
+    if not os.path.exists(path):
+        return {'version': CACHE_VERSION, 'tickers': {}}
+    with open(path, 'r') as f:
+        manifest = json.load(f)
+    if manifest.get('version') != CACHE_VERSION:
+        return {'version': CACHE_VERSION, 'tickers': {}}
+    return manifest
+
+
+def save_ticker(cache_dir: str, ticker: str, df: pd.DataFrame) -> str:
+    """Write one indicator-enriched DataFrame as .npz"""
+    path = _cache_file(cache_dir, ticker)
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    np.savez(path, dates=index.asi8, **{c: df[c].values.astype(np.float64) for c in COLUMNS})
+    return path
+
+
+def load_ticker(cache_dir: str, ticker: str) -> pd.DataFrame:
+    """Read one cached ticker back into a DataFrame"""
+    with np.load(_cache_file(cache_dir, ticker)) as data:
+        index = pd.to_datetime(data['dates'], unit='ns')
+        return pd.DataFrame({c: data[c] for c in COLUMNS}, index=index)
+
+
+def fetch_ticker(ticker: str, max_retries: int = 3, delay: float = 2.0):
+    """
+    Download + enrich one ticker (longest period with at least MIN_POINTS bars)
+
+    Returns:
+        (DataFrame or None, period used or error message)
+    """
+    import yfinance as yf
+    from training.train_drl_robust import calculate_indicators
+
+    for attempt in range(max_retries):
+        try:
+            for period in PERIODS:
+                # Ticker.history keeps no module-level state, unlike yf.download,
+                # so it is safe to call from several threads at once
+                df = yf.Ticker(ticker).history(period=period, interval="1d",
+                                               auto_adjust=True, timeout=15)
+                df = df[['Open', 'High', 'Low', 'Close', 'Volume']]
+                if df.index.tz is not None:
+                    df.index = df.index.tz_localize(None)
+
+                if len(df) >= MIN_POINTS:
+                    return calculate_indicators(df), period
+
+            return None, f"insufficient data (< {MIN_POINTS} points)"
+
+        except Exception as e:
+            if attempt < max_retries - 1:
+                # Backoff only blocks this worker, not the whole load
+                time.sleep(delay * (attempt + 1))
+            else:
+                return None, f"failed after {max_retries} attempts: {str(e)[:40]}"
+
+    return None, "failed"
+
+
+def load_training_data(tickers: List[str], cache_dir: str = None, max_workers: int = None,
+                       refresh: bool = False, max_age_days: float = None) -> Dict[str, pd.DataFrame]:
+    """
+    Indicator-enriched daily data for every ticker, from cache or network
+
+    Args:
+        tickers: Universe to load
+        cache_dir: Dataset cache directory (default: DRL_DATA_CACHE)
+        max_workers: Concurrent downloads (default: DRL_LOAD_WORKERS)
+        refresh: Ignore the cache and download everything
+        max_age_days: Cached tickers older than this are re-downloaded
+                      (default: DRL_DATA_MAX_AGE_DAYS; <= 0 never expires)
+
+    Returns:
+        Dict of ticker -> DataFrame, in universe order, tickers without data omitted
+    """
+    cache_dir = cache_dir or DRL_DATA_CACHE
+    max_workers = max_workers or DRL_LOAD_WORKERS
+    max_age_days = DRL_DATA_MAX_AGE_DAYS if max_age_days is None else max_age_days
+    os.makedirs(cache_dir, exist_ok=True)
+
+    manifest = load_manifest(cache_dir)
+    now = time.time()
+
+    frames = {}
+    to_fetch = []
+    for ticker in tickers:
+        entry = manifest['tickers'].get(ticker)
+        fresh = entry is not None and (max_age_days <= 0 or now - entry['fetched'] < max_age_days * 86400)
+        if not refresh and fresh and os.path.exists(_cache_file(cache_dir, ticker)):
+            frames[ticker] = load_ticker(cache_dir, ticker)
+        else:
+            to_fetch.append(ticker)
+
+    print(f"📦 Cache: {len(frames)}/{len(tickers)} tickers from {cache_dir}")
+
+    if to_fetch:
+        print(f"📥 Downloading {len(to_fetch)} tickers ({max_workers} parallel)...")
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(fetch_ticker, ticker): ticker for ticker in to_fetch}
+            for done, future in enumerate(as_completed(futures), 1):
+                ticker = futures[future]
+                df, info = future.result()
+
+                if df is not None and len(df) >= MIN_POINTS:
+                    frames[ticker] = df
+                    save_ticker(cache_dir, ticker, df)
+                    manifest['tickers'][ticker] = {
+                        'file': os.path.basename(_cache_file(cache_dir, ticker)),
+                        'rows': len(df),
+                        'first': str(df.index[0].date()),
+                        'last': str(df.index[-1].date()),
+                        'period': info,
+                        'fetched': now,
+                    }
+                    print(f"  [{done:3}/{len(to_fetch)}] {ticker:15} ✅ {len(df)} points (period: {info})")
+                else:
+                    failed += 1
+                    print(f"  [{done:3}/{len(to_fetch)}] {ticker:15} ❌ {info}")
+
+        # Single writer: the manifest is only updated from this thread
+        manifest['updated'] = datetime.now().isoformat()
+        with open(os.path.join(cache_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        if failed:
+            print(f"⚠️  {failed} tickers could not be loaded")
+
+    return {ticker: frames[ticker] for ticker in tickers if ticker in frames}
+
+
+if __name__ == "__main__":
+    import argparse
+    from training.train_drl_robust import TRAINING_STOCKS
+
+    parser = argparse.ArgumentParser(description="Build/refresh the DRL training data cache")
+    parser.add_argument("--workers", type=int, default=DRL_LOAD_WORKERS)
+    parser.add_argument("--refresh", action="store_true", help="Re-download every ticker")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    frames = load_training_data(TRAINING_STOCKS, max_workers=args.workers, refresh=args.refresh)
+    print(f"\n✅ {len(frames)} tickers, {sum(len(df) for df in frames.values()):,} points "
+          f"in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,255 @@
+"""
+DRL Hyperparameter Sweep
+Trains one SAC agent per configuration (learning rate, batch size, buffer size,
+holding penalty) across a process pool. Every worker memory-maps the same
+read-only training/held-out panels, evaluates its agent on all held-out tickers
+in lockstep at fixed intervals, and the results land in one comparable table
+
+Usage:
+    python3 src/training/sweep_drl.py --learning-rates 3e-4,1e-4 --batch-sizes 256,512 --workers 4
+"""
+
+import os
+import sys
+import json
+import time
+import itertools
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+DRL_SWEEP_DIR = os.getenv('DRL_SWEEP_DIR', 'models/sweeps')
+
+DEFAULT_GRID = {
+    'learning_rate': [3e-4, 1e-4],
+    'batch_size': [256],
+    'buffer_size': [100000],
+    'holding_penalty': [0.01, 0.0],
+}
+
+
+def build_grid(grid: Dict[str, List]) -> List[Dict]:
+    """Cartesian product of the grid, each config tagged with a stable id"""
+    keys = list(grid)
+    configs = []
+    for i, values in enumerate(itertools.product(*(grid[k] for k in keys))):
+        config = dict(zip(keys, values))
+        config['config_id'] = i
+        configs.append(config)
+    return configs
+
+
+def prepare_dataset(sweep_dir: str, refresh: bool = False) -> Dict[str, str]:
+    """
+    Write the shared train / held-out panels once (workers memory-map them)
+
+    Returns:
+        Dict with 'train' and 'eval' panel directories
+    """
+    from training.drl_data import load_training_data
+    from training.train_drl_robust import TRAINING_STOCKS
+    from training.checkpointing import split_holdout
+    from training.vec_trading_env import TickerPanel
+
+    frames = load_training_data(TRAINING_STOCKS, refresh=refresh)
+    train_frames, eval_frames = split_holdout(frames)
+
+    paths = {'train': os.path.join(sweep_dir, 'train_panel'), 'eval': os.path.join(sweep_dir, 'eval_panel')}
+    TickerPanel.from_frames(train_frames).save(paths['train'])
+    TickerPanel.from_frames(eval_frames).save(paths['eval'])
+
+    print(f"📦 Shared dataset: {len(train_frames)} training / {len(eval_frames)} held-out tickers in {sweep_dir}")
+    return paths
+
+
+def run_config(config: Dict, panels: Dict[str, str], timesteps: int, eval_every: int,
+               n_envs: int = 4, seed: int = 0, torch_threads: int = 1) -> Dict:
+    """
+    Train + evaluate one configuration (runs inside a pool worker)
+
+    Returns:
+        Dict with the config, final/best held-out metrics and the learning curve
+    """
+    import torch
+    from stable_baselines3 import SAC
+    from stable_baselines3.common.callbacks import BaseCallback
+    from training.vec_trading_env import TickerPanel, VecTradingEnv
+    from training.checkpointing import evaluate_panel
+
+    # One intra-op thread per worker: the pool provides the parallelism
+    torch.set_num_threads(torch_threads)
+
+    train_panel = TickerPanel.load(panels['train'], mmap_mode='r')
+    eval_panel = TickerPanel.load(panels['eval'], mmap_mode='r')
+    env = VecTradingEnv(train_panel, num_envs=n_envs, seed=seed, holding_penalty=config['holding_penalty'])
+
+    curve = []
+    started = time.perf_counter()
+
+    class LearningCurve(BaseCallback):
+        def __init__(self):
+            super().__init__(0)
+            self.last_eval = 0
+
+        def _on_step(self) -> bool:
+            if self.num_timesteps - self.last_eval >= eval_every:
+                self.record()
+            return True
+
+        def record(self):
+            metrics = evaluate_panel(self.model, eval_panel)
+            curve.append({
+                'timesteps': int(self.num_timesteps),
+                'mean_return': metrics['mean_return'],
+                'median_return': metrics['median_return'],
+                'profitable_share': metrics['profitable_share'],
+                'elapsed_s': round(time.perf_counter() - started, 1),
+            })
+            self.last_eval = self.num_timesteps
+
+    model = SAC(
+        'MlpPolicy',
+        env,
+        learning_rate=config['learning_rate'],
+        buffer_size=int(config['buffer_size']),
+        learning_starts=1000,
+        batch_size=int(config['batch_size']),
+        tau=0.005,
+        gamma=0.99,
+        gradient_steps=-1,
+        verbose=0,
+        seed=seed,
+        device='cpu'
+    )
+
+    callback = LearningCurve()
+    model.learn(total_timesteps=timesteps, callback=callback)
+    if not curve or curve[-1]['timesteps'] != model.num_timesteps:
+        callback.record()
+
+    best = max(curve, key=lambda point: point['mean_return'])
+    return {
+        **config,
+        'final_mean_return': curve[-1]['mean_return'],
+        'final_profitable_share': curve[-1]['profitable_share'],
+        'best_mean_return': best['mean_return'],
+        'best_timesteps': best['timesteps'],
+        'train_seconds': round(time.perf_counter() - started, 1),
+        'curve': curve,
+    }
+
+
+def run_sweep(grid: Dict[str, List] = None, timesteps: int = 50000, eval_every: int = 10000,
+              max_workers: int = None, n_envs: int = 4, sweep_dir: str = None,
+              refresh_data: bool = False, seed: int = 0) -> pd.DataFrame:
+    """
+    Run every configuration of the grid across a process pool
+
+    Args:
+        grid: Dict of hyperparameter -> list of values (default: DEFAULT_GRID)
+        timesteps: Training timesteps per configuration
+        eval_every: Timesteps between held-out evaluations (learning-curve points)
+        max_workers: Pool size (default: cores // 2, at least 1)
+        n_envs: Lockstep environments per worker
+        sweep_dir: Output directory (default: DRL_SWEEP_DIR/<timestamp>)
+        refresh_data: Re-download the training data
+        seed: Seed shared by every configuration, so runs differ only in hyperparameters
+
+    Returns:
+        Results table, one row per configuration, best final return first
+    """
+    configs = build_grid(grid or DEFAULT_GRID)
+    sweep_dir = sweep_dir or os.path.join(DRL_SWEEP_DIR, time.strftime('%Y%m%d_%H%M%S'))
+    max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+    os.makedirs(sweep_dir, exist_ok=True)
+
+    panels = prepare_dataset(sweep_dir, refresh=refresh_data)
+    with open(os.path.join(sweep_dir, 'grid.json'), 'w') as f:
+        json.dump({'configs': configs, 'timesteps': timesteps, 'eval_every': eval_every}, f, indent=2)
+
+    print(f"🔧 {len(configs)} configurations x {timesteps:,} timesteps on {max_workers} workers")
+
+    rows, curves = [], []
+    ctx = mp.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx) as pool:
+        futures = {
+            pool.submit(run_config, config, panels, timesteps, eval_every, n_envs, seed): config
+            for config in configs
+        }
+        for future in as_completed(futures):
+            config = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"❌ Config {config['config_id']} failed: {str(e)[:60]}")
+                continue
+
+            for point in result.pop('curve'):
+                curves.append({'config_id': result['config_id'], **point})
+            rows.append(result)
+            print(f"✅ Config {result['config_id']:3}: final {result['final_mean_return']:+.2%} | "
+                  f"best {result['best_mean_return']:+.2%} @ {result['best_timesteps']:,} "
+                  f"({result['train_seconds']:.0f}s)")
+
+    results = pd.DataFrame(rows)
+    if len(results):
+        results = results.sort_values('final_mean_return', ascending=False).reset_index(drop=True)
+    results.to_csv(os.path.join(sweep_dir, 'results.csv'), index=False)
+    pd.DataFrame(curves).to_csv(os.path.join(sweep_dir, 'learning_curves.csv'), index=False)
+
+    return results
+
+
+def _parse_list(text: str, cast) -> List:
+    return [cast(v) for v in text.split(',') if v.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel SAC hyperparameter sweep")
+    parser.add_argument("--learning-rates", default=None, help="Comma-separated, e.g. 3e-4,1e-4")
+    parser.add_argument("--batch-sizes", default=None, help="Comma-separated, e.g. 256,512")
+    parser.add_argument("--buffer-sizes", default=None, help="Comma-separated, e.g. 50000,100000")
+    parser.add_argument("--penalties", default=None, help="Holding penalties, e.g. 0.01,0.0")
+    parser.add_argument("--timesteps", type=int, default=50000)
+    parser.add_argument("--eval-every", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--n-envs", type=int, default=4, help="Lockstep environments per worker")
+    parser.add_argument("--output", default=None, help="Sweep directory")
+    parser.add_argument("--refresh-data", action="store_true")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    grid = dict(DEFAULT_GRID)
+    if args.learning_rates:
+        grid['learning_rate'] = _parse_list(args.learning_rates, float)
+    if args.batch_sizes:
+        grid['batch_size'] = _parse_list(args.batch_sizes, int)
+    if args.buffer_sizes:
+        grid['buffer_size'] = _parse_list(args.buffer_sizes, int)
+    if args.penalties:
+        grid['holding_penalty'] = _parse_list(args.penalties, float)
+
+    print("="*100)
+    print("🔬 DRL HYPERPARAMETER SWEEP")
+    print("="*100)
+
+    started = time.perf_counter()
+    results = run_sweep(grid, timesteps=args.timesteps, eval_every=args.eval_every, max_workers=args.workers,
+                        n_envs=args.n_envs, sweep_dir=args.output, refresh_data=args.refresh_data, seed=args.seed)
+
+    print("\n" + "="*100)
+    print("📊 SWEEP RESULTS (held-out tickers, sorted by final mean return)")
+    print("="*100)
+    if len(results):
+        columns = ['config_id', 'learning_rate', 'batch_size', 'buffer_size', 'holding_penalty',
+                   'final_mean_return', 'final_profitable_share', 'best_mean_return', 'best_timesteps', 'train_seconds']
+        print(results[columns].to_string(index=False))
+    else:
+        print("❌ No configuration finished")
+    print(f"\n⏱️  Sweep finished in {(time.perf_counter() - started) / 60:.1f} minutes")
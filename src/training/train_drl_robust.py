@@ -8,19 +8,14 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import time
 from stable_baselines3 import SAC
 from stable_baselines3.common.vec_env import DummyVecEnv
 import gymnasium as gym
 from gymnasium import spaces
-
-print("="*100)
-print("🚀 NSE ALPHABOT - ROBUST DRL AGENT TRAINING")
-print("="*100)
+import argparse
 
 # Configuration - COMPLETE NIFTY 100 STOCKS (Nifty 50 + Nifty Next 50)
 TRAINING_STOCKS = [
@@ -52,6 +47,10 @@ TRAINING_STOCKS = [
 MODEL_DIR = "models"
 os.makedirs(MODEL_DIR, exist_ok=True)
 
+# Parallel environments: one ticker per episode, N envs stepped together
+DRL_N_ENVS = int(os.getenv('DRL_N_ENVS', '8'))
+DRL_VEC_BACKEND = os.getenv('DRL_VEC_BACKEND', 'numpy')  # numpy, subproc or combined (legacy)
+
 def calculate_indicators(df):
     """Calculate technical indicators"""
     # RSI
@@ -72,62 +71,66 @@ def calculate_indicators(df):
     
     return df.dropna()
 
-def download_with_retry(ticker, max_retries=3, delay=2):
-    """Download stock data with retry logic"""
-    for attempt in range(max_retries):
-        try:
-            print(f"  Loading {ticker}... (attempt {attempt + 1}/{max_retries})", end=" ")
-            
-            # Try different periods to get more data
-            for period in ['5y', '3y', '2y', '1y']:
-                df = yf.download(ticker, period=period, interval="1d", 
-                               auto_adjust=True, progress=False, timeout=15)
-                
-                if isinstance(df.columns, pd.MultiIndex):
-                    df.columns = df.columns.get_level_values(0)
-                
-                if len(df) >= 200:  # Lower threshold
-                    df = calculate_indicators(df)
-                    print(f"✅ {len(df)} points (period: {period})")
-                    return df
-            
-            print(f"⚠️  Insufficient data (< 200 points)")
-            return None
-            
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"❌ Error, retrying in {delay}s...")
-                time.sleep(delay)
-            else:
-                print(f"❌ Failed after {max_retries} attempts")
-                return None
-    
-    return None
+def build_feature_arrays(df):
+    """
+    Precompute the market part of the observation for every row
+    
+    Args:
+        df: DataFrame with Close, rsi, macd columns
+        
+    Returns:
+        (features, closes): float32 (N, 5) observation template with columns
+        [price_norm, rsi_norm, macd_norm, 0, 0] and float64 (N,) close prices
+    """
+    closes = np.ascontiguousarray(df['Close'].values, dtype=np.float64)
+    
+    features = np.zeros((len(df), 5), dtype=np.float32)
+    features[:, 0] = np.clip(closes / 10000.0, 0, 10)
+    features[:, 1] = np.clip(df['rsi'].values.astype(np.float64) / 100.0, 0, 1)
+    features[:, 2] = np.clip(df['macd'].values.astype(np.float64) / 100.0, -1, 1)
+    features = np.nan_to_num(features, nan=0.0, posinf=1.0, neginf=0.0)
+    
+    return features, closes
+
+
+def trading_spaces():
+    """(observation_space, action_space) shared by all trading envs"""
+    # State: [price_norm, rsi_norm, macd_norm, capital_ratio, shares_held_norm]
+    observation_space = spaces.Box(
+        low=np.array([0, 0, -1, 0, 0], dtype=np.float32),
+        high=np.array([10, 1, 1, 2, 1], dtype=np.float32),
+        dtype=np.float32
+    )
+    
+    # Action: continuous [-1, 1] (sell to buy)
+    action_space = spaces.Box(
+        low=np.array([-1], dtype=np.float32),
+        high=np.array([1], dtype=np.float32),
+        dtype=np.float32
+    )
+    
+    return observation_space, action_space
+
 
 class TradingEnv(gym.Env):
-    """Custom Trading Environment for DRL"""
+    """Custom Trading Environment for DRL (array-backed: no DataFrame access per step)"""
     
     def __init__(self, df, initial_capital=100000):
+        """
+        Args:
+            df: Indicator-enriched DataFrame, or None if a subclass has already
+                set self.features / self.closes
+            initial_capital: Starting capital per episode
+        """
         super().__init__()
         
-        self.df = df.reset_index(drop=True)
+        if df is not None:
+            self.features, self.closes = build_feature_arrays(df)
         self.initial_capital = initial_capital
         self.current_step = 0
-        self.max_steps = len(df) - 1
-        
-        # State: [price_norm, rsi_norm, macd_norm, capital_ratio, shares_held_norm]
-        self.observation_space = spaces.Box(
-            low=np.array([0, 0, -1, 0, 0], dtype=np.float32),
-            high=np.array([10, 1, 1, 2, 1], dtype=np.float32),
-            dtype=np.float32
-        )
+        self.max_steps = len(self.closes) - 1
         
-        # Action: continuous [-1, 1] (sell to buy)
-        self.action_space = spaces.Box(
-            low=np.array([-1], dtype=np.float32),
-            high=np.array([1], dtype=np.float32),
-            dtype=np.float32
-        )
+        self.observation_space, self.action_space = trading_spaces()
         
         self.reset()
     
@@ -142,22 +145,16 @@ class TradingEnv(gym.Env):
     
     def _get_observation(self):
         """Get current state observation"""
-        row = self.df.iloc[self.current_step]
-        
-        price_norm = np.clip(row['Close'] / 10000.0, 0, 10)
-        rsi_norm = np.clip(row['rsi'] / 100.0, 0, 1)
-        macd_norm = np.clip(row['macd'] / 100.0, -1, 1)
-        capital_ratio = np.clip(self.capital / self.initial_capital, 0, 2)
-        shares_held_norm = np.clip(self.shares_held / 100.0, 0, 1)
-        
-        obs = np.array([price_norm, rsi_norm, macd_norm, capital_ratio, shares_held_norm], dtype=np.float32)
-        obs = np.nan_to_num(obs, nan=0.0, posinf=1.0, neginf=0.0)
+        # Market features are precomputed; only the account state changes per step
+        obs = self.features[self.current_step].copy()
+        obs[3] = min(max(self.capital / self.initial_capital, 0.0), 2.0)
+        obs[4] = min(max(self.shares_held / 100.0, 0.0), 1.0)
         
         return obs
     
     def step(self, action):
         """Execute trading action"""
-        current_price = self.df.iloc[self.current_step]['Close']
+        current_price = self.closes[self.current_step]
         action_value = action[0]
         
         # Execute trade based on action
@@ -191,27 +188,73 @@ class TradingEnv(gym.Env):
         
         return obs, reward, done, False, {}
 
-def train_drl():
-    """Train DRL agent with robust data loading"""
+def make_training_env(frames, n_envs=DRL_N_ENVS, vec_backend=DRL_VEC_BACKEND):
+    """
+    Build the vectorized training environment
+    
+    Args:
+        frames: Dict of ticker -> indicator-enriched DataFrame
+        n_envs: Number of parallel environments
+        vec_backend: 'numpy' (lockstep array env), 'subproc' (worker processes over a
+                     memory-mapped panel) or 'combined' (legacy single env over all tickers)
+        
+    Returns:
+        SB3 VecEnv
+    """
+    if vec_backend == 'combined':
+        combined_df = pd.concat(list(frames.values()), ignore_index=True)
+        return DummyVecEnv([lambda: TradingEnv(combined_df)])
+    
+    from training.vec_trading_env import TickerPanel, VecTradingEnv, make_subproc_env
+    
+    panel = TickerPanel.from_frames(frames)
+    
+    if vec_backend == 'subproc':
+        panel_dir = os.path.join(MODEL_DIR, 'drl_panel')
+        panel.save(panel_dir)
+        return make_subproc_env(panel_dir, num_envs=n_envs)
+    
+    return VecTradingEnv(panel, num_envs=n_envs)
+
+
+def train_drl(n_envs=DRL_N_ENVS, vec_backend=DRL_VEC_BACKEND, refresh_data=False,
+              total_timesteps=200000, resume=False, checkpoint_dir=None,
+              checkpoint_freq=None, eval_freq=None):
+    """
+    Train DRL agent with robust data loading
+    
+    Args:
+        n_envs: Number of parallel environments (one ticker per episode)
+        vec_backend: 'numpy', 'subproc' or 'combined' (see make_training_env)
+        refresh_data: Re-download every ticker instead of using the dataset cache
+        total_timesteps: Training budget (a resumed run only trains the remainder)
+        resume: Continue from the latest checkpoint in checkpoint_dir if there is one
+        checkpoint_dir: Checkpoint directory (default: DRL_CHECKPOINT_DIR)
+        checkpoint_freq: Timesteps between checkpoints (default: DRL_CHECKPOINT_FREQ, 0 = off)
+        eval_freq: Timesteps between held-out evaluations (default: DRL_EVAL_FREQ, 0 = off)
+    """
+    from stable_baselines3.common.callbacks import CallbackList
+    from training.checkpointing import (
+        DRL_CHECKPOINT_DIR, DRL_CHECKPOINT_FREQ, DRL_EVAL_FREQ, AsyncEvalCallback,
+        AsyncEvaluator, ResumableCheckpointCallback, find_latest_checkpoint, split_holdout,
+    )
+    
+    checkpoint_dir = checkpoint_dir or DRL_CHECKPOINT_DIR
+    checkpoint_freq = DRL_CHECKPOINT_FREQ if checkpoint_freq is None else checkpoint_freq
+    eval_freq = DRL_EVAL_FREQ if eval_freq is None else eval_freq
+    
     print("\n" + "="*100)
     print("📊 TRAINING DRL AGENT (SAC) - ROBUST VERSION")
     print("="*100)
     
     print(f"\n📥 Loading data from {len(TRAINING_STOCKS)} stocks...")
-    print("   Using retry logic and flexible data requirements...")
-    
-    all_dfs = []
-    successful = 0
-    failed = 0
+    print("   Using the dataset cache, parallel downloads for missing tickers...")
     
-    for ticker in TRAINING_STOCKS:
-        df = download_with_retry(ticker, max_retries=3, delay=2)
-        
-        if df is not None and len(df) >= 200:
-            all_dfs.append(df)
-            successful += 1
-        else:
-            failed += 1
+    # Parallel download into the persistent dataset cache (instant on re-runs)
+    from training.drl_data import load_training_data
+    all_dfs = load_training_data(TRAINING_STOCKS, refresh=refresh_data)
+    successful = len(all_dfs)
+    failed = len(TRAINING_STOCKS) - successful
     
     print(f"\n📊 Data Loading Summary:")
     print(f"   ✅ Successful: {successful}/{len(TRAINING_STOCKS)}")
@@ -222,21 +265,25 @@ def train_drl():
         print("   Please check your internet connection and try again.")
         return None
     
-    # Combine data
-    combined_df = pd.concat(all_dfs, ignore_index=True)
-    print(f"\n✅ Total training data: {len(combined_df):,} points from {len(all_dfs)} stocks")
+    total_points = sum(len(df) for df in all_dfs.values())
+    print(f"\n✅ Total training data: {total_points:,} points from {len(all_dfs)} stocks")
     
-    # Create environment
-    def make_env():
-        return TradingEnv(combined_df)
+    # Held-out tickers for evaluation (same split on every resume)
+    train_dfs, eval_dfs = split_holdout(all_dfs) if eval_freq > 0 else (all_dfs, {})
+    if eval_dfs:
+        print(f"   Held out for evaluation: {', '.join(sorted(eval_dfs))}")
     
-    env = DummyVecEnv([make_env])
+    # Create environment (per-ticker episodes, n_envs stepped together)
+    if vec_backend == 'combined':
+        n_envs = 1
+    env = make_training_env(train_dfs, n_envs=n_envs, vec_backend=vec_backend)
     
     print(f"\n🔧 DRL Configuration:")
     print(f"   Algorithm: SAC (Soft Actor-Critic)")
-    print(f"   Training timesteps: 200,000 (increased for Nifty 100)")
-    print(f"   Training stocks: All 100 Nifty 100 stocks (Nifty 50 + Nifty Next 50)")
-    print(f"   Environment: Custom TradingEnv")
+    print(f"   Training timesteps: {total_timesteps:,}")
+    print(f"   Training stocks: {len(train_dfs)} of {len(TRAINING_STOCKS)} Nifty 100 stocks"
+          f"{f' ({len(eval_dfs)} held out)' if eval_dfs else ''}")
+    print(f"   Environment: TradingEnv x{n_envs} ({vec_backend})")
     print(f"   Component weights: MTF 20%, SMC 20%, Tech 15%, Sentiment 10%, Kronos 25%, DRL 10%")
     
     # Train SAC model with increased timesteps for better learning
@@ -244,22 +291,44 @@ def train_drl():
     print(f"   This will take 25-35 minutes with 100 stocks...")
     print(f"   Progress will be shown every 10 updates...")
     
-    model = SAC(
-        'MlpPolicy',
-        env,
-        learning_rate=3e-4,
-        buffer_size=100000,
-        learning_starts=1000,
-        batch_size=256,
-        tau=0.005,
-        gamma=0.99,
-        verbose=1,
-        device='cpu'
-    )
+    latest = find_latest_checkpoint(checkpoint_dir) if resume else None
+    
+    if latest is not None:
+        # Weights, optimizer state and timestep counter come from the zip; transitions from the buffer
+        model = SAC.load(latest['model'], env=env, device='cpu')
+        if latest.get('replay_buffer') and os.path.exists(latest['replay_buffer']):
+            model.load_replay_buffer(latest['replay_buffer'])
+        print(f"   ♻️  Resumed from {latest['model']} ({model.num_timesteps:,} timesteps, "
+              f"{model.replay_buffer.size() if model.replay_buffer is not None else 0:,} transitions)")
+    else:
+        model = SAC(
+            'MlpPolicy',
+            env,
+            learning_rate=3e-4,
+            buffer_size=100000,
+            learning_starts=1000,
+            batch_size=256,
+            tau=0.005,
+            gamma=0.99,
+            gradient_steps=-1,  # one update per collected transition, whatever n_envs is
+            verbose=1,
+            device='cpu'
+        )
+    
+    callbacks = [ResumableCheckpointCallback(checkpoint_dir, save_freq=checkpoint_freq)] if checkpoint_freq > 0 else []
+    evaluator = None
+    if eval_dfs:
+        evaluator = AsyncEvaluator(eval_dfs, output_dir=checkpoint_dir)
+        callbacks.append(AsyncEvalCallback(evaluator, eval_freq=eval_freq))
     
     try:
-        # Increased timesteps for better learning with more stocks
-        model.learn(total_timesteps=200000, log_interval=10)
+        remaining = max(total_timesteps - model.num_timesteps, 0)
+        model.learn(total_timesteps=remaining, log_interval=10, callback=CallbackList(callbacks),
+                    reset_num_timesteps=latest is None)
+        
+        if evaluator is not None:
+            evaluator.close()
+            print(f"   📊 Held-out evaluations: {evaluator.results_path}")
         
         # Save model with descriptive name
         model_path = f"{MODEL_DIR}/sac_nse_nifty100.zip"
@@ -267,11 +336,17 @@ def train_drl():
         
         print(f"\n💾 Model saved: {model_path}")
         
+        # Actor-only NumPy export for the bot/live trader (no SB3 needed at inference)
+        from models.drl_policy import NumpyPolicy, exported_policy_path
+        policy_path = exported_policy_path(model_path)
+        NumpyPolicy.from_sac(model).save(policy_path, source=os.path.basename(model_path))
+        print(f"💾 Exported actor: {policy_path}")
+        
         # Get file size
         size_mb = os.path.getsize(model_path) / (1024 * 1024)
         print(f"   Model size: {size_mb:.1f} MB")
-        print(f"   Training data: {len(combined_df):,} points from {len(all_dfs)} Nifty 100 stocks")
-        print(f"   Training stocks: All 100 Nifty 100 constituents (Nifty 50 + Nifty Next 50)")
+        print(f"   Training data: {sum(len(df) for df in train_dfs.values()):,} points "
+              f"from {len(train_dfs)} Nifty 100 stocks")
         
         return model
         
@@ -282,13 +357,31 @@ def train_drl():
         return None
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the SAC trading agent on Nifty 100")
+    parser.add_argument("--n-envs", type=int, default=DRL_N_ENVS, help="Parallel environments")
+    parser.add_argument("--vec-backend", choices=['numpy', 'subproc', 'combined'], default=DRL_VEC_BACKEND)
+    parser.add_argument("--refresh-data", action="store_true", help="Ignore the cached training data")
+    parser.add_argument("--timesteps", type=int, default=200000)
+    parser.add_argument("--resume", action="store_true", help="Continue from the latest checkpoint")
+    parser.add_argument("--checkpoint-dir", default=None)
+    parser.add_argument("--checkpoint-freq", type=int, default=None, help="Timesteps between checkpoints (0 = off)")
+    parser.add_argument("--eval-freq", type=int, default=None, help="Timesteps between held-out evaluations (0 = off)")
+    args = parser.parse_args()
+    
+    print("="*100)
+    print("🚀 NSE ALPHABOT - ROBUST DRL AGENT TRAINING")
+    print("="*100)
+    
     try:
         start_time = datetime.now()
         
         print(f"\n⏰ Training started at: {start_time.strftime('%H:%M:%S')}")
         
         # Train DRL Agent
-        drl_agent = train_drl()
+        drl_agent = train_drl(n_envs=args.n_envs, vec_backend=args.vec_backend,
+                              refresh_data=args.refresh_data, total_timesteps=args.timesteps,
+                              resume=args.resume, checkpoint_dir=args.checkpoint_dir,
+                              checkpoint_freq=args.checkpoint_freq, eval_freq=args.eval_freq)
         
         end_time = datetime.now()
         duration = (end_time - start_time).total_seconds() / 60
@@ -302,8 +395,8 @@ if __name__ == "__main__":
             print(f"\n📦 Model saved:")
             print(f"  {MODEL_DIR}/sac_nse_nifty100.zip")
             print(f"\n🎯 Training Summary:")
-            print(f"  • Trained on ALL 100 Nifty 100 stocks (Nifty 50 + Nifty Next 50)")
-            print(f"  • 200,000 training timesteps")
+            print(f"  • Trained on the Nifty 100 universe (Nifty 50 + Nifty Next 50)")
+            print(f"  • {args.timesteps:,} training timesteps")
             print(f"  • 2x more data than Nifty 50 model")
             print(f"  • Enhanced learning from top 100 Indian companies")
             print(f"\n🎯 Next steps:")
@@ -0,0 +1,258 @@
+"""
+Vectorized Trading Environments for DRL Training
+One contiguous episode array per ticker; every episode samples a ticker so
+episodes never run across ticker boundaries. N environments step in lockstep
+with NumPy (VecTradingEnv) or as SubprocVecEnv workers reading a shared
+memory-mapped panel (make_subproc_env)
+"""
+
+import os
+import sys
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from stable_baselines3.common.vec_env import SubprocVecEnv, VecEnv
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from training.train_drl_robust import TradingEnv, build_feature_arrays, trading_spaces
+
+# Trading rules shared with TradingEnv
+BUY_THRESHOLD = 0.3
+SELL_THRESHOLD = -0.3
+CAPITAL_FRACTION = 0.95
+HOLDING_PENALTY = 0.01
+
+
+class TickerPanel:
+    """
+    All tickers' observation features in one contiguous array
+
+    Ticker i occupies rows offsets[i]:offsets[i + 1] of features/closes.
+    Saved as plain .npy files so workers can memory-map one shared copy.
+    """
+
+    def __init__(self, tickers: List[str], features: np.ndarray, closes: np.ndarray, offsets: np.ndarray):
+        self.tickers = list(tickers)
+        self.features = features
+        self.closes = closes
+        self.offsets = offsets
+
+    @classmethod
+    def from_frames(cls, frames: Dict[str, pd.DataFrame], min_length: int = 2) -> 'TickerPanel':
+        """
+        Build a panel from indicator-enriched DataFrames (Close, rsi, macd columns)
+
+        Args:
+            frames: Dict of ticker -> DataFrame
+            min_length: Tickers with fewer rows are skipped
+        """
+        tickers, features, closes = [], [], []
+        for ticker, df in frames.items():
+            if len(df) < min_length:
+                continue
+            f, c = build_feature_arrays(df)
+            tickers.append(ticker)
+            features.append(f)
+            closes.append(c)
+
+        offsets = np.zeros(len(tickers) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(c) for c in closes])
+
+        return cls(
+            tickers,
+            np.ascontiguousarray(np.concatenate(features)) if features else np.zeros((0, 5), dtype=np.float32),
+            np.ascontiguousarray(np.concatenate(closes)) if closes else np.zeros(0, dtype=np.float64),
+            offsets,
+        )
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    def slice(self, index: int):
+        """(start, end) row range of one ticker"""
+        return int(self.offsets[index]), int(self.offsets[index + 1])
+
+    def save(self, directory: str):
+        """Write features/closes/offsets as .npy plus a ticker list"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'features.npy'), self.features)
+        np.save(os.path.join(directory, 'closes.npy'), self.closes)
+        np.save(os.path.join(directory, 'offsets.npy'), self.offsets)
+        with open(os.path.join(directory, 'tickers.json'), 'w') as f:
+            json.dump(self.tickers, f)
+
+    @classmethod
+    def load(cls, directory: str, mmap_mode: Optional[str] = 'r') -> 'TickerPanel':
+        """Load a saved panel (memory-mapped read-only by default)"""
+        with open(os.path.join(directory, 'tickers.json'), 'r') as f:
+            tickers = json.load(f)
+        return cls(
+            tickers,
+            np.load(os.path.join(directory, 'features.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, 'closes.npy'), mmap_mode=mmap_mode),
+            np.load(os.path.join(directory, 'offsets.npy')),
+        )
+
+
+class VecTradingEnv(VecEnv):
+    """
+    N TradingEnv copies stepped together with array math
+
+    Same observation, action, trade and reward rules as TradingEnv, but each
+    episode is one ticker's history (sampled uniformly on reset) and finished
+    envs are reset automatically, as SB3 VecEnvs do.
+    """
+
+    def __init__(self, panel: TickerPanel, num_envs: int = 8, initial_capital: float = 100000,
+                 seed: Optional[int] = None, holding_penalty: float = HOLDING_PENALTY):
+        observation_space, action_space = trading_spaces()
+        super().__init__(num_envs, observation_space, action_space)
+
+        if len(panel) == 0:
+            raise ValueError("TickerPanel is empty")
+
+        self.panel = panel
+        self.initial_capital = float(initial_capital)
+        self.holding_penalty = float(holding_penalty)
+        self.rng = np.random.default_rng(seed)
+
+        self.ticker_index = np.zeros(num_envs, dtype=np.int64)
+        self.position = np.zeros(num_envs, dtype=np.int64)   # current row in the panel
+        self.last_row = np.zeros(num_envs, dtype=np.int64)   # episode ends when position reaches it
+        self.capital = np.zeros(num_envs, dtype=np.float64)
+        self.shares_held = np.zeros(num_envs, dtype=np.float64)
+        self.total_value = np.zeros(num_envs, dtype=np.float64)
+        self._actions = None
+
+    def _reset_envs(self, envs: np.ndarray):
+        tickers = self.rng.integers(0, len(self.panel), size=len(envs))
+        self.ticker_index[envs] = tickers
+        self.position[envs] = self.panel.offsets[tickers]
+        self.last_row[envs] = self.panel.offsets[tickers + 1] - 1
+        self.capital[envs] = self.initial_capital
+        self.shares_held[envs] = 0.0
+        self.total_value[envs] = self.initial_capital
+
+    def _observations(self) -> np.ndarray:
+        obs = self.panel.features[self.position].copy()
+        obs[:, 3] = np.clip(self.capital / self.initial_capital, 0, 2)
+        obs[:, 4] = np.clip(self.shares_held / 100.0, 0, 1)
+        return obs
+
+    def reset(self):
+        self._reset_envs(np.arange(self.num_envs))
+        return self._observations()
+
+    def seed(self, seed: Optional[int] = None):
+        self.rng = np.random.default_rng(seed)
+        return [seed] * self.num_envs
+
+    def step_async(self, actions: np.ndarray):
+        self._actions = np.asarray(actions, dtype=np.float64).reshape(self.num_envs, -1)[:, 0]
+
+    def step_wait(self):
+        action = self._actions
+        price = self.panel.closes[self.position]
+
+        # BUY: 95% of capital in whole shares
+        shares_to_buy = np.floor(self.capital * CAPITAL_FRACTION / price)
+        buy = (action > BUY_THRESHOLD) & (shares_to_buy > 0)
+        self.capital = np.where(buy, self.capital - shares_to_buy * price, self.capital)
+        self.shares_held = np.where(buy, self.shares_held + shares_to_buy, self.shares_held)
+
+        # SELL: close the whole position
+        sell = (action < SELL_THRESHOLD) & (self.shares_held > 0)
+        self.capital = np.where(sell, self.capital + self.shares_held * price, self.capital)
+        self.shares_held = np.where(sell, 0.0, self.shares_held)
+
+        self.position += 1
+        dones = self.position >= self.last_row
+
+        new_total_value = self.capital + self.shares_held * price
+        rewards = (new_total_value - self.total_value) / self.initial_capital
+        self.total_value = new_total_value
+        rewards = np.where((self.shares_held > 0) & (rewards < 0), rewards - self.holding_penalty, rewards)
+
+        obs = self._observations()
+        infos = [{} for _ in range(self.num_envs)]
+
+        finished = np.flatnonzero(dones)
+        if len(finished):
+            for i in finished:
+                infos[i]['terminal_observation'] = obs[i].copy()
+                infos[i]['TimeLimit.truncated'] = False
+                infos[i]['ticker'] = self.panel.tickers[self.ticker_index[i]]
+            self._reset_envs(finished)
+            obs[finished] = self._observations()[finished]
+
+        return obs, rewards.astype(np.float32), dones, infos
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name: str, indices=None) -> List:
+        return [getattr(self, attr_name) for _ in self._get_indices(indices)]
+
+    def set_attr(self, attr_name: str, value, indices=None):
+        setattr(self, attr_name, value)
+
+    def env_method(self, method_name: str, *method_args, indices=None, **method_kwargs) -> List:
+        method = getattr(self, method_name)
+        return [method(*method_args, **method_kwargs) for _ in self._get_indices(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None) -> List[bool]:
+        return [False for _ in self._get_indices(indices)]
+
+
+class TickerEpisodeEnv(TradingEnv):
+    """
+    Single TradingEnv that samples a ticker from a panel on every reset
+
+    Used inside SubprocVecEnv workers; the panel is memory-mapped, so all
+    workers share one copy of the data through the page cache.
+    """
+
+    def __init__(self, panel_dir: str, initial_capital: float = 100000, seed: Optional[int] = None):
+        self.panel = TickerPanel.load(panel_dir, mmap_mode='r')
+        self.rng = np.random.default_rng(seed)
+        self._select_ticker()
+        super().__init__(None, initial_capital=initial_capital)
+
+    def _select_ticker(self):
+        self.ticker_index = int(self.rng.integers(0, len(self.panel)))
+        start, end = self.panel.slice(self.ticker_index)
+        self.features = self.panel.features[start:end]
+        self.closes = self.panel.closes[start:end]
+        self.max_steps = end - start - 1
+
+    def reset(self, seed=None, options=None):
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        self._select_ticker()
+        return super().reset(seed=seed, options=options)
+
+
+def make_subproc_env(panel_dir: str, num_envs: int = 8, initial_capital: float = 100000,
+                     seed: int = 0) -> SubprocVecEnv:
+    """
+    num_envs worker processes, each stepping its own TickerEpisodeEnv
+
+    Args:
+        panel_dir: Directory written by TickerPanel.save
+        num_envs: Number of worker processes
+        initial_capital: Starting capital per episode
+        seed: Base seed (worker i uses seed + i)
+    """
+    def make_env(rank: int):
+        def _init():
+            return TickerEpisodeEnv(panel_dir, initial_capital=initial_capital, seed=seed + rank)
+        return _init
+
+    return SubprocVecEnv([make_env(rank) for rank in range(num_envs)])
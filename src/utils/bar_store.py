@@ -0,0 +1,252 @@
+"""
+Local Daily Bar Store
+One Parquet file per ticker (adjusted daily OHLCV, tz-naive dates) with an
+incremental yfinance update that only downloads bars after the last stored
+date, and a panel() loader that aligns any number of tickers into
+(dates x tickers) frames for array-based backtests
+
+Usage:
+    python3 src/utils/bar_store.py --universe nse --start 2014-01-01
+"""
+
+import os
+import sys
+import json
+import time
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+BAR_STORE_DIR = os.getenv('BAR_STORE_DIR', 'data/bars')
+BAR_STORE_WORKERS = int(os.getenv('BAR_STORE_WORKERS', '8'))
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+OVERLAP_DAYS = 5   # re-download the last few stored days (late corrections)
+ADJUSTMENT_TOLERANCE = 1e-4   # max relative close difference on the overlap before a full refetch
+
+
+def ticker_filename(ticker: str) -> str:
+    """
+    Filesystem-safe name for a ticker's cache files
+
+    '&' (M&M.NS) is spelled out and '/' would create a subdirectory; other
+    symbol characters, including '-' (BAJAJ-AUTO.NS), are valid in file names.
+    """
+    return ticker.replace('&', '_and_').replace('/', '_')
+
+
+def _bar_file(store_dir: str, ticker: str) -> str:
+    return os.path.join(store_dir, ticker_filename(ticker) + '.parquet')
+
+
+def load_bars(ticker: str, store_dir: str = None) -> Optional[pd.DataFrame]:
+    """Stored bars of one ticker, or None"""
+    path = _bar_file(store_dir or BAR_STORE_DIR, ticker)
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path)
+
+
+def save_bars(ticker: str, df: pd.DataFrame, store_dir: str = None) -> str:
+    """Write one ticker's bars (atomic replace)"""
+    store_dir = store_dir or BAR_STORE_DIR
+    os.makedirs(store_dir, exist_ok=True)
+    path = _bar_file(store_dir, ticker)
+    tmp_path = f"{path}.tmp"
+    df.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def fetch_bars(ticker: str, start: str, max_retries: int = 3, delay: float = 2.0):
+    """
+    Download adjusted daily bars from start (inclusive)
+
+    Returns:
+        (DataFrame or None, error message or None)
+    """
+    import yfinance as yf
+
+    for attempt in range(max_retries):
+        try:
+            # Ticker.history keeps no module-level state, unlike yf.download,
+            # so it is safe to call from several threads at once
+            df = yf.Ticker(ticker).history(start=start, interval="1d", auto_adjust=True, timeout=15)
+            df = df[FIELDS].astype('float64')
+            if df.index.tz is not None:
+                df.index = df.index.tz_localize(None)
+            df.index = pd.DatetimeIndex(df.index).normalize()
+            df.index.name = 'Date'
+            return df, None
+        except Exception as e:
+            if attempt < max_retries - 1:
+                time.sleep(delay * (attempt + 1))
+            else:
+                return None, str(e)[:40]
+    return None, "failed"
+
+
+def _same_adjustment(stored: pd.DataFrame, fresh: pd.DataFrame) -> bool:
+    """True if the closes on the overlapping dates agree (same split/dividend adjustment)"""
+    common = stored.index.intersection(fresh.index)
+    if not len(common):
+        return False
+    ratio = fresh.loc[common, 'Close'] / stored.loc[common, 'Close']
+    return bool(((ratio - 1).abs() <= ADJUSTMENT_TOLERANCE).all())
+
+
+def update_ticker(ticker: str, start: str, store_dir: str = None):
+    """
+    Append new bars for one ticker
+
+    Only bars from OVERLAP_DAYS before the last stored date are downloaded;
+    downloaded rows replace stored rows on the same date. Bars are adjusted,
+    so a split or dividend after the last update rescales the whole history
+    on the provider's side: when the overlapping closes disagree (or nothing
+    overlaps) the full history is downloaded again instead of appended.
+
+    Returns:
+        (total rows, new rows, error or None)
+    """
+    stored = load_bars(ticker, store_dir)
+    fetch_from = start
+    if stored is not None and len(stored):
+        fetch_from = (stored.index[-1] - timedelta(days=OVERLAP_DAYS)).strftime('%Y-%m-%d')
+
+    fresh, error = fetch_bars(ticker, fetch_from)
+    if fresh is None:
+        return (len(stored) if stored is not None else 0), 0, error
+
+    if stored is not None and len(stored) and len(fresh) and not _same_adjustment(stored, fresh):
+        full, error = fetch_bars(ticker, min(pd.Timestamp(start), stored.index[0]).strftime('%Y-%m-%d'))
+        if full is None:
+            return len(stored), 0, error
+        new_rows = int((full.index > stored.index[-1]).sum())
+        merged = full
+    elif stored is not None and len(stored):
+        new_rows = int((fresh.index > stored.index[-1]).sum())
+        merged = pd.concat([stored[stored.index < fresh.index[0]] if len(fresh) else stored, fresh])
+    else:
+        new_rows = len(fresh)
+        merged = fresh
+
+    merged = merged[~merged.index.duplicated(keep='last')].sort_index()
+    if len(merged):
+        save_bars(ticker, merged, store_dir)
+    return len(merged), new_rows, None
+
+
+def update_store(tickers: List[str], start: str = '2014-01-01', store_dir: str = None,
+                 max_workers: int = None) -> Dict:
+    """
+    Incrementally update the store for a universe
+
+    Args:
+        tickers: Universe
+        start: First date for tickers not stored yet
+        store_dir: Store directory (default: BAR_STORE_DIR)
+        max_workers: Concurrent downloads (default: BAR_STORE_WORKERS)
+
+    Returns:
+        Summary dict (updated, new_rows, failed)
+    """
+    store_dir = store_dir or BAR_STORE_DIR
+    max_workers = max_workers or BAR_STORE_WORKERS
+    os.makedirs(store_dir, exist_ok=True)
+
+    summary = {'updated': 0, 'new_rows': 0, 'failed': []}
+    print(f"📥 Updating {len(tickers)} tickers in {store_dir} ({max_workers} parallel)...")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(update_ticker, ticker, start, store_dir): ticker for ticker in tickers}
+        for done, future in enumerate(as_completed(futures), 1):
+            ticker = futures[future]
+            rows, new_rows, error = future.result()
+            if error:
+                summary['failed'].append(ticker)
+            else:
+                summary['updated'] += 1
+                summary['new_rows'] += new_rows
+            if done % 100 == 0 or done == len(tickers):
+                print(f"  [{done:4}/{len(tickers)}] {summary['new_rows']:,} new bars, {len(summary['failed'])} failed")
+
+    with open(os.path.join(store_dir, 'manifest.json'), 'w') as f:
+        json.dump({'updated': datetime.now().isoformat(), 'tickers': len(tickers),
+                   'failed': summary['failed']}, f, indent=2)
+    return summary
+
+
+def stored_tickers(store_dir: str = None) -> List[str]:
+    """Tickers present in the store (file names mapped back to symbols)"""
+    store_dir = store_dir or BAR_STORE_DIR
+    if not os.path.isdir(store_dir):
+        return []
+    return sorted(name[:-len('.parquet')].replace('_and_', '&')
+                  for name in os.listdir(store_dir) if name.endswith('.parquet'))
+
+
+def panel(tickers: List[str], start: str = None, end: str = None, fields: List[str] = None,
+          store_dir: str = None) -> Dict[str, pd.DataFrame]:
+    """
+    Stored bars aligned on the union of dates
+
+    Args:
+        tickers: Columns of the panel (tickers without stored bars are dropped)
+        start, end: Inclusive date range (None = everything stored)
+        fields: Subset of FIELDS
+
+    Returns:
+        Dict of field -> DataFrame (dates x tickers), NaN where a ticker has no bar
+    """
+    fields = fields or FIELDS
+    frames = {}
+    for ticker in tickers:
+        df = load_bars(ticker, store_dir)
+        if df is None:
+            continue
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        if len(df):
+            frames[ticker] = df
+
+    if not frames:
+        return {field: pd.DataFrame() for field in fields}
+
+    dates = pd.DatetimeIndex(sorted(set().union(*(df.index for df in frames.values()))))
+    return {
+        field: pd.DataFrame({ticker: df[field].reindex(dates) for ticker, df in frames.items()}, index=dates)
+        for field in fields
+    }
+
+
+def universe(name: str) -> List[str]:
+    """'nse' (full NSE equity list), 'stored' (everything in the store) or a comma-separated list"""
+    if name == 'nse':
+        from utils.fetch_all_nse_stocks import get_all_nse_stocks
+        return get_all_nse_stocks()
+    if name == 'stored':
+        return stored_tickers()
+    return [t.strip() for t in name.split(',') if t.strip()]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Create/update the local daily bar store")
+    parser.add_argument("--universe", default="nse", help="'nse', 'stored' or comma-separated tickers")
+    parser.add_argument("--start", default="2014-01-01", help="First date for new tickers")
+    parser.add_argument("--workers", type=int, default=BAR_STORE_WORKERS)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    summary = update_store(universe(args.universe), start=args.start, max_workers=args.workers)
+    print(f"\n✅ {summary['updated']} tickers updated, {summary['new_rows']:,} new bars "
+          f"in {time.perf_counter() - started:.1f}s")
+    if summary['failed']:
+        print(f"⚠️  {len(summary['failed'])} tickers failed: {', '.join(summary['failed'][:10])}")
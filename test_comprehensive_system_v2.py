@@ -556,6 +556,336 @@ try:
 except Exception as e:
     test_result("Memory usage", False, e)
 
+# ============================================================================
+# TEST 18: Exported DRL Actor Parity
+# ============================================================================
+
+test_header("19. Exported DRL Actor Parity (NumPy vs SB3)")
+try:
+    from stable_baselines3 import SAC
+    import numpy as np
+    import tempfile
+    import time
+    from models.drl_policy import NumpyPolicy, check_parity
+    
+    model_path = next((p for p in ['models/sac_nse_nifty100.zip', 'models/sac_nse_nifty50.zip',
+                                   'models/sac_nse_retrained.zip', 'models/sac_nse_10y_final.zip']
+                       if os.path.exists(p)), None)
+    assert model_path is not None, "No DRL agent available"
+    
+    agent = SAC.load(model_path, device='cpu')
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        policy_path = os.path.join(tmp_dir, 'actor.npz')
+        NumpyPolicy.from_sac(agent).save(policy_path)
+        
+        start = time.perf_counter()
+        policy = NumpyPolicy.load(policy_path)
+        load_ms = (time.perf_counter() - start) * 1000
+    
+    # Same observation as the prediction test, single and batched
+    obs = np.array([0.285, 0.65, 0.05, 1.0, 0.0], dtype=np.float32)
+    expected, _ = agent.predict(obs, deterministic=True)
+    actual, _ = policy.predict(obs)
+    assert actual.shape == expected.shape, f"Shape mismatch: {actual.shape} vs {expected.shape}"
+    assert abs(float(actual[0]) - float(expected[0])) < 1e-5, f"Action mismatch: {actual[0]} vs {expected[0]}"
+    
+    max_diff = check_parity(agent, policy, n_obs=1000)
+    assert max_diff < 1e-5, f"Max action difference too high: {max_diff:.2e}"
+    
+    print(f"   ✓ Exported from: {os.path.basename(model_path)}")
+    print(f"   ✓ Load time: {load_ms:.1f} ms")
+    print(f"   ✓ Single obs: SB3 {expected[0]:+.5f} | NumPy {actual[0]:+.5f}")
+    print(f"   ✓ 1000 random obs: max |Δaction| = {max_diff:.2e}")
+    
+    test_result("Exported DRL actor parity", True)
+except Exception as e:
+    test_result("Exported DRL actor parity", False, e)
+
+# ============================================================================
+# Synthetic bars for the backtest engine checks below (no network needed)
+# ============================================================================
+
+def synthetic_bars(n_tickers=12, start='2012-01-02', end='2018-12-31', seed=7):
+    """Random-walk daily OHLCV per ticker (dict of ticker -> DataFrame)"""
+    import numpy as np
+    import pandas as pd
+    
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end)
+    bars = {}
+    for j in range(n_tickers):
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.018, len(dates))))
+        open_ = close * np.exp(rng.normal(0, 0.006, len(dates)))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, len(dates))))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, len(dates))))
+        bars[f"SYN{j:02d}.NS"] = pd.DataFrame({
+            'Open': open_, 'High': high, 'Low': low, 'Close': close,
+            'Volume': rng.integers(100000, 1000000, len(dates)).astype(np.float64),
+        }, index=pd.DatetimeIndex(dates, name='Date'))
+    return bars
+
+# ============================================================================
+# TEST 20: Sharded Backtest Parity
+# ============================================================================
+
+test_header("20. Sharded Backtest Parity (carried yearly shards vs one run)")
+try:
+    import tempfile
+    import numpy as np
+    from utils.bar_store import save_bars
+    from evaluation.fast_backtest import resolve_params
+    from evaluation.panel_backtest import PanelSignals, run_panel_backtest
+    from evaluation.sharded_backtest import run_sharded, default_warmup_days
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        store_dir = os.path.join(tmp_dir, 'bars')
+        bars = synthetic_bars()
+        for ticker, df in bars.items():
+            save_bars(ticker, df, store_dir)
+        tickers = sorted(bars)
+        
+        params = resolve_params()
+        signals = PanelSignals.from_store(tickers, end='2018-12-31', params=params, store_dir=store_dir, verbose=False)
+        single = run_panel_backtest(signals, start='2016-01-01', params=params, verbose=False)
+        
+        # Default warm-up: the 2018 shard starts loading well after the first stored bar
+        sharded = run_sharded(tickers, '2016-01-01', '2018-12-31', carry=True,
+                              output_dir=os.path.join(tmp_dir, 'shards'), store_dir=store_dir)
+    
+    assert len(single['trades']) > 0, "Synthetic panel produced no trades"
+    assert len(sharded['trades']) == len(single['trades']), \
+        f"Trade count mismatch: {len(sharded['trades'])} vs {len(single['trades'])}"
+    assert abs(sharded['final_capital'] - single['final_capital']) < 1e-6, \
+        f"Final capital mismatch: {sharded['final_capital']:,.2f} vs {single['final_capital']:,.2f}"
+    assert np.allclose(sharded['equity'].values, single['equity'].values), "Equity curves differ"
+    
+    print(f"   ✓ Warm-up: {default_warmup_days()} calendar days per shard")
+    print(f"   ✓ {len(single['trades'])} trades | final ₹{single['final_capital']:,.2f} (single) "
+          f"vs ₹{sharded['final_capital']:,.2f} (3 carried shards)")
+    
+    test_result("Sharded backtest parity", True)
+except Exception as e:
+    test_result("Sharded backtest parity", False, e)
+
+# ============================================================================
+# TEST 21: Precomputed Backtest Engine Parity
+# ============================================================================
+
+test_header("21. Precomputed Backtest Parity (run_fast_backtest vs simulate_reference)")
+try:
+    import backtest_bot_fixed
+    from evaluation.fast_backtest import run_fast_backtest
+    
+    bars = synthetic_bars(n_tickers=8, start='2020-01-01', end='2022-12-30', seed=11)
+    tickers = sorted(bars)
+    backtest_bot_fixed.TEST_STOCKS = tickers
+    backtest_bot_fixed.BACKTEST_START = '2020-06-01'
+    
+    reference_trades, reference_capital, reference_dates = backtest_bot_fixed.simulate_reference(bars)
+    fast_trades, fast_capital, fast_dates = run_fast_backtest(bars, tickers, '2020-06-01', params={
+        'initial_capital': backtest_bot_fixed.INITIAL_CAPITAL,
+        'risk_per_trade': backtest_bot_fixed.RISK_PER_TRADE,
+        'max_positions': backtest_bot_fixed.MAX_POSITIONS,
+        'min_confidence': backtest_bot_fixed.MIN_CONFIDENCE,
+        'min_expected_return': backtest_bot_fixed.MIN_EXPECTED_RETURN,
+    }, verbose=False)
+    
+    def trade_key(t):
+        return (t.ticker, t.entry_date, t.shares, t.exit_date, t.exit_reason, round(float(t.exit_price), 6))
+    
+    assert len(reference_trades) > 0, "Synthetic data produced no trades"
+    assert len(fast_dates) == len(reference_dates), "Simulated dates differ"
+    assert [trade_key(t) for t in fast_trades] == [trade_key(t) for t in reference_trades], \
+        "Trade lists differ"
+    assert abs(fast_capital - reference_capital) < 1e-6, \
+        f"Final capital mismatch: {fast_capital:,.2f} vs {reference_capital:,.2f}"
+    
+    print(f"   ✓ {len(fast_trades)} identical trades | final ₹{fast_capital:,.2f}")
+    
+    test_result("Precomputed backtest parity", True)
+except Exception as e:
+    test_result("Precomputed backtest parity", False, e)
+
+# ============================================================================
+# TEST 22: Vectorized Exit Engine Parity
+# ============================================================================
+
+test_header("22. Exit Engine Parity (resolve_exits vs check_exit loop)")
+try:
+    import numpy as np
+    from backtest_bot_fixed import check_exit
+    from evaluation.fast_backtest import Trade
+    from evaluation.exit_engine import resolve_exits, reason_name
+    
+    df = synthetic_bars(n_tickers=1, start='2020-01-01', end='2021-12-31', seed=3)['SYN00.NS']
+    dates, close = df.index.values, df['Close'].values
+    entry_pos = np.arange(0, len(df) - 1, 3)
+    stop = close[entry_pos] * 0.96
+    targets = close[entry_pos, None] * np.array([1.03, 1.05, 1.08])
+    
+    exits = resolve_exits(dates, df['High'].values, df['Low'].values, close, entry_pos, stop, targets,
+                          time_stop_days=10)
+    
+    for i, pos in enumerate(entry_pos):
+        trade = Trade('SYN00.NS', df.index[pos], close[pos], 10, stop[i], *targets[i])
+        exit_pos = exits['exit_pos'][i]
+        if exit_pos < 0:
+            assert not check_exit(trade, df, df.index[-1])[0], f"Entry {pos}: loop exits, engine does not"
+            continue
+        
+        should_exit, exit_price, exit_reason = check_exit(trade, df, df.index[exit_pos])
+        assert should_exit, f"Entry {pos}: engine exits at bar {exit_pos}, loop does not"
+        assert exit_reason == reason_name(exits['reason'][i]), \
+            f"Entry {pos}: {reason_name(exits['reason'][i])} vs {exit_reason}"
+        assert abs(exit_price - exits['exit_price'][i]) < 1e-9, f"Entry {pos}: exit price differs"
+        if exit_pos - 1 > pos:
+            assert not check_exit(trade, df, df.index[exit_pos - 1])[0], \
+                f"Entry {pos}: loop exits before bar {exit_pos}"
+    
+    reasons = [reason_name(code) for code in exits['reason']]
+    print(f"   ✓ {len(entry_pos)} entries match the first-hit loop | "
+          + ", ".join(f"{name}: {reasons.count(name)}" for name in sorted(set(reasons))))
+    
+    test_result("Exit engine parity", True)
+except Exception as e:
+    test_result("Exit engine parity", False, e)
+
+# ============================================================================
+# TEST 23: Equity Metrics on a Hand-Computed Curve
+# ============================================================================
+
+test_header("23. Equity Metrics (hand-computed curve)")
+try:
+    import numpy as np
+    from evaluation.metrics import equity_metrics, max_drawdown, max_drawdown_duration
+    
+    # Daily returns +20%, -25%, +20%, +25%, -10%; peaks 100, 120, 120, 120, 135, 135
+    equity = np.array([100.0, 120.0, 90.0, 108.0, 135.0, 121.5])
+    flat = np.linspace(100.0, 110.0, len(equity))   # never below its peak
+    
+    expected = {
+        'total_return': 0.215,
+        'cagr': 1.215 ** (1 / 1.25) - 1,             # 5 bars at 4 bars/year = 1.25 years
+        'volatility': np.sqrt(0.197 / 4) * 2,        # sum of squared deviations from the 6% mean / (n-1)
+        'sharpe': 0.06 / np.sqrt(0.197 / 4) * 2,
+        'sortino': 0.06 / np.sqrt(0.0725 / 5) * 2,   # downside: (-25%, -10%) over all 5 returns
+        'max_drawdown': 0.25,                        # 120 -> 90
+        'max_drawdown_days': 2,                      # bars 2-3 below the 120 peak
+    }
+    expected['calmar'] = expected['cagr'] / 0.25
+    
+    metrics = equity_metrics(np.vstack([equity, flat]), periods_per_year=4)
+    for name, value in expected.items():
+        assert np.isclose(metrics[name][0], value), f"{name}: {metrics[name][0]} vs {value}"
+    
+    assert np.allclose(max_drawdown(equity), [0.25]), "max_drawdown of a single curve"
+    assert max_drawdown_duration(equity)[0] == 2, "max_drawdown_duration of a single curve"
+    assert metrics['max_drawdown'][1] == 0 and metrics['max_drawdown_days'][1] == 0, "Flat curve has a drawdown"
+    assert metrics['calmar'][1] == 0, "Calmar without drawdown should be 0"
+    
+    # A missing day is forward-filled, not treated as a loss
+    gapped = equity.copy()
+    gapped[3] = np.nan
+    assert np.isclose(max_drawdown(gapped)[0], 0.25), "NaN gap changed the drawdown"
+    
+    print(f"   ✓ Sharpe {metrics['sharpe'][0]:.4f} | Sortino {metrics['sortino'][0]:.4f} | "
+          f"CAGR {metrics['cagr'][0]:.2%} | Max DD {metrics['max_drawdown'][0]:.0%} "
+          f"({metrics['max_drawdown_days'][0]} bars)")
+    
+    test_result("Equity metrics", True)
+except Exception as e:
+    test_result("Equity metrics", False, e)
+
+# ============================================================================
+# TEST 24: Trade Ledger Round-Trip
+# ============================================================================
+
+test_header("24. Trade Ledger Save/Load Round-Trip")
+try:
+    import tempfile
+    import numpy as np
+    import pandas as pd
+    from evaluation.fast_backtest import Trade
+    from evaluation.trade_ledger import TradeLedger, LEDGER_DTYPE
+    
+    def make_trade(ticker, entry, price, shares, exit_date=None, exit_price=None, reason=None):
+        trade = Trade(ticker, pd.Timestamp(entry), price, shares, price * 0.95, price * 1.04, price * 1.06, price * 1.08)
+        if exit_date is not None:
+            trade.close(pd.Timestamp(exit_date), exit_price, reason)
+        return trade
+    
+    run_a = [make_trade('RELIANCE.NS', '2024-01-02', 2500.5, 4, '2024-01-09', 2600.52, 'TARGET_1'),
+             make_trade('M&M.NS', '2024-01-03', 1650.0, 6, '2024-01-05', 1567.5, 'STOP_LOSS'),
+             make_trade('BAJAJ-AUTO.NS', '2024-01-04', 7100.25, 1)]   # still open
+    run_b = [make_trade('M&M.NS', '2024-02-01', 1700.0, 5, '2024-02-12', 1712.3, 'TIME_STOP'),
+             make_trade('TCS.NS', '2024-02-02', 3900.0, 2, '2024-02-06', 4212.0, 'TARGET_3')]
+    ledger = TradeLedger.concat([TradeLedger.from_trades(run_a, run_id=1), TradeLedger.from_trades(run_b, run_id=2)])
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'trades.parquet')
+        ledger.save(path)
+        loaded = TradeLedger.load(path)
+    
+    assert len(loaded) == len(ledger) == 5, f"Row count: {len(loaded)}"
+    for name in LEDGER_DTYPE.names:
+        before, after = ledger.column(name), loaded.column(name)
+        if before.dtype.kind in 'fM':
+            assert np.array_equal(before, after, equal_nan=True), f"{name} changed"
+        else:
+            assert list(before) == list(after), f"{name} changed: {list(before)} vs {list(after)}"
+    
+    assert loaded.to_dicts() == ledger.to_dicts(), "to_dicts differs after reload"
+    assert loaded[2].status == 'OPEN' and loaded[2].exit_reason is None, "Open trade not preserved"
+    assert len(loaded.filter(ticker='M&M.NS')) == 2, "Ticker filter after reload"
+    assert loaded.filter(run_id=2, closed=True).column('pnl').sum() == ledger.filter(run_id=2).column('pnl').sum()
+    
+    print(f"   ✓ {len(loaded)} trades, {len(loaded.tickers)} tickers, runs {sorted(set(loaded.column('run_id')))} "
+          f"identical after Parquet round-trip")
+    
+    test_result("Trade ledger round-trip", True)
+except Exception as e:
+    test_result("Trade ledger round-trip", False, e)
+
+# ============================================================================
+# TEST 25: Intraday First-Touch Fills
+# ============================================================================
+
+test_header("25. Intraday First-Touch Fills (gap opens, same-bar precedence)")
+try:
+    import numpy as np
+    from evaluation.intraday_fills import first_touch
+    from evaluation.exit_engine import REASON_STOP, REASON_TARGET
+    
+    stop, targets = 95.0, (105.0, 110.0, 115.0)
+    
+    def bars(*rows):
+        open_, high, low = (np.array(column, dtype=np.float64) for column in zip(*rows))
+        return first_touch(open_, high, low, stop, targets)
+    
+    cases = [
+        # (open, high, low) per bar                        -> (fill, reason)
+        ("gap below stop fills at the open", [(100, 101, 99), (90, 92, 88)], (90.0, REASON_STOP)),
+        ("stop touched intrabar fills at the stop", [(100, 101, 94)], (95.0, REASON_STOP)),
+        ("gap above T2 fills at the open", [(100, 101, 99), (112, 113, 111)], (112.0, REASON_TARGET + 1)),
+        ("T1 touched intrabar fills at T1", [(100, 106, 99)], (105.0, REASON_TARGET)),
+        ("high exactly at T3 is T3", [(100, 115, 99)], (115.0, REASON_TARGET + 2)),
+        ("stop and target in one bar: stop first", [(100, 111, 94)], (95.0, REASON_STOP)),
+        ("earlier target beats a later stop", [(100, 106, 99), (100, 101, 90)], (105.0, REASON_TARGET)),
+        ("earlier stop beats a later target", [(100, 101, 94), (100, 120, 99)], (95.0, REASON_STOP)),
+    ]
+    for name, rows, expected in cases:
+        touch = bars(*rows)
+        assert touch == expected, f"{name}: {touch} vs {expected}"
+        print(f"   ✓ {name}")
+    
+    assert bars((100, 104, 96), (101, 104.9, 95.1)) is None, "Nothing touched should return None"
+    print(f"   ✓ untouched levels return None")
+    
+    test_result("Intraday first-touch fills", True)
+except Exception as e:
+    test_result("Intraday first-touch fills", False, e)
+
 # ============================================================================
 # FINAL REPORT
 # ============================================================================